@@ -1,11 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import matching, scheduling, pricing, chatbot
+from fastapi.responses import ORJSONResponse
+from routers import matching, scheduling, pricing, chatbot, metrics
 from fastapi.middleware.cors import CORSMiddleware
+from services.executors import shutdown_executors
+from services.calendar_outbox import outbox_worker, list_assigned_bookings
+from services.availability import rebuild_availability
+from services.cleaner_registry import load_cleaners_file
+from services.route_client import route_client
+from services.warmup import STARTUP_WARMUP, warm_up
+from services.message_writer import message_writer
+from services.conversation_service import RETENTION_DAYS, apply_retention
+from services.conversation_archive import ARCHIVE_AFTER_DAYS, archive_worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if STARTUP_WARMUP:
+        # Finish before the app reports ready (heavy imports stay lazy otherwise)
+        await asyncio.to_thread(warm_up, [("openai_client", scheduling.openai_client)])
+    if RETENTION_DAYS:
+        await asyncio.to_thread(apply_retention)
+    load_cleaners_file()
+    rebuild_availability(list_assigned_bookings())
+    outbox_worker.start()
+    message_writer.start()
+    if ARCHIVE_AFTER_DAYS > 0:
+        archive_worker.start()
+    yield
+    archive_worker.stop()
+    outbox_worker.stop()
+    message_writer.stop()
+    await route_client.aclose()
+    shutdown_executors()
+
 
 app = FastAPI(
     title="Smart Cleaning AI Platform",
     description="AI-powered platform for cleaner matching, scheduling, pricing, and chatbot",
-    version="1.0"
+    version="1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Allow frontend requests (optional)
@@ -22,6 +58,7 @@ app.include_router(matching.router)
 app.include_router(scheduling.router)
 app.include_router(pricing.router)
 app.include_router(chatbot.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def root():
@@ -1,7 +1,9 @@
 # routers/chatbot.py
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.chat_service import ai_chat
+from services.chat_service import ai_chat, ai_chat_stream
+from services.streaming import sse_event, SSE_HEADERS
 
 router = APIRouter(prefix="/chatbot", tags=["AI Chat Assistant"])
 
@@ -13,16 +15,37 @@ class ChatRequest(BaseModel):
 
 
 @router.post("/chat")
-def chat_with_ai(body: ChatRequest):
+async def chat_with_ai(body: ChatRequest):
     """
     Chat with AI Assistant.
     - Returns AI response
     - Handles conversation history
     - Can confirm appointment if user says 'yes'
     """
-    response = ai_chat(
+    response = await ai_chat(
         user_email=body.user_email,
-        user_message=body.message,
-        confirmation=body.confirmation
+        user_message=body.message
     )
     return {"response": response}
+
+
+@router.post("/chat/stream")
+async def chat_with_ai_stream(body: ChatRequest):
+    """
+    Chat with AI Assistant, streamed as server-sent events:
+    - `token` events carry response text as it is generated
+    - a closing `done` event carries the full response
+    - an `error` event replaces `done` if the model call fails
+    """
+    async def events():
+        chunks = []
+        try:
+            async for chunk in ai_chat_stream(body.user_email, body.message):
+                chunks.append(chunk)
+                yield sse_event("token", {"text": chunk})
+        except Exception as e:
+            yield sse_event("error", {"message": str(e)})
+            return
+        yield sse_event("done", {"response": "".join(chunks)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,10 +1,68 @@
+from typing import Optional
 from fastapi import APIRouter, Query
-from services.route_service import get_distance_based_match
+from pydantic import BaseModel, Field
+from schemas.models import Cleaner
+from services.route_service import aget_distance_based_match
+from services.ranking_service import rank_cleaners, MAX_TOP_K
+from services.cleaner_registry import nearby_cleaners, upsert_cleaners, remove_cleaner
 
 router = APIRouter(prefix="/match", tags=["Smart Job Matching"])
 
+# Registry candidates pulled from the location index per requested match
+REGISTRY_CANDIDATES_PER_MATCH = 20
+REGISTRY_MIN_CANDIDATES = 200
+
+
+class RankRequest(BaseModel):
+    customer_lat: float
+    customer_lon: float
+    cleaners: Optional[list[Cleaner]] = None  # defaults to the cleaner registry
+    top_k: int = Field(5, ge=1, le=MAX_TOP_K)
+    max_distance_km: Optional[float] = None
+    road_distance: bool = True
+
+
 @router.get("/")
-def match_cleaner(customer_lat: float, customer_lon: float, cleaner_lat: float, cleaner_lon: float):
+async def match_cleaner(customer_lat: float, customer_lon: float, cleaner_lat: float, cleaner_lon: float):
     """Suggest best cleaner based on distance"""
-    result = get_distance_based_match(customer_lat, customer_lon, cleaner_lat, cleaner_lon)
+    result = await aget_distance_based_match(customer_lat, customer_lon, cleaner_lat, cleaner_lon)
     return result
+
+
+@router.post("/rank")
+def rank_matching_cleaners(body: RankRequest):
+    """
+    Rank a pool of cleaners for a customer by distance and rating.
+    Straight-line distances are computed for the whole pool at once; only
+    the shortlist is sent to OpenRouteService (one matrix request).
+    Registry cleaners come from the location index: everyone inside
+    max_distance_km, or else the nearest few hundred (rating is only
+    30% of the score, so cleaners further out rarely make the top k).
+    """
+    if body.cleaners is not None:
+        cleaners = body.cleaners
+    else:
+        cleaners = nearby_cleaners(
+            body.customer_lat, body.customer_lon,
+            radius_km=body.max_distance_km,
+            limit=None if body.max_distance_km is not None
+            else max(body.top_k * REGISTRY_CANDIDATES_PER_MATCH, REGISTRY_MIN_CANDIDATES)
+        )
+    return rank_cleaners(
+        body.customer_lat, body.customer_lon, cleaners,
+        top_k=body.top_k,
+        max_distance_km=body.max_distance_km,
+        road_distance=body.road_distance
+    )
+
+
+@router.post("/cleaners")
+def register_cleaners(cleaners: list[Cleaner]):
+    """Add or update cleaners in the registry"""
+    return {"updated": upsert_cleaners(cleaners)}
+
+
+@router.delete("/cleaners/{cleaner_id}")
+def unregister_cleaner(cleaner_id: int):
+    """Take a cleaner off duty"""
+    return {"removed": remove_cleaner(cleaner_id)}
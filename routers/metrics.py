@@ -0,0 +1,27 @@
+# routers/metrics.py
+from fastapi import APIRouter
+from services.calendar_service import calendar_client_stats
+from services.distance_cache import distance_cache
+from services.llm_cache import llm_cache
+from services.intent_router import intent_router
+from services.message_writer import message_writer
+from services.conversation_archive import archive_worker
+from services.single_flight import single_flight_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/")
+def service_metrics():
+    """
+    Runtime counters and timings of shared clients and caches.
+    """
+    return {
+        "calendar_client": calendar_client_stats(),
+        "distance_cache": distance_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "intent_router": intent_router.stats(),
+        "message_writer": message_writer.stats(),
+        "conversation_archive": archive_worker.stats(),
+        "single_flight": single_flight_stats()
+    }
@@ -1,22 +1,73 @@
 # routes/pricing.py
 
+from typing import Optional
 from fastapi import APIRouter
+from pydantic import BaseModel, Field
 from services.prediction_service import suggest_price
+from services.pricing_engine import pricing_engine
 
 router = APIRouter(
     prefix="/price",
     tags=["Intelligent Pricing"]
 )
 
+# Limits for one /price/batch request
+MAX_BATCH_ROWS = 10_000
+MAX_DURATION_HOURS = 24
+
+
+class PriceRow(BaseModel):
+    area: str
+    frequency: int
+    rating: float
+    service_id: str = "1"
+    urgency: str = "standard"
+    duration_hours: Optional[float] = Field(None, gt=0, le=MAX_DURATION_HOURS)
+
+
+class PriceBatchRequest(BaseModel):
+    rows: list[PriceRow] = Field(..., max_length=MAX_BATCH_ROWS)
+
+
 @router.get("/")
-def intelligent_pricing(area: str, frequency: int, rating: float):
+def intelligent_pricing(area: str, frequency: int, rating: float, service_id: str = "1",
+                        urgency: str = "standard", use_llm: Optional[bool] = None):
     """
     Recommend a fair cleaning price
     Example: /price/?area=Dhanmondi&frequency=2&rating=4.5
+    Add use_llm=true to ask the text-generation model instead of the rules table.
     """
-    result = suggest_price(area, frequency, rating)
+    result = suggest_price(area, frequency, rating, service_id=service_id, urgency=urgency, use_llm=use_llm)
+    if "error" in result:
+        return {"status": "error", "message": result["error"]}
     # Ensure the response is a flat JSON
     if "recommended_price" in result and isinstance(result["recommended_price"], dict) and "error" in result["recommended_price"]:
         # Return empty string if error key exists but is empty
         return {"recommended_price": ""}
     return result
+
+
+@router.post("/batch")
+def batch_pricing(body: PriceBatchRequest):
+    """
+    Price many (area, frequency, rating, service) rows in one call.
+    Prices come back in request order, per session and per month.
+    """
+    rows = body.rows
+    try:
+        result = pricing_engine.quote_batch(
+            [r.area for r in rows],
+            [r.frequency for r in rows],
+            [r.rating for r in rows],
+            service_ids=[r.service_id for r in rows],
+            urgencies=[r.urgency for r in rows],
+            duration_hours=[r.duration_hours for r in rows]
+        )
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    return {
+        "currency": pricing_engine.currency,
+        "count": len(rows),
+        "prices": result["prices"].tolist(),
+        "monthly_totals": result["monthly_totals"].tolist()
+    }
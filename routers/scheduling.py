@@ -1,58 +1,193 @@
 # routers/scheduling.py - Complete Conversational Flow
+from typing import Optional
 from fastapi import APIRouter
-from pydantic import BaseModel
-from datetime import datetime, timedelta
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from datetime import date, datetime, timedelta
+from functools import partial
 import json
-import re
-from openai import OpenAI
 from services.prediction_service import predict_next_schedule
-from services.calendar_service import create_calendar_event
-from services.conversation_service import save_message, get_user_messages, get_current_conversation
+from services.schedule_forecaster import forecast_batch
+from services.calendar_service import create_calendar_events_bulk
+from services.calendar_outbox import get_outbox_entry
+from services.conversation_service import (
+    save_messages, get_current_conversation, get_messages_since, get_history_page, HISTORY_PAGE_SIZE
+)
+from services.context_builder import build_context, refresh_summary_later
+from services.intent_router import intent_router, confirmation_intent
+from services.booking_state import (
+    get_booking_session, select_service, set_pending_appointment, close_booking_session,
+    confirm_booking, CANCELLED
+)
+from services.executors import run_db, run_calendar, llm_slot
+from services.availability import availability_index
+from services.service_catalog import SERVICES
+from services.streaming import JsonFieldStreamer, sse_event, SSE_HEADERS
 import os
 
 router = APIRouter(prefix="/schedule", tags=["Predictive Scheduling"])
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Define services
-SERVICES = {
-    "1": {
-        "name": "Standard Cleaning",
-        "description": "Basic cleaning of all rooms, dusting, vacuuming, and surface wiping",
-        "duration": 2
-    },
-    "2": {
-        "name": "Deep Cleaning",
-        "description": "Thorough cleaning including kitchen appliances, behind furniture, scrubbing bathrooms, and detailed dusting",
-        "duration": 4
-    },
-    "3": {
-        "name": "Move-in/Move-out Cleaning",
-        "description": "Complete cleaning for vacant properties, including inside cabinets, appliances, and deep scrubbing",
-        "duration": 6
-    },
-    "4": {
-        "name": "Post-Construction Cleaning",
-        "description": "Removal of construction debris, dust, and thorough cleaning of all surfaces",
-        "duration": 8
-    },
-    "5": {
-        "name": "Office Cleaning",
-        "description": "Professional cleaning of office spaces, desks, floors, and common areas",
-        "duration": 3
-    }
-}
+# OpenAI client, created on first use (see openai_client)
+client = None
+
+# Limits for one /schedule/bulk request (events x occurrences is the number of calendar inserts)
+MAX_BULK_EVENTS = 500
+MAX_BULK_OCCURRENCES = 104  # two years of weekly cleanings
+MAX_BULK_REPEAT_DAYS = 365
+
+# Compact service list for the system prompt, built once
+SERVICES_PROMPT = "\n".join(
+    f"{sid}. {service['name']} ({service['duration']}h): {service['description']}"
+    for sid, service in SERVICES.items()
+)
 
 class ChatMessage(BaseModel):
     message: str
     email: str
+    # Id of the newest message the client already has; the reply then
+    # carries only newer messages in conversation_history
+    since: Optional[int] = None
+
+
+class BulkEvent(BaseModel):
+    start_time: datetime
+    end_time: Optional[datetime] = None  # defaults to the service duration
+    title: Optional[str] = None
+    description: Optional[str] = None
+
+
+class BulkScheduleRequest(BaseModel):
+    email: Optional[str] = None
+    service_id: str = "1"
+    events: list[BulkEvent] = Field(min_length=1, max_length=MAX_BULK_EVENTS)
+    repeat_every_days: Optional[int] = Field(None, ge=1, le=MAX_BULK_REPEAT_DAYS)  # e.g. 7 for weekly cleanings
+    occurrences: int = Field(1, ge=1, le=MAX_BULK_OCCURRENCES)
+
+
+class CustomerHistory(BaseModel):
+    customer_id: str
+    dates: list[str]
+
+
+class ForecastBatchRequest(BaseModel):
+    customers: list[CustomerHistory]
+    today: Optional[date] = None
 
 @router.get("/")
-def auto_schedule(dates: str):
-    result = predict_next_schedule(dates)
+def auto_schedule(dates: str, use_llm: Optional[bool] = None):
+    result = predict_next_schedule(dates, use_llm=use_llm)
     return {"predicted_next_schedule": result}
 
 
+@router.post("/forecast/batch")
+def forecast_schedules(body: ForecastBatchRequest):
+    """
+    Next cleaning date and confidence for many customers at once
+    (e.g. a nightly reminder job). Runs locally, no model calls.
+    """
+    forecasts = forecast_batch([c.dates for c in body.customers], today=body.today)
+    return {
+        "count": len(forecasts),
+        "forecasts": [dict(f, customer_id=c.customer_id) for c, f in zip(body.customers, forecasts)]
+    }
+
+
+@router.post("/bulk")
+async def bulk_schedule(body: BulkScheduleRequest):
+    """
+    Book many appointments at once (a customer's next N cleanings, a crew's week).
+    Each event can repeat every `repeat_every_days` for `occurrences` times.
+    Calendar inserts are grouped into batch HTTP requests, at most
+    MAX_BULK_EVENTS per request (events x occurrences).
+    """
+    if body.service_id not in SERVICES:
+        return {"status": "error", "message": f"Unknown service_id: {body.service_id}"}
+    service = SERVICES[body.service_id]
+    occurrences = body.occurrences if body.repeat_every_days else 1
+    if len(body.events) * occurrences > MAX_BULK_EVENTS:
+        return {"status": "error",
+                "message": f"Too many appointments: {len(body.events) * occurrences} (at most {MAX_BULK_EVENTS})"}
+    for i, event in enumerate(body.events):
+        if event.end_time and event.end_time <= event.start_time:
+            return {"status": "error", "message": f"events[{i}]: end_time must be after start_time"}
+
+    events = []
+    for event in body.events:
+        duration = (event.end_time - event.start_time) if event.end_time else timedelta(hours=service["duration"])
+        for n in range(occurrences):
+            start_time = event.start_time + timedelta(days=(body.repeat_every_days or 0) * n)
+            events.append({
+                "title": event.title or f"Smart Cleaning - {service['name']}",
+                "start_time": start_time,
+                "end_time": start_time + duration,
+                "description": event.description or service["description"],
+                "email": body.email
+            })
+
+    results = await run_calendar(create_calendar_events_bulk, events)
+    created = sum(1 for r in results if r["status"] == "success")
+    return {
+        "status": "success" if created == len(results) else "partial" if created else "error",
+        "requested": len(results),
+        "created": created,
+        "results": results
+    }
+
+
+@router.get("/slots")
+def available_slots(service_id: str = "1", start: Optional[datetime] = None,
+                    cleaner_id: Optional[str] = None, k: int = 5):
+    """
+    Next free start times for a service, from the local availability index.
+    Example: /schedule/slots?service_id=2&start=2025-12-15T09:00&k=5
+    """
+    if service_id not in SERVICES:
+        return {"status": "error", "message": f"Unknown service_id: {service_id}"}
+    start = start or datetime.now()
+    duration_minutes = SERVICES[service_id]["duration"] * 60
+
+    if cleaner_id:
+        slots = [(slot, cleaner_id) for slot in
+                 availability_index.next_free_slots(cleaner_id, start, duration_minutes, k=k)]
+    else:
+        slots = availability_index.next_free_slots_any(start, duration_minutes, k=k)
+
+    return {
+        "service": SERVICES[service_id]["name"],
+        "duration_hours": SERVICES[service_id]["duration"],
+        "slots": [
+            {
+                "cleaner_id": slot_cleaner,
+                "start_time": slot.strftime('%Y-%m-%d %H:%M'),
+                "end_time": (slot + timedelta(minutes=duration_minutes)).strftime('%Y-%m-%d %H:%M')
+            }
+            for slot, slot_cleaner in slots
+        ]
+    }
+
+
+@router.get("/bookings/{outbox_id}")
+async def booking_calendar_status(outbox_id: int):
+    """
+    Calendar delivery status of a confirmed booking (pending / sent / failed).
+    """
+    entry = await run_db(get_outbox_entry, outbox_id)
+    if not entry:
+        return {"status": "error", "message": "Booking not found"}
+    return entry
+
+
+@router.get("/history")
+async def conversation_history_page(email: str, before: Optional[int] = None, limit: int = HISTORY_PAGE_SIZE):
+    """
+    A user's full conversation history, one keyset page at a time
+    (newest page first, messages in chronological order).
+    Pass `next_before` as `before` to load the previous page.
+    """
+    page = await run_db(get_history_page, email, before, limit)
+    return ORJSONResponse(page)
+
+
 @router.post("/chat")
 async def conversational_appointment(body: ChatMessage):
     """
@@ -61,68 +196,339 @@ async def conversational_appointment(body: ChatMessage):
     2. User selects service
     3. Ask for date/time
     4. Confirm booking
-    5. Save to calendar
+    5. Queue the calendar event (delivered by the outbox worker)
     """
     user_message = body.message.strip()
     user_email = body.email
-    
-    save_message(user_email, f"User: {user_message}")
-    history = get_user_messages(user_email, limit=30)
-    
-    # Extract conversation state
-    selected_service = extract_selected_service(history)
-    pending_appointment = extract_pending_appointment(history)
+
+    reply, turn = await begin_chat_turn(user_email, user_message, body.since)
+    if reply:
+        return ORJSONResponse(with_cursor(reply, body.since))
+
+    # Use OpenAI to understand user intent
+    try:
+        async with llm_slot():
+            completion = await openai_client().chat.completions.create(
+                model="gpt-4",
+                messages=turn["llm_messages"],
+                temperature=0.7
+            )
+        
+        ai_response = completion.choices[0].message.content
+        print(f"DEBUG OpenAI: {ai_response}")
+        payload = await complete_chat_turn(user_email, turn, json.loads(ai_response))
+        
+    except Exception as e:
+        payload = await chat_error_reply(user_email, user_message, e, body.since)
+    return ORJSONResponse(with_cursor(payload, body.since))
+
+
+@router.post("/chat/stream")
+async def conversational_appointment_stream(body: ChatMessage):
+    """
+    Same booking flow as /chat, streamed as server-sent events:
+    - `token` events carry the assistant's reply as the model writes it
+    - a closing `done` event carries the /chat payload (intent outcome,
+      booking state, conversation, and `history_delta`, the two messages
+      this turn stored, with their ids), its cursor moved past them
+    When the reply is decided server-side (confirmations, slot checks),
+    it arrives whole in the `done` event instead of as tokens. Once a
+    service is selected the model's answer may carry a date/time in any
+    field order, so its text is not streamed at all; if a streamed reply
+    is still replaced (e.g. the model's JSON fails to parse), a `reset`
+    event with the final text comes before `done`.
+    """
+    user_message = body.message.strip()
+    user_email = body.email
+
+    async def events():
+        reply, turn = await begin_chat_turn(user_email, user_message, body.since)
+        if reply:
+            yield sse_event("token", {"text": reply["response"]})
+            yield sse_event("done", with_history_delta(with_cursor(reply, body.since)))
+            return
+
+        streamed = []  # reply text already sent as tokens
+        try:
+            streamer = JsonFieldStreamer("response")
+            # With a service selected the reply may become a server-written
+            # confirmation, known only once the whole JSON is parsed
+            stream_reply = turn["selected_service"] is None
+            parts = []
+            async with llm_slot():
+                stream = await openai_client().chat.completions.create(
+                    model="gpt-4",
+                    messages=turn["llm_messages"],
+                    temperature=0.7,
+                    stream=True
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    text = streamer.feed(delta) if stream_reply else ""
+                    if text:
+                        streamed.append(text)
+                        yield sse_event("token", {"text": text})
+
+            payload = await complete_chat_turn(user_email, turn, json.loads("".join(parts)))
+        except Exception as e:
+            payload = await chat_error_reply(user_email, user_message, e, body.since)
+        if streamed and "".join(streamed) != payload["response"]:
+            yield sse_event("reset", {"text": payload["response"]})
+        yield sse_event("done", with_history_delta(with_cursor(payload, body.since)))
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def begin_chat_turn(user_email, user_message, since=None):
+    """
+    Save the message and load state. Turns that need no model call
+    (confirm/cancel, and whatever the intent router answers locally) come
+    back as (reply, None); otherwise (None, turn) with the prompt for the model.
+    `since` is the client's history cursor (see conversation_history).
+    """
+    # Save message, load context and booking state (one DB executor hop)
+    session, context = await run_db(start_turn, user_email, user_message)
+    refresh_summary_later(user_email, context)
+    selected_service = selected_service_from_session(session)
+    pending_appointment = pending_appointment_from_session(session)
     
     # STEP 4: Handle confirmation
+    confirmation = confirmation_intent(user_message) if pending_appointment else None
+    if confirmation:
+        intent_router.record_local(confirmation)
     if pending_appointment:
-        if re.search(r'\b(yes|yeah|sure|ok|confirm|yep|correct|right|হ্যাঁ|ঠিক|করুন)\b', user_message.lower()):
-            event_result = create_calendar_event(
-                title=f"Smart Cleaning - {pending_appointment['service_name']}",
-                start_time=pending_appointment["start_time"],
-                end_time=pending_appointment["end_time"],
-                description=f"{pending_appointment['service_description']}\nBooked via chat assistant",
-                email=user_email
+        if confirmation == "confirm":
+            response = f"✅ Perfect! Your {pending_appointment['service_name']} appointment is confirmed for {pending_appointment['start_time'].strftime('%B %d, %Y at %I:%M %p')}. I'm adding it to your Google Calendar now. You'll receive reminders before the appointment. Looking forward to serving you!"
+            booking, saved = await run_db(
+                confirm_turn, user_email, user_message, response, session, pending_appointment, since
             )
-            
-            if event_result.get("status") == "success":
-                response = f"✅ Perfect! Your {pending_appointment['service_name']} appointment is confirmed for {pending_appointment['start_time'].strftime('%B %d, %Y at %I:%M %p')}. I've added it to your Google Calendar. You'll receive reminders before the appointment. Looking forward to serving you!"
-                save_message(user_email, f"Bot: {response}")
-                save_message(user_email, "BOOKING_CONFIRMED")
-                
-                return {
-                    "response": response,
-                    "appointment_confirmed": True,
-                    "calendar_event": event_result,
-                    "conversation_history": get_current_conversation(user_email)
-                }
-            else:
-                response = f"❌ Error adding to calendar: {event_result.get('message')}. Please contact support."
-                save_message(user_email, f"Bot: {response}")
+            if booking is None:
+                response = "This booking was already updated from another message. Would you like to book another service?"
                 return {
                     "response": response,
                     "appointment_confirmed": False,
-                    "conversation_history": get_current_conversation(user_email)
-                }
+                    **await run_db(finish_turn, user_email, user_message, response, since=since)
+                }, None
+            if "error" in booking:
+                return await slot_taken_reply(user_email, user_message, session, pending_appointment, since), None
+            
+            return {
+                "response": response,
+                "appointment_confirmed": True,
+                "calendar_event": {"status": "queued", "outbox_id": booking["outbox_id"]},
+                **saved
+            }, None
         
-        elif re.search(r'\b(no|nope|cancel|না|বাতিল)\b', user_message.lower()):
+        elif confirmation == "reject":
             response = "No problem! The appointment wasn't booked. Would you like to schedule a different time or service?"
-            save_message(user_email, f"Bot: {response}")
-            save_message(user_email, "BOOKING_CANCELLED")
+            saved = await run_db(
+                finish_turn, user_email, user_message, response,
+                partial(close_booking_session, user_email, CANCELLED, session["version"]),
+                session["session_id"], since
+            )
             return {
                 "response": response,
                 "appointment_confirmed": False,
-                "conversation_history": get_current_conversation(user_email)
+                **saved
+            }, None
+    
+    from langchain_core.messages import convert_to_openai_messages
+
+    turn = {
+        "session": session,
+        "selected_service": selected_service,
+        "llm_messages": convert_to_openai_messages(context["messages"]),
+        "user_message": user_message,
+        "since": since
+    }
+
+    # Greetings, service picks and explicit date/times skip the model
+    local = intent_router.route(user_message, selected_service)
+    if local:
+        intent_router.record_local(local["intent"])
+        return await complete_chat_turn(user_email, turn, local), None
+    intent_router.record_model()
+    return None, turn
+
+
+async def complete_chat_turn(user_email, turn, result):
+    """
+    Act on the model's (or intent router's) answer, save the reply and
+    return the response payload
+    """
+    session = turn["session"]
+    selected_service = turn["selected_service"]
+    intent = result.get("intent")
+    response_text = result.get("response")
+    
+    # STEP 1: Greeting or Service Inquiry
+    if intent in ["greeting", "service_inquiry"]:
+        if not response_text:
+            response_text = "Hello! 👋 Welcome to Smart Cleaning Services. Here are the cleaning services we offer:\n\n"
+            for sid, service in SERVICES.items():
+                response_text += f"{sid}. **{service['name']}** ({service['duration']} hours)\n   - {service['description']}\n\n"
+            response_text += "Which service would you like to book today?"
+        
+        return {
+            "response": response_text,
+            "appointment_confirmed": False,
+            **await run_db(
+                finish_turn, user_email, turn["user_message"], response_text, since=turn["since"]
+            )
+        }
+    
+    # STEP 2: Service Selection
+    if intent == "service_selection" and result.get("selected_service_id"):
+        service_id = result["selected_service_id"]
+        if service_id in SERVICES:
+            service = SERVICES[service_id]
+            
+            if not response_text:
+                response_text = f"Great choice! **{service['name']}** includes:\n{service['description']}\n\nThis typically takes about {service['duration']} hours. When would you like to schedule this service? For example: 'tomorrow at 10 AM' or 'December 15 at 2 PM'"
+            
+            saved = await run_db(
+                finish_turn, user_email, turn["user_message"], response_text,
+                partial(select_service, user_email, service_id, session["version"]),
+                since=turn["since"]
+            )
+            return {
+                "response": response_text,
+                "appointment_confirmed": False,
+                "service_selected": service['name'],
+                **saved
             }
     
-    # Use OpenAI to understand user intent
-    try:
-        current_date = datetime.now().strftime("%Y-%m-%d %H:%M")
-        conversation_context = "\n".join([f"{m['message']}" for m in history[-10:]])
+    # STEP 3: DateTime Provided
+    if result.get("datetime") and selected_service:
+        start_time = datetime.strptime(result["datetime"], "%Y-%m-%d %H:%M")
+        end_time = start_time + timedelta(hours=selected_service['duration'])
+        duration_minutes = selected_service['duration'] * 60
+        
+        # Conflict check against confirmed bookings
+        cleaner_id = availability_index.find_free_cleaner(start_time, duration_minutes)
+        if cleaner_id is None:
+            alternatives = availability_index.next_free_slots_any(start_time, duration_minutes, k=3)
+            response_text = f"😕 Sorry, {start_time.strftime('%B %d at %I:%M %p')} isn't available for **{selected_service['name']}**."
+            if alternatives:
+                response_text += " The nearest free times are:\n\n"
+                for slot_start, _ in alternatives:
+                    response_text += f"🕐 {slot_start.strftime('%B %d, %Y at %I:%M %p')}\n"
+                response_text += "\nWhich one works for you?"
+            else:
+                response_text += " Could you suggest another day?"
+            return {
+                "response": response_text,
+                "appointment_confirmed": False,
+                "available_slots": [slot_start.strftime('%Y-%m-%d %H:%M') for slot_start, _ in alternatives],
+                **await run_db(
+                    finish_turn, user_email, turn["user_message"], response_text, since=turn["since"]
+                )
+            }
+        
+        response_text = f"📅 Perfect! Let me confirm your booking:\n\n🧹 Service: **{selected_service['name']}**\n🗓️ Date: {start_time.strftime('%B %d, %Y')}\n🕐 Time: {start_time.strftime('%I:%M %p')}\n⏱️ Duration: {selected_service['duration']} hours\n\n**Does this look good to you?** Reply 'Yes' to confirm or 'No' to reschedule."
+        
+        saved = await run_db(
+            finish_turn, user_email, turn["user_message"], response_text,
+            partial(set_pending_appointment, user_email, selected_service['id'],
+                    start_time, end_time, session["version"], cleaner_id),
+            since=turn["since"]
+        )
         
-        system_prompt = f"""You are a friendly cleaning service booking assistant. Current date/time: {current_date}.
+        return {
+            "response": response_text,
+            "appointment_confirmed": False,
+            "pending_confirmation": True,
+            "suggested_datetime": start_time.strftime('%Y-%m-%d %H:%M'),
+            **saved
+        }
+    
+    # Default response
+    if not response_text:
+        response_text = "I'm here to help you book a cleaning service! Could you tell me which service you're interested in, or when you'd like to schedule?"
+    
+    return {
+        "response": response_text,
+        "appointment_confirmed": False,
+        **await run_db(
+            finish_turn, user_email, turn["user_message"], response_text, since=turn["since"]
+        )
+    }
+
+
+async def slot_taken_reply(user_email, user_message, session, pending_appointment, since=None):
+    """
+    The proposed slot was booked by someone else before this user said yes:
+    keep the service, drop the pending time and offer the nearest free slots
+    """
+    start_time = pending_appointment["start_time"]
+    duration_minutes = int((pending_appointment["end_time"] - start_time).total_seconds() // 60)
+    alternatives = availability_index.next_free_slots_any(start_time, duration_minutes, k=3)
+    response_text = f"😕 Sorry, {start_time.strftime('%B %d at %I:%M %p')} was just booked by another customer."
+    if alternatives:
+        response_text += " The nearest free times are:\n\n"
+        for slot_start, _ in alternatives:
+            response_text += f"🕐 {slot_start.strftime('%B %d, %Y at %I:%M %p')}\n"
+        response_text += "\nWhich one works for you?"
+    else:
+        response_text += " Could you suggest another day?"
+    saved = await run_db(
+        finish_turn, user_email, user_message, response_text,
+        partial(select_service, user_email, pending_appointment["service_id"], session["version"]),
+        since=since
+    )
+    return {
+        "response": response_text,
+        "appointment_confirmed": False,
+        "available_slots": [slot_start.strftime('%Y-%m-%d %H:%M') for slot_start, _ in alternatives],
+        **saved
+    }
+
+
+async def chat_error_reply(user_email, user_message, e, since=None):
+    """Fallback reply when the model call or its JSON fails"""
+    print(f"Error: {e}")
+    response = f"I apologize for the error. Let me help you book a cleaning service. Which of our services interests you?\n\n1. Standard Cleaning (2h)\n2. Deep Cleaning (4h)\n3. Move-in/Move-out (6h)\n4. Post-Construction (8h)\n5. Office Cleaning (3h)"
+    return {
+        "response": response,
+        "appointment_confirmed": False,
+        **await run_db(finish_turn, user_email, user_message, response, since=since)
+    }
+
+
+def openai_client():
+    """The shared AsyncOpenAI client; the openai package is imported on first call"""
+    global client
+    if client is None:
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
+
+
+def start_turn(user_email, user_message):
+    """
+    Load booking state and the token-budgeted prompt context ending with
+    the user's message. The message itself is saved with the reply
+    (finish_turn / confirm_turn), one transaction per turn.
+    """
+    session = get_booking_session(user_email)
+    context = build_context(user_email, booking_system_prompt(session), current_session=True,
+                            new_message=f"User: {user_message}")
+    return session, context
+
+
+def booking_system_prompt(session):
+    """System prompt for the booking assistant in the given booking state"""
+    selected_service = selected_service_from_session(session)
+    pending_appointment = pending_appointment_from_session(session)
+    current_date = datetime.now().strftime("%Y-%m-%d %H:%M")
+    return f"""You are a friendly cleaning service booking assistant. Current date/time: {current_date}.
 
 Available Services:
-{json.dumps(SERVICES, indent=2)}
+{SERVICES_PROMPT}
 
 Conversation State:
 - Selected Service: {selected_service if selected_service else 'None'}
@@ -142,129 +548,95 @@ Conversation Flow:
 3. If date/time provided → Confirm details and ask for final confirmation
 4. Always be conversational and friendly"""
 
-        completion = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Previous context:\n{conversation_context}\n\nCurrent message: {user_message}"}
-            ],
-            temperature=0.7
-        )
-        
-        ai_response = completion.choices[0].message.content
-        print(f"DEBUG OpenAI: {ai_response}")
-        
-        result = json.loads(ai_response)
-        intent = result.get("intent")
-        response_text = result.get("response")
-        
-        # STEP 1: Greeting or Service Inquiry
-        if intent in ["greeting", "service_inquiry"]:
-            if not response_text:
-                response_text = "Hello! 👋 Welcome to Smart Cleaning Services. Here are the cleaning services we offer:\n\n"
-                for sid, service in SERVICES.items():
-                    response_text += f"{sid}. **{service['name']}** ({service['duration']} hours)\n   - {service['description']}\n\n"
-                response_text += "Which service would you like to book today?"
-            
-            save_message(user_email, f"Bot: {response_text}")
-            return {
-                "response": response_text,
-                "appointment_confirmed": False,
-                "conversation_history": get_current_conversation(user_email)
-            }
-        
-        # STEP 2: Service Selection
-        if intent == "service_selection" and result.get("selected_service_id"):
-            service_id = result["selected_service_id"]
-            if service_id in SERVICES:
-                service = SERVICES[service_id]
-                save_message(user_email, f"SELECTED_SERVICE: {service_id}|{service['name']}|{service['duration']}")
-                
-                if not response_text:
-                    response_text = f"Great choice! **{service['name']}** includes:\n{service['description']}\n\nThis typically takes about {service['duration']} hours. When would you like to schedule this service? For example: 'tomorrow at 10 AM' or 'December 15 at 2 PM'"
-                
-                save_message(user_email, f"Bot: {response_text}")
-                return {
-                    "response": response_text,
-                    "appointment_confirmed": False,
-                    "service_selected": service['name'],
-                    "conversation_history": get_current_conversation(user_email)
-                }
-        
-        # STEP 3: DateTime Provided
-        if result.get("datetime") and selected_service:
-            start_time = datetime.strptime(result["datetime"], "%Y-%m-%d %H:%M")
-            end_time = start_time + timedelta(hours=selected_service['duration'])
-            
-            response_text = f"📅 Perfect! Let me confirm your booking:\n\n🧹 Service: **{selected_service['name']}**\n🗓️ Date: {start_time.strftime('%B %d, %Y')}\n🕐 Time: {start_time.strftime('%I:%M %p')}\n⏱️ Duration: {selected_service['duration']} hours\n\n**Does this look good to you?** Reply 'Yes' to confirm or 'No' to reschedule."
-            
-            save_message(user_email, f"Bot: {response_text}")
-            save_message(user_email, f"PENDING_APPOINTMENT: {start_time.isoformat()}|{end_time.isoformat()}|{selected_service['id']}|{selected_service['name']}|{selected_service['description']}")
-            
-            return {
-                "response": response_text,
-                "appointment_confirmed": False,
-                "pending_confirmation": True,
-                "suggested_datetime": start_time.strftime('%Y-%m-%d %H:%M'),
-                "conversation_history": get_current_conversation(user_email)
-            }
-        
-        # Default response
-        if not response_text:
-            response_text = "I'm here to help you book a cleaning service! Could you tell me which service you're interested in, or when you'd like to schedule?"
-        
-        save_message(user_email, f"Bot: {response_text}")
-        return {
-            "response": response_text,
-            "appointment_confirmed": False,
-            "conversation_history": get_current_conversation(user_email)
-        }
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        response = f"I apologize for the error. Let me help you book a cleaning service. Which of our services interests you?\n\n1. Standard Cleaning (2h)\n2. Deep Cleaning (4h)\n3. Move-in/Move-out (6h)\n4. Post-Construction (8h)\n5. Office Cleaning (3h)"
-        save_message(user_email, f"Bot: {response}")
-        return {
-            "response": response,
-            "appointment_confirmed": False,
-            "conversation_history": get_current_conversation(user_email)
-        }
 
+def finish_turn(user_email, user_message, response_text, state_update=None, session_id=None, since=None):
+    """
+    Queue the turn's user message and bot reply (one group-commit write),
+    apply an optional booking state update, return the conversation
+    history and the two stored rows:
+    {"conversation_history": [...], "history_delta": [...]}.
+    Pass `session_id` when the update closes the session.
+    """
+    write = save_messages(user_email, [f"User: {user_message}", f"Bot: {response_text}"], session_id, wait=False)
+    if state_update:
+        state_update()
+    history = conversation_history(user_email, since)
+    return {"conversation_history": history, "history_delta": write.wait()}
 
-def extract_selected_service(history):
-    """Extract selected service from history"""
-    for msg in reversed(history):
-        if "BOOKING_CONFIRMED" in msg["message"] or "BOOKING_CANCELLED" in msg["message"]:
-            return None
-        if "SELECTED_SERVICE:" in msg["message"]:
-            try:
-                parts = msg["message"].split("SELECTED_SERVICE: ")[1].split("|")
-                return {
-                    "id": parts[0],
-                    "name": parts[1],
-                    "duration": int(parts[2]),
-                    "description": SERVICES[parts[0]]['description']
-                }
-            except:
-                pass
-    return None
-
-
-def extract_pending_appointment(history):
-    """Extract pending appointment from history"""
-    for msg in reversed(history):
-        if "BOOKING_CONFIRMED" in msg["message"] or "BOOKING_CANCELLED" in msg["message"]:
-            return None
-        if "PENDING_APPOINTMENT:" in msg["message"]:
-            try:
-                parts = msg["message"].split("PENDING_APPOINTMENT: ")[1].split("|")
-                return {
-                    "start_time": datetime.fromisoformat(parts[0]),
-                    "end_time": datetime.fromisoformat(parts[1]),
-                    "service_id": parts[2],
-                    "service_name": parts[3],
-                    "service_description": parts[4]
-                }
-            except:
-                pass
-    return None
\ No newline at end of file
+
+def conversation_history(user_email, since=None):
+    """
+    The current conversation, or with a `since` cursor only the messages
+    newer than it (what the client is missing)
+    """
+    if since is None:
+        return get_current_conversation(user_email)
+    return get_messages_since(user_email, since)
+
+
+def with_cursor(payload, since=None):
+    """Add `cursor`, the id to send as `since` next turn"""
+    history = payload.get("conversation_history")
+    return dict(payload, cursor=history[-1]["id"] if history else since)
+
+
+def confirm_turn(user_email, user_message, response_text, session, pending_appointment, since=None):
+    """
+    Confirm the booking and queue its calendar event atomically, then
+    queue the turn's messages. Returns (booking, saved) with `saved` as
+    from finish_turn; when the booking did not go through (see
+    confirm_booking) nothing is saved and `saved` is None.
+    """
+    booking = confirm_booking(
+        user_email, session["version"],
+        title=f"Smart Cleaning - {pending_appointment['service_name']}",
+        start_time=pending_appointment["start_time"],
+        end_time=pending_appointment["end_time"],
+        description=f"{pending_appointment['service_description']}\nBooked via chat assistant",
+        cleaner_id=pending_appointment["cleaner_id"]
+    )
+    if booking is None or "error" in booking:
+        return booking, None
+    return booking, finish_turn(user_email, user_message, response_text, session_id=session["session_id"],
+                                since=since)
+
+
+def with_history_delta(payload):
+    """
+    Move a response payload's cursor past the messages this turn stored
+    (`history_delta`; a turn that closed the booking session has an empty
+    conversation_history but still stored its two rows)
+    """
+    ids = [m["id"] for m in payload["history_delta"]]
+    if payload.get("cursor") is not None:
+        ids.append(payload["cursor"])
+    return dict(payload, cursor=max(ids) if ids else None)
+
+
+def selected_service_from_session(session):
+    """Build the selected service from the booking session"""
+    service_id = session["selected_service_id"]
+    if service_id not in SERVICES:
+        return None
+    service = SERVICES[service_id]
+    return {
+        "id": service_id,
+        "name": service["name"],
+        "duration": service["duration"],
+        "description": service["description"]
+    }
+
+
+def pending_appointment_from_session(session):
+    """Build the pending appointment from the booking session"""
+    if not session["pending_start"] or session["selected_service_id"] not in SERVICES:
+        return None
+    service = SERVICES[session["selected_service_id"]]
+    return {
+        "start_time": session["pending_start"],
+        "end_time": session["pending_end"],
+        "service_id": session["selected_service_id"],
+        "service_name": service["name"],
+        "service_description": service["description"],
+        "cleaner_id": session["pending_cleaner_id"]
+    }
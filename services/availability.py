@@ -0,0 +1,246 @@
+# services/availability.py
+import os
+import threading
+from datetime import datetime, timedelta, time as dtime
+
+MINUTES_PER_DAY = 24 * 60
+WORKDAY_START_HOUR = int(os.getenv("WORKDAY_START_HOUR", "8"))
+WORKDAY_END_HOUR = int(os.getenv("WORKDAY_END_HOUR", "20"))
+SLOT_STEP_MINUTES = int(os.getenv("SLOT_STEP_MINUTES", "30"))
+SEARCH_HORIZON_DAYS = int(os.getenv("SLOT_SEARCH_HORIZON_DAYS", "30"))
+# Cleaners assumed on shift until a cleaner registry provides real ones
+DEFAULT_CLEANERS = [c.strip() for c in os.getenv("SCHEDULE_CLEANERS", "1").split(",") if c.strip()]
+
+
+def _range_mask(start_minute: int, end_minute: int):
+    """Bitmask with bits [start_minute, end_minute) set."""
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+def _step_mask(step: int):
+    mask = 0
+    for minute in range(0, MINUTES_PER_DAY, step):
+        mask |= 1 << minute
+    return mask
+
+
+def _window_starts(free: int, length: int):
+    """
+    Bits s such that minutes s .. s+length-1 are all free
+    (window AND by doubling: O(log length) big-int operations).
+    """
+    ok, covered = free, 1
+    while covered < length:
+        shift = min(covered, length - covered)
+        ok &= ok >> shift
+        covered += shift
+    return ok
+
+
+def _iter_bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _split_by_day(start: datetime, end: datetime):
+    """Yield (date, start_minute, end_minute) pieces of [start, end)."""
+    current = start
+    while current < end:
+        day_end = datetime.combine(current.date() + timedelta(days=1), dtime.min)
+        piece_end = min(end, day_end)
+        start_minute = current.hour * 60 + current.minute
+        end_minute = MINUTES_PER_DAY if piece_end == day_end else piece_end.hour * 60 + piece_end.minute
+        yield current.date(), start_minute, end_minute
+        current = piece_end
+
+
+class AvailabilityIndex:
+    """
+    In-memory busy-minute index: one 1440-bit integer per cleaner per day
+    that has bookings. Days without an entry are completely free.
+
+    - book / release update the index incrementally; reserve is the
+      check-and-book used when a booking is confirmed
+    - is_free and next_free_slots are a handful of big-int operations
+
+    The index is per process; it is rebuilt from confirmed bookings on
+    startup and updated as bookings are confirmed.
+    """
+
+    def __init__(self, workday_start_hour: int = WORKDAY_START_HOUR,
+                 workday_end_hour: int = WORKDAY_END_HOUR, step_minutes: int = SLOT_STEP_MINUTES):
+        self._by_day = {}        # date -> {cleaner_id: busy bits}
+        self._cleaners = {}      # cleaner_id -> None (insertion-ordered set)
+        self._lock = threading.Lock()
+        self.work_mask = _range_mask(workday_start_hour * 60, workday_end_hour * 60)
+        self.step_mask = _step_mask(step_minutes)
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def add_cleaner(self, cleaner_id):
+        with self._lock:
+            self._cleaners[str(cleaner_id)] = None
+
+    def remove_cleaner(self, cleaner_id):
+        """
+        Stop offering the cleaner for new slots. Their busy minutes stay in
+        the index: those bookings still stand, and re-adding the cleaner
+        must not free them up.
+        """
+        with self._lock:
+            self._cleaners.pop(str(cleaner_id), None)
+
+    def cleaners(self):
+        return list(self._cleaners)
+
+    def _mark_busy(self, cleaner_id: str, start: datetime, end: datetime):
+        # Caller holds the lock
+        self._cleaners.setdefault(cleaner_id, None)
+        for date, start_minute, end_minute in _split_by_day(start, end):
+            day = self._by_day.setdefault(date, {})
+            day[cleaner_id] = day.get(cleaner_id, 0) | _range_mask(start_minute, end_minute)
+
+    def book(self, cleaner_id, start: datetime, end: datetime):
+        with self._lock:
+            self._mark_busy(str(cleaner_id), start, end)
+
+    def reserve(self, start: datetime, end: datetime, cleaners):
+        """
+        Book the first of `cleaners` that is free for [start, end), checking
+        and booking under one lock so two confirmations cannot both take
+        the same slot.
+        :return: the booked cleaner_id, or None if all of them are busy
+        """
+        duration_minutes = int((end - start).total_seconds() // 60)
+        with self._lock:
+            for cleaner_id in cleaners:
+                cleaner_id = str(cleaner_id)
+                if self.is_free(cleaner_id, start, duration_minutes):
+                    self._mark_busy(cleaner_id, start, end)
+                    return cleaner_id
+        return None
+
+    def release(self, cleaner_id, start: datetime, end: datetime):
+        cleaner_id = str(cleaner_id)
+        with self._lock:
+            for date, start_minute, end_minute in _split_by_day(start, end):
+                day = self._by_day.get(date)
+                if not day or cleaner_id not in day:
+                    continue
+                bits = day[cleaner_id] & ~_range_mask(start_minute, end_minute)
+                if bits:
+                    day[cleaner_id] = bits
+                else:
+                    del day[cleaner_id]
+                    if not day:
+                        del self._by_day[date]
+
+    def clear(self):
+        with self._lock:
+            self._by_day.clear()
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _busy(self, cleaner_id: str, date):
+        day = self._by_day.get(date)
+        return day.get(cleaner_id, 0) if day else 0
+
+    def is_free(self, cleaner_id, start: datetime, duration_minutes: int):
+        """
+        True if the cleaner has no booking in [start, start + duration)
+        and the whole slot lies inside working hours.
+        """
+        cleaner_id = str(cleaner_id)
+        start_minute = start.hour * 60 + start.minute
+        if start_minute + duration_minutes > MINUTES_PER_DAY:
+            return False
+        slot = _range_mask(start_minute, start_minute + duration_minutes)
+        return (slot & ~self.work_mask) == 0 and (slot & self._busy(cleaner_id, start.date())) == 0
+
+    def find_free_cleaner(self, start: datetime, duration_minutes: int, cleaners=None):
+        """
+        First cleaner (in registration order) free for the whole slot, or None.
+        """
+        for cleaner_id in (cleaners if cleaners is not None else self._cleaners):
+            if self.is_free(cleaner_id, start, duration_minutes):
+                return str(cleaner_id)
+        return None
+
+    def _day_starts(self, busy: int, duration_minutes: int, from_minute: int):
+        free = self.work_mask & ~busy
+        starts = _window_starts(free, duration_minutes) & self.step_mask
+        return starts & ~((1 << from_minute) - 1)
+
+    def next_free_slots(self, cleaner_id, after: datetime, duration_minutes: int, k: int = 5,
+                        horizon_days: int = SEARCH_HORIZON_DAYS):
+        """
+        The next `k` step-aligned start times at or after `after` when the
+        cleaner is free for `duration_minutes`.
+        """
+        cleaner_id = str(cleaner_id)
+        slots = []
+        for offset in range(horizon_days):
+            date = after.date() + timedelta(days=offset)
+            from_minute = after.hour * 60 + after.minute if offset == 0 else 0
+            starts = self._day_starts(self._busy(cleaner_id, date), duration_minutes, from_minute)
+            midnight = datetime.combine(date, dtime.min)
+            for minute in _iter_bits(starts):
+                slots.append(midnight + timedelta(minutes=minute))
+                if len(slots) == k:
+                    return slots
+        return slots
+
+    def next_free_slots_any(self, after: datetime, duration_minutes: int, k: int = 5,
+                            horizon_days: int = SEARCH_HORIZON_DAYS):
+        """
+        The next `k` start times at which at least one cleaner is free,
+        as (start_time, cleaner_id) pairs.
+        """
+        slots = []
+        cleaners = list(self._cleaners)
+        if not cleaners:
+            return slots
+        for offset in range(horizon_days):
+            date = after.date() + timedelta(days=offset)
+            from_minute = after.hour * 60 + after.minute if offset == 0 else 0
+            day = self._by_day.get(date, {})
+
+            idle = next((c for c in cleaners if c not in day), None)
+            if idle is not None:
+                # Someone has no bookings at all that day
+                masks = [(idle, self._day_starts(0, duration_minutes, from_minute))]
+            else:
+                masks = [(c, self._day_starts(day[c], duration_minutes, from_minute)) for c in cleaners]
+
+            union = 0
+            for _, starts in masks:
+                union |= starts
+
+            midnight = datetime.combine(date, dtime.min)
+            for minute in _iter_bits(union):
+                bit = 1 << minute
+                owner = next(c for c, starts in masks if starts & bit)
+                slots.append((midnight + timedelta(minutes=minute), owner))
+                if len(slots) == k:
+                    return slots
+        return slots
+
+
+availability_index = AvailabilityIndex()
+for _cleaner_id in DEFAULT_CLEANERS:
+    availability_index.add_cleaner(_cleaner_id)
+
+
+def rebuild_availability(bookings):
+    """
+    Reload the index from (cleaner_id, start_time, end_time) tuples.
+    """
+    availability_index.clear()
+    for cleaner_id, start_time, end_time in bookings:
+        availability_index.book(cleaner_id, start_time, end_time)
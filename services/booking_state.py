@@ -0,0 +1,174 @@
+# services/booking_state.py
+from datetime import datetime
+from services.conversation_store import connection
+from services.calendar_outbox import enqueue_calendar_event, find_cleaner_conflict, outbox_worker
+from services.availability import availability_index
+
+# Booking session statuses
+IDLE = "idle"
+SERVICE_SELECTED = "service_selected"
+PENDING_CONFIRMATION = "pending_confirmation"
+CONFIRMED = "confirmed"
+CANCELLED = "cancelled"
+
+_COLUMNS = ("user_email, selected_service_id, pending_start, pending_end, status, version, "
+            "session_id, pending_cleaner_id")
+
+
+def _row_to_session(row, user_email: str):
+    if not row:
+        return {
+            "user_email": user_email,
+            "selected_service_id": None,
+            "pending_start": None,
+            "pending_end": None,
+            "status": IDLE,
+            "version": 0,
+            "session_id": 0,
+            "pending_cleaner_id": None,
+        }
+    return {
+        "user_email": row[0],
+        "selected_service_id": row[1],
+        "pending_start": datetime.fromisoformat(row[2]) if row[2] else None,
+        "pending_end": datetime.fromisoformat(row[3]) if row[3] else None,
+        "status": row[4],
+        "version": row[5],
+        "session_id": row[6],
+        "pending_cleaner_id": row[7],
+    }
+
+
+# -----------------------------
+# Read the current booking session
+# -----------------------------
+def get_booking_session(user_email: str):
+    """
+    Return the user's booking session (a primary-key lookup).
+    Users without a record get an idle session at version 0.
+    """
+    with connection(user_email) as conn:
+        row = conn.execute(
+            f"SELECT {_COLUMNS} FROM booking_sessions WHERE user_email=?",
+            (user_email,)
+        ).fetchone()
+    return _row_to_session(row, user_email)
+
+
+# -----------------------------
+# Write helpers (optimistic versioning)
+# -----------------------------
+def _write_session(conn, user_email: str, expected_version: int, selected_service_id,
+                   pending_start, pending_end, status: str, next_session: bool = False,
+                   pending_cleaner_id: str = None):
+    """
+    Upsert the session only if it is still at `expected_version`.
+    With `next_session`, messages saved afterwards start a new conversation.
+    Returns True when the write won, False on a concurrent update.
+    """
+    cur = conn.execute(
+        """
+        INSERT INTO booking_sessions
+            (user_email, selected_service_id, pending_start, pending_end, status,
+             version, session_id, pending_cleaner_id, updated_at)
+        SELECT ?, ?, ?, ?, ?, 1, ?, ?, CURRENT_TIMESTAMP WHERE true
+        ON CONFLICT(user_email) DO UPDATE SET
+            selected_service_id = excluded.selected_service_id,
+            pending_start = excluded.pending_start,
+            pending_end = excluded.pending_end,
+            status = excluded.status,
+            version = booking_sessions.version + 1,
+            session_id = booking_sessions.session_id + excluded.session_id,
+            pending_cleaner_id = excluded.pending_cleaner_id,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE booking_sessions.version = ?
+        """,
+        (
+            user_email,
+            selected_service_id,
+            pending_start.isoformat() if pending_start else None,
+            pending_end.isoformat() if pending_end else None,
+            status,
+            int(next_session),
+            pending_cleaner_id,
+            expected_version,
+        )
+    )
+    return cur.rowcount == 1
+
+
+def select_service(user_email: str, service_id: str, expected_version: int):
+    """
+    Record the chosen service and clear any pending appointment.
+    """
+    with connection(user_email) as conn:
+        return _write_session(conn, user_email, expected_version,
+                              service_id, None, None, SERVICE_SELECTED)
+
+
+def set_pending_appointment(user_email: str, service_id: str, start_time: datetime,
+                            end_time: datetime, expected_version: int, cleaner_id: str = None):
+    """
+    Record a proposed appointment that is waiting for the user's yes/no.
+    """
+    with connection(user_email) as conn:
+        return _write_session(conn, user_email, expected_version,
+                              service_id, start_time, end_time, PENDING_CONFIRMATION,
+                              pending_cleaner_id=cleaner_id)
+
+
+def close_booking_session(user_email: str, status: str, expected_version: int):
+    """
+    Finish the current booking as CONFIRMED or CANCELLED, reset its state
+    and start a new conversation session.
+    """
+    with connection(user_email) as conn:
+        return _write_session(conn, user_email, expected_version,
+                              None, None, None, status, next_session=True)
+
+
+def confirm_booking(user_email: str, expected_version: int, title: str, start_time: datetime,
+                    end_time: datetime, description: str, cleaner_id: str = None):
+    """
+    Close the session as CONFIRMED and queue the calendar write in the
+    same transaction; the outbox worker delivers it to Google Calendar.
+    The slot is reserved in the availability index first (checked and
+    marked busy in one step): the proposed cleaner if still free, else
+    any other cleaner free for the same slot.
+    The index is per process, so the transaction re-checks the outbox for
+    an overlapping booking of that cleaner before queueing this one; that
+    covers other workers as long as their bookings share a shard
+    (CONVERSATION_SHARDS=1 when running more than one worker).
+    :return: {"outbox_id", "cleaner_id"}, {"error": "slot_taken"} if no
+             cleaner is free any more, or None if the session changed
+             concurrently
+    """
+    if cleaner_id:
+        others = [c for c in availability_index.cleaners() if c != str(cleaner_id)]
+        cleaner_id = availability_index.reserve(start_time, end_time, [cleaner_id] + others)
+        if cleaner_id is None:
+            return {"error": "slot_taken"}
+    outbox_id = queued = conflict = None
+    try:
+        with connection(user_email) as conn:
+            if _write_session(conn, user_email, expected_version,
+                              None, None, None, CONFIRMED, next_session=True):
+                conflict = cleaner_id and find_cleaner_conflict(conn, cleaner_id, start_time, end_time)
+                if conflict:
+                    conn.rollback()
+                else:
+                    queued = enqueue_calendar_event(conn, user_email, title, start_time, end_time,
+                                                    description, cleaner_id)
+        outbox_id = queued  # committed
+    finally:
+        # Lost the session race (or the write failed): give the slot back
+        if outbox_id is None and cleaner_id:
+            availability_index.release(cleaner_id, start_time, end_time)
+    if conflict:
+        # Booked by another worker: record it here too
+        availability_index.book(cleaner_id, *conflict)
+        return {"error": "slot_taken"}
+    if outbox_id is None:
+        return None
+    outbox_worker.notify()
+    return {"outbox_id": outbox_id, "cleaner_id": cleaner_id}
@@ -0,0 +1,196 @@
+# services/calendar_client.py
+import datetime
+import json
+import os
+import threading
+import time
+
+# -----------------------------
+# Google Calendar API scope
+# -----------------------------
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "token.json")
+CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials.json")
+
+# Refresh the access token this many seconds before it expires
+REFRESH_MARGIN_SECONDS = int(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN", "300"))
+
+# Point the client at another server (e.g. tools/fake_calendar_server.py);
+# requests are then sent unauthenticated
+CALENDAR_ENDPOINT = os.getenv("GOOGLE_CALENDAR_ENDPOINT")
+
+
+class CalendarClientManager:
+    """
+    Process-wide Google Calendar client.
+
+    - Credentials are loaded once and refreshed in the background ahead of
+      expiry, so no request ever waits on a token refresh.
+    - The discovery document comes from the copy bundled with
+      google-api-python-client (no network fetch, read once).
+    - Each thread gets its own service object, because the underlying
+      httplib2 connection is not thread-safe.
+    The Google client libraries are imported on first use.
+    """
+
+    def __init__(self, token_path: str = TOKEN_PATH, credentials_path: str = CREDENTIALS_PATH,
+                 refresh_margin: int = REFRESH_MARGIN_SECONDS, endpoint: str = CALENDAR_ENDPOINT):
+        self.endpoint = endpoint
+        self.token_path = token_path
+        self.credentials_path = credentials_path
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._creds = None
+        self._document = None
+        self._refresh_timer = None
+        self.stats = {
+            "builds": 0,
+            "build_ms_total": 0.0,
+            "last_build_ms": None,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "last_refresh_ms": None,
+            "token_expiry": None,
+        }
+
+    # -----------------------------
+    # Credentials
+    # -----------------------------
+    def _save_token(self):
+        with open(self.token_path, 'w') as token_file:
+            token_file.write(self._creds.to_json())
+
+    def _refresh(self):
+        """
+        Refresh the access token and persist it. Caller holds the lock.
+        """
+        from google.auth.transport.requests import Request
+
+        start = time.perf_counter()
+        try:
+            self._creds.refresh(Request())
+        except Exception as e:
+            self.stats["refresh_failures"] += 1
+            print(f"❌ Failed to refresh Google credentials: {e}")
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_ms"] = round(elapsed_ms, 2)
+        self.stats["token_expiry"] = self._creds.expiry.isoformat() if self._creds.expiry else None
+        self._save_token()
+
+    def _load_credentials(self):
+        """
+        Load token.json, refreshing or running the OAuth flow when needed.
+        Caller holds the lock.
+        """
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        creds = None
+        if os.path.exists(self.token_path):
+            creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
+        self._creds = creds
+
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                self._refresh()
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(self.credentials_path, SCOPES)
+                self._creds = flow.run_local_server(port=0)
+                self._save_token()
+
+        self.stats["token_expiry"] = self._creds.expiry.isoformat() if self._creds.expiry else None
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        """
+        Arm a daemon timer that refreshes the token `refresh_margin`
+        seconds before it expires.
+        """
+        if self._refresh_timer:
+            self._refresh_timer.cancel()
+        if not self._creds.expiry or not self._creds.refresh_token:
+            return
+
+        # google-auth stores expiry as naive UTC
+        remaining = (self._creds.expiry - datetime.datetime.utcnow()).total_seconds()
+        delay = max(remaining - self.refresh_margin, 1)
+        self._refresh_timer = threading.Timer(delay, self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        with self._lock:
+            try:
+                self._refresh()
+            except Exception:
+                # Retry shortly; requests still refresh on demand if needed
+                self._refresh_timer = threading.Timer(30, self._background_refresh)
+                self._refresh_timer.daemon = True
+                self._refresh_timer.start()
+                return
+            self._schedule_refresh()
+
+    def credentials(self):
+        with self._lock:
+            if self._creds is None:
+                self._load_credentials()
+            return self._creds
+
+    # -----------------------------
+    # Service objects
+    # -----------------------------
+    def _discovery_document(self):
+        if self._document is None:
+            from googleapiclient.discovery_cache import get_static_doc
+
+            document = get_static_doc("calendar", "v3")
+            if self.endpoint:
+                parsed = json.loads(document)
+                parsed["rootUrl"] = self.endpoint.rstrip("/") + "/"
+                document = json.dumps(parsed)
+            self._document = document
+        return self._document
+
+    def preload(self):
+        """
+        Import the client libraries and read the discovery document now
+        (start-up warm-up); credentials still load on the first request.
+        """
+        import googleapiclient.discovery
+
+        self._discovery_document()
+
+    def get_service(self):
+        """
+        Return this thread's Calendar service, building it on first use.
+        """
+        service = getattr(self._local, "service", None)
+        if service is not None:
+            return service
+
+        import httplib2
+        from googleapiclient.discovery import build_from_document
+
+        start = time.perf_counter()
+        if self.endpoint:
+            service = build_from_document(self._discovery_document(), http=httplib2.Http())
+        else:
+            service = build_from_document(self._discovery_document(), credentials=self.credentials())
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.stats["builds"] += 1
+            self.stats["build_ms_total"] += elapsed_ms
+            self.stats["last_build_ms"] = round(elapsed_ms, 2)
+        self._local.service = service
+        return service
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+calendar_clients = CalendarClientManager()
@@ -0,0 +1,273 @@
+# services/calendar_outbox.py
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from services.conversation_store import shard_connection, shard_for, shard_count
+
+# Outbox row statuses
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))
+BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX", "600"))
+POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+CLAIM_BATCH_SIZE = 50
+# A claimed row is hidden from other workers for this long
+CLAIM_LEASE_SECONDS = 120
+
+_COLUMNS = "id, user_email, status, attempts, event_id, event_link, last_error, created_at, updated_at"
+
+
+# -----------------------------
+# Outbox ids
+# -----------------------------
+# Rows are numbered per shard; the id handed out also names the shard
+# (identical to the row id with a single shard)
+def _global_id(shard: int, row_id: int):
+    return row_id * shard_count() + shard
+
+
+def _split_id(outbox_id: int):
+    """-> (shard, row id)"""
+    return outbox_id % shard_count(), outbox_id // shard_count()
+
+
+# -----------------------------
+# Enqueue (inside the caller's transaction)
+# -----------------------------
+def dedupe_key_for(user_email: str, title: str, start_time: datetime, end_time: datetime):
+    """
+    Stable key for one booking. It doubles as the Google event id
+    (hex digits are valid base32hex), so a retried insert can never
+    create a second event.
+    """
+    raw = f"{user_email}|{title}|{start_time.isoformat()}|{end_time.isoformat()}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def enqueue_calendar_event(conn, user_email: str, title: str, start_time: datetime,
+                           end_time: datetime, description: str, cleaner_id: str = None):
+    """
+    Add a calendar write to the outbox using the caller's connection,
+    so it commits atomically with the booking state. Call
+    `outbox_worker.notify()` after the commit to deliver it right away.
+    Re-enqueueing the same booking is a no-op.
+    :return: outbox row id
+    """
+    dedupe_key = dedupe_key_for(user_email, title, start_time, end_time)
+    payload = {
+        "title": title,
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "description": description,
+        "email": user_email,
+    }
+    conn.execute(
+        "INSERT OR IGNORE INTO calendar_outbox (user_email, dedupe_key, payload, cleaner_id) "
+        "VALUES (?, ?, ?, ?)",
+        (user_email, dedupe_key, json.dumps(payload), cleaner_id)
+    )
+    row = conn.execute("SELECT id FROM calendar_outbox WHERE dedupe_key=?", (dedupe_key,)).fetchone()
+    return _global_id(shard_for(user_email), row[0])
+
+
+def find_cleaner_conflict(conn, cleaner_id: str, start_time: datetime, end_time: datetime):
+    """
+    A booking already queued for `cleaner_id` that overlaps [start, end),
+    read on the caller's connection. Run it after the transaction's first
+    write: SQLite then holds the shard's write lock, so no other process
+    can queue an overlapping booking before this transaction commits.
+    :return: (start_time, end_time) of the conflicting booking, or None
+    """
+    row = conn.execute(
+        """
+        SELECT json_extract(payload, '$.start_time'), json_extract(payload, '$.end_time')
+        FROM calendar_outbox
+        WHERE cleaner_id = ?
+          AND json_extract(payload, '$.start_time') < ?
+          AND json_extract(payload, '$.end_time') > ?
+        LIMIT 1
+        """,
+        (str(cleaner_id), end_time.isoformat(), start_time.isoformat())
+    ).fetchone()
+    if not row:
+        return None
+    return datetime.fromisoformat(row[0]), datetime.fromisoformat(row[1])
+
+
+def get_outbox_entry(outbox_id: int):
+    """
+    Delivery status of one outbox entry (None if unknown).
+    """
+    shard, row_id = _split_id(outbox_id)
+    with shard_connection(shard) as conn:
+        row = conn.execute(f"SELECT {_COLUMNS} FROM calendar_outbox WHERE id=?", (row_id,)).fetchone()
+    if not row:
+        return None
+    return dict(zip([c.strip() for c in _COLUMNS.split(",")], row), id=outbox_id)
+
+
+def list_assigned_bookings():
+    """
+    (cleaner_id, start_time, end_time) of every confirmed booking with an
+    assigned cleaner, for rebuilding the availability index (all shards).
+    """
+    rows = []
+    for shard in range(shard_count()):
+        with shard_connection(shard) as conn:
+            rows += conn.execute(
+                "SELECT cleaner_id, payload FROM calendar_outbox WHERE cleaner_id IS NOT NULL"
+            ).fetchall()
+    bookings = []
+    for cleaner_id, payload in rows:
+        event = json.loads(payload)
+        bookings.append((
+            cleaner_id,
+            datetime.fromisoformat(event["start_time"]),
+            datetime.fromisoformat(event["end_time"])
+        ))
+    return bookings
+
+
+# -----------------------------
+# Draining
+# -----------------------------
+def _backoff_seconds(attempts: int):
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _claim_due(conn, now: float, limit: int):
+    return conn.execute(
+        """
+        UPDATE calendar_outbox SET next_attempt_at = ?
+        WHERE id IN (
+            SELECT id FROM calendar_outbox
+            WHERE status = ? AND next_attempt_at <= ?
+            ORDER BY id LIMIT ?
+        )
+        RETURNING id, dedupe_key, payload, attempts
+        """,
+        (now + CLAIM_LEASE_SECONDS, PENDING, now, limit)
+    ).fetchall()
+
+
+def drain_outbox(limit: int = CLAIM_BATCH_SIZE):
+    """
+    Drain every shard's outbox once (see _drain_shard). A failing shard
+    does not hold up the others.
+    :return: the largest number of rows processed on one shard
+    """
+    processed = 0
+    for shard in range(shard_count()):
+        try:
+            processed = max(processed, _drain_shard(shard, limit))
+        except Exception as e:
+            print(f"❌ Calendar outbox drain failed on shard {shard}: {e}")
+    return processed
+
+
+def _drain_shard(shard: int, limit: int):
+    """
+    Claim due outbox rows of one shard, write them to Google Calendar in
+    one batch, and record the outcome of each row.
+    :return: number of rows processed
+    """
+    # Imported here: the calendar client is only needed by the worker
+    from services.calendar_service import create_calendar_events_bulk
+
+    now = time.time()
+    with shard_connection(shard) as conn:
+        claimed = _claim_due(conn, now, limit)
+    if not claimed:
+        return 0
+
+    events = []
+    for _, dedupe_key, payload, _ in claimed:
+        event = json.loads(payload)
+        event["start_time"] = datetime.fromisoformat(event["start_time"])
+        event["end_time"] = datetime.fromisoformat(event["end_time"])
+        event["event_id"] = dedupe_key
+        events.append(event)
+
+    results = create_calendar_events_bulk(events)
+
+    with shard_connection(shard) as conn:
+        for (row_id, dedupe_key, _, attempts), result in zip(claimed, results):
+            if result["status"] == "success" or result.get("code") == 409:
+                # 409: an earlier attempt already created this event
+                conn.execute(
+                    """
+                    UPDATE calendar_outbox
+                    SET status=?, event_id=?, event_link=COALESCE(?, event_link),
+                        attempts=?, last_error=NULL, updated_at=CURRENT_TIMESTAMP
+                    WHERE id=?
+                    """,
+                    (SENT, result.get("event_id") or dedupe_key, result.get("event_link"),
+                     attempts + 1, row_id)
+                )
+            else:
+                attempts += 1
+                status = FAILED if attempts >= MAX_ATTEMPTS else PENDING
+                conn.execute(
+                    """
+                    UPDATE calendar_outbox
+                    SET status=?, attempts=?, next_attempt_at=?, last_error=?, updated_at=CURRENT_TIMESTAMP
+                    WHERE id=?
+                    """,
+                    (status, attempts, time.time() + _backoff_seconds(attempts),
+                     result.get("message"), row_id)
+                )
+                if status == FAILED:
+                    print(f"❌ Calendar outbox entry {_global_id(shard, row_id)} failed after {attempts} attempts: {result.get('message')}")
+    return len(claimed)
+
+
+class OutboxWorker:
+    """
+    Background thread that drains the calendar outbox.
+    It wakes up on every enqueue and otherwise polls for retries that
+    have become due.
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def notify(self):
+        self._wakeup.set()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="calendar-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                # Keep draining while full batches come back
+                while drain_outbox() == CLAIM_BATCH_SIZE and not self._stopping.is_set():
+                    pass
+            except Exception as e:
+                print(f"❌ Calendar outbox worker error: {e}")
+            self._wakeup.wait(self.poll_interval)
+
+
+outbox_worker = OutboxWorker()
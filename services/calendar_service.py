@@ -1,16 +1,6 @@
 # services/calendar_service.py
-import os
 import datetime
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-
-# -----------------------------
-# Google Calendar API scope
-# -----------------------------
-SCOPES = ['https://www.googleapis.com/auth/calendar']
+from services.calendar_client import calendar_clients, SCOPES
 
 
 # -----------------------------
@@ -18,37 +8,26 @@ SCOPES = ['https://www.googleapis.com/auth/calendar']
 # -----------------------------
 def get_calendar_service():
     """
-    Authenticate and return a Google Calendar service instance.
-    Uses OAuth 2.0 token for persistent login.
+    Return a Google Calendar service instance.
+    Credentials and the discovery document are cached process-wide by
+    the calendar client manager; each thread reuses its own service.
     """
-    creds = None
-    token_path = 'token.json'
-    creds_path = 'credentials.json'
-
-    # Load existing credentials if available
-    if os.path.exists(token_path):
-        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-
-    # Refresh or create new credentials
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(creds_path, SCOPES)
-            creds = flow.run_local_server(port=0)
-        # Save credentials
-        with open(token_path, 'w') as token_file:
-            token_file.write(creds.to_json())
+    from googleapiclient.errors import HttpError
 
     try:
-        service = build('calendar', 'v3', credentials=creds)
-        print("✅ Google Calendar service created successfully.")
-        return service
+        return calendar_clients.get_service()
     except HttpError as e:
         print(f"❌ Failed to create Google Calendar service: {e}")
         return None
 
 
+def calendar_client_stats():
+    """
+    Build and token-refresh timings of the shared calendar client.
+    """
+    return calendar_clients.get_stats()
+
+
 # -----------------------------
 # Standard Cleaning Event
 # -----------------------------
@@ -134,6 +113,35 @@ def create_cleaning_task(date_str: str, task_title: str = "Cleaning Task"):
 # -----------------------------
 # AI / Chat-based Appointment
 # -----------------------------
+def appointment_event_body(title: str, start_time: datetime.datetime,
+                           end_time: datetime.datetime, description: str, email: str = None,
+                           event_id: str = None):
+    """
+    Build the Calendar API body for a timed appointment.
+    A client-chosen `event_id` (base32hex, 5-1024 chars) makes retries
+    idempotent: Google answers 409 if the event already exists.
+    """
+    event = {
+        "summary": title,
+        "description": description,
+        "start": {"dateTime": start_time.isoformat(), "timeZone": "Asia/Dhaka"},
+        "end": {"dateTime": end_time.isoformat(), "timeZone": "Asia/Dhaka"},
+        "reminders": {
+            "useDefault": False,
+            "overrides": [
+                {"method": "email", "minutes": 30},
+                {"method": "popup", "minutes": 10}
+            ]
+        },
+        "colorId": "2"  # Green
+    }
+    if email:
+        event["attendees"] = [{"email": email}]
+    if event_id:
+        event["id"] = event_id
+    return event
+
+
 def create_calendar_event(title: str, start_time: datetime.datetime,
                           end_time: datetime.datetime, description: str, email: str):
     """
@@ -144,21 +152,7 @@ def create_calendar_event(title: str, start_time: datetime.datetime,
         if not service:
             return {"status": "error", "message": "Failed to connect to Google Calendar."}
 
-        event = {
-            "summary": title,
-            "description": description,
-            "start": {"dateTime": start_time.isoformat(), "timeZone": "Asia/Dhaka"},
-            "end": {"dateTime": end_time.isoformat(), "timeZone": "Asia/Dhaka"},
-            "attendees": [{"email": email}],
-            "reminders": {
-                "useDefault": False,
-                "overrides": [
-                    {"method": "email", "minutes": 30},
-                    {"method": "popup", "minutes": 10}
-                ]
-            },
-            "colorId": "2"  # Green
-        }
+        event = appointment_event_body(title, start_time, end_time, description, email)
 
         created_event = service.events().insert(calendarId="primary", body=event).execute()
 
@@ -173,3 +167,69 @@ def create_calendar_event(title: str, start_time: datetime.datetime,
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
+
+
+# -----------------------------
+# Bulk Appointments (batch HTTP)
+# -----------------------------
+# Google Calendar accepts at most 50 calls per batch request
+CALENDAR_BATCH_LIMIT = 50
+
+
+def create_calendar_events_bulk(events: list, batch_size: int = CALENDAR_BATCH_LIMIT):
+    """
+    Create many appointments with Google batch HTTP requests.
+    :param events: list of dicts with title, start_time, end_time, description
+                   and optional email / event_id
+    :param batch_size: calls per batch request (capped at the API limit)
+    :return: one result dict per input event, in input order
+    """
+    try:
+        service = get_calendar_service()
+        if not service:
+            return [{"index": i, "status": "error", "message": "Failed to connect to Google Calendar."}
+                    for i in range(len(events))]
+    except Exception as e:
+        return [{"index": i, "status": "error", "message": str(e)} for i in range(len(events))]
+
+    batch_size = max(1, min(batch_size, CALENDAR_BATCH_LIMIT))
+    results = [None] * len(events)
+
+    def on_response(request_id, response, exception):
+        index = int(request_id)
+        if exception is not None:
+            results[index] = {
+                "index": index,
+                "status": "error",
+                "code": getattr(getattr(exception, "resp", None), "status", None),
+                "message": str(exception)
+            }
+        else:
+            results[index] = {
+                "index": index,
+                "status": "success",
+                "event_id": response.get("id"),
+                "event_link": response.get("htmlLink"),
+                "summary": response.get("summary"),
+                "start_time": response.get("start", {}).get("dateTime"),
+            }
+
+    for chunk_start in range(0, len(events), batch_size):
+        chunk = range(chunk_start, min(chunk_start + batch_size, len(events)))
+        batch = service.new_batch_http_request(callback=on_response)
+        for index in chunk:
+            event = events[index]
+            body = appointment_event_body(
+                event["title"], event["start_time"], event["end_time"],
+                event.get("description", ""), event.get("email"), event.get("event_id")
+            )
+            batch.add(service.events().insert(calendarId="primary", body=body), request_id=str(index))
+        try:
+            batch.execute()
+        except Exception as e:
+            # The whole chunk failed (transport error); keep per-item mapping
+            for index in chunk:
+                if results[index] is None:
+                    results[index] = {"index": index, "status": "error", "message": str(e)}
+
+    return results
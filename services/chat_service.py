@@ -1,49 +1,129 @@
 # services/chat_service.py
-import os
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
-from services.conversation_service import get_user_messages, save_message
-from config import OPENAI_API_KEY
+import time
+from dotenv import load_dotenv
+from services.conversation_service import save_messages
+from services.context_builder import build_context, refresh_summary_later
+from services.executors import run_db, llm_slot
+from services.llm_cache import llm_cache
 
-# Set the OpenAI API key
-os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
+# Load API keys from .env (ChatOpenAI reads OPENAI_API_KEY)
+load_dotenv()
 
-# Initialize the chat model
-chat_model = ChatOpenAI(model_name="gpt-4", temperature=0.7)
+# Chat model, created on first use (see get_chat_model)
+CHAT_MODEL_NAME = "gpt-4"
+CHAT_TEMPERATURE = 0.7
+chat_model = None
+CHAT_SYSTEM_PROMPT = "You are a helpful AI assistant for Smart Cleaning services."
 
-def ai_chat(user_email: str, user_message: str) -> str:
+
+def get_chat_model():
+    """The shared ChatOpenAI client; langchain_openai is imported on first call."""
+    global chat_model
+    if chat_model is None:
+        from langchain_openai import ChatOpenAI
+
+        chat_model = ChatOpenAI(model_name=CHAT_MODEL_NAME, temperature=CHAT_TEMPERATURE)
+    return chat_model
+
+
+def _cache_messages(messages):
+    """(role, content) pairs identifying a prompt for the response cache."""
+    return [(m.type, m.content) for m in messages]
+
+
+async def _start_chat(user_email: str, user_message: str):
     """
-    Chat with AI assistant using conversation history.
+    Build the model prompt: summary of older turns plus the recent turns
+    that fit the token budget, ending with the user's message. The message
+    is saved with the reply (_finish_chat), one transaction per turn.
     """
-    # Save user message
-    save_message(user_email, f"User: {user_message}")
+    context = await run_db(build_context, user_email, CHAT_SYSTEM_PROMPT, new_message=f"User: {user_message}")
+    refresh_summary_later(user_email, context)
+    return context["messages"]
 
-    # Retrieve last 10 conversation messages for context
-    history = get_user_messages(user_email)
-    messages = [SystemMessage(content="You are a helpful AI assistant for Smart Cleaning services.")]
 
-    for msg in history[-10:]:
-        messages.append(HumanMessage(content=msg['message']))
+def _finish_chat(user_email: str, user_message: str, ai_response: str = None):
+    """
+    Queue the turn's messages (the next read of this user's history waits
+    for them); without a reply only the user's message is kept.
+    """
+    messages = [f"User: {user_message}"] + ([f"Bot: {ai_response}"] if ai_response is not None else [])
+    save_messages(user_email, messages, wait=False)
 
-    # Get AI response
-    ai_response = chat_model(messages=messages).content
 
-    # Save AI response
-    save_message(user_email, f"Bot: {ai_response}")
+async def ai_chat(user_email: str, user_message: str) -> str:
+    """
+    Chat with AI assistant using conversation history.
+    LLM calls are awaited and DB calls run on the bounded DB executor,
+    so the event loop is never blocked.
+    """
+    messages = await _start_chat(user_email, user_message)
 
+    # Get AI response (from the cache for repeated first questions if "ai_chat" is in LLM_CACHE_SITES)
+    async def generate():
+        async with llm_slot():
+            return (await get_chat_model().ainvoke(messages)).content
+
+    try:
+        ai_response = await llm_cache.aget_or_compute(
+            "ai_chat", CHAT_MODEL_NAME, {"temperature": CHAT_TEMPERATURE}, _cache_messages(messages), generate
+        )
+    except BaseException:
+        _finish_chat(user_email, user_message)  # keep the user's message
+        raise
+
+    _finish_chat(user_email, user_message, ai_response)
     return ai_response
 
 
+async def ai_chat_stream(user_email: str, user_message: str):
+    """
+    Streaming variant of ai_chat: yields response text chunks as the model
+    produces them. The assembled reply is saved (and cached, if enabled) once, after
+    the last chunk.
+    """
+    messages = await _start_chat(user_email, user_message)
+    params = {"temperature": CHAT_TEMPERATURE}
+    hit, ai_response, cache_key = await llm_cache.alookup(
+        "ai_chat", CHAT_MODEL_NAME, params, _cache_messages(messages)
+    )
+
+    try:
+        if hit:
+            yield ai_response
+        else:
+            chunks = []
+            start = time.perf_counter()
+            async with llm_slot():
+                async for chunk in get_chat_model().astream(messages):
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        yield chunk.content
+            ai_response = "".join(chunks)
+            await llm_cache.astore("ai_chat", cache_key, ai_response, (time.perf_counter() - start) * 1000)
+    except BaseException:
+        # Model error or client gone: keep the user's message
+        _finish_chat(user_email, user_message)
+        raise
+
+    _finish_chat(user_email, user_message, ai_response)
+
+
 def cohere_chatbot(prompt):
     """
     Simple chatbot function using OpenAI (for compatibility with scheduling.py)
     """
+    from langchain_core.messages import SystemMessage, HumanMessage
+
     try:
         messages = [
             SystemMessage(content="You are a helpful cleaning service assistant."),
             HumanMessage(content=prompt)
         ]
-        response = chat_model(messages=messages).content
+        response = llm_cache.get_or_compute(
+            "cohere_chatbot", CHAT_MODEL_NAME, {"temperature": CHAT_TEMPERATURE}, _cache_messages(messages),
+            lambda: get_chat_model().invoke(messages).content
+        )
         return response
     except Exception as e:
         return f"Error: {str(e)}"
\ No newline at end of file
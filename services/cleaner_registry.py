@@ -0,0 +1,76 @@
+# services/cleaner_registry.py
+import json
+import os
+import threading
+from schemas.models import Cleaner
+from services.availability import availability_index
+from services.spatial_index import GridIndex
+
+# Optional JSON file with a list of cleaners to preload:
+# [{"id": 1, "name": "Rahim", "rating": 4.8, "lat": 23.78, "lon": 90.41}, ...]
+CLEANERS_FILE = os.getenv("CLEANERS_FILE")
+# Grid cell size for the location index (0.01 deg ~ 1.1 km)
+GRID_CELL_DEGREES = float(os.getenv("CLEANER_GRID_CELL_DEGREES", "0.01"))
+
+_cleaners = {}
+_lock = threading.Lock()
+cleaner_locations = GridIndex(GRID_CELL_DEGREES)
+
+
+def upsert_cleaners(cleaners: list):
+    """
+    Add or update cleaners (e.g. when they move or come on duty).
+    New cleaners also become bookable in the availability index, and the
+    location index follows every position update.
+    """
+    with _lock:
+        for cleaner in cleaners:
+            _cleaners[cleaner.id] = cleaner
+            cleaner_locations.upsert(cleaner.id, cleaner.lat, cleaner.lon)
+            availability_index.add_cleaner(cleaner.id)
+    return len(cleaners)
+
+
+def remove_cleaner(cleaner_id: int):
+    """
+    Take a cleaner off duty.
+    """
+    with _lock:
+        removed = _cleaners.pop(cleaner_id, None)
+        cleaner_locations.remove(cleaner_id)
+    if removed:
+        availability_index.remove_cleaner(cleaner_id)
+    return removed is not None
+
+
+def list_cleaners():
+    with _lock:
+        return list(_cleaners.values())
+
+
+def nearby_cleaners(lat: float, lon: float, radius_km: float = None, limit: int = None):
+    """
+    Cleaners near a point, nearest first, from the location index.
+    :param radius_km: only cleaners within this straight-line distance
+    :param limit: at most this many (the nearest ones)
+    """
+    if radius_km is not None:
+        hits = cleaner_locations.within_radius(lat, lon, radius_km)
+        if limit is not None:
+            hits = hits[:limit]
+    elif limit is not None:
+        hits = cleaner_locations.nearest(lat, lon, limit)
+    else:
+        return list_cleaners()
+    with _lock:
+        return [_cleaners[cleaner_id] for cleaner_id, _ in hits if cleaner_id in _cleaners]
+
+
+def load_cleaners_file(path: str = CLEANERS_FILE):
+    """
+    Preload the registry from a JSON file, if one is configured.
+    """
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return upsert_cleaners([Cleaner(**item) for item in json.load(f)])
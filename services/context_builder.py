@@ -0,0 +1,263 @@
+# services/context_builder.py
+import asyncio
+import os
+import threading
+import time
+from functools import lru_cache
+from services.conversation_store import connection
+from services.conversation_service import get_messages_after
+from services.executors import run_db, llm_slot
+
+# Prompt budget per model call: system prompt + summary + recent turns
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# Rows read per turn; the budget decides how many of them are sent
+CONTEXT_FETCH_LIMIT = int(os.getenv("CONTEXT_FETCH_LIMIT", "40"))
+# Fold older messages into the summary once this many fell out of the window
+SUMMARY_BATCH = int(os.getenv("CONTEXT_SUMMARY_BATCH", "4"))
+# Upper bounds for one summarization call (input and output)
+SUMMARY_INPUT_TOKENS = int(os.getenv("CONTEXT_SUMMARY_INPUT_TOKENS", "2000"))
+SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "300"))
+SUMMARY_MODEL = os.getenv("CONTEXT_SUMMARY_MODEL", "gpt-4")
+# After a failed summarization, wait this long before the user's next attempt (doubles per failure)
+SUMMARY_RETRY_SECONDS = float(os.getenv("CONTEXT_SUMMARY_RETRY_SECONDS", "60"))
+SUMMARY_RETRY_MAX_SECONDS = float(os.getenv("CONTEXT_SUMMARY_RETRY_MAX_SECONDS", "3600"))
+
+TOKENIZER_MODEL = "gpt-4"
+# Role and separator tokens added to every chat message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_summary_model = None
+_summary_tasks = {}  # user_email -> running summarization task
+_summary_failures = {}  # user_email -> (consecutive failures, monotonic time of next attempt)
+
+
+# -----------------------------
+# Token counting
+# -----------------------------
+def _get_encoding():
+    """
+    tiktoken encoding for TOKENIZER_MODEL, loaded on first use. tiktoken
+    downloads the BPE file once (set TIKTOKEN_CACHE_DIR to ship it with the
+    deployment); without it, counts fall back to a length estimate.
+    """
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+                except Exception as e:
+                    print(f"❌ tiktoken encoding unavailable, estimating token counts: {e}")
+                    _encoding = False
+    return _encoding
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str):
+    """Number of model tokens in `text` (cached: history rows repeat every turn)"""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def to_chat_message(text: str):
+    """Stored "User: ..." / "Bot: ..." row -> typed chat message"""
+    from langchain_core.messages import HumanMessage, AIMessage
+
+    if text.startswith("Bot: "):
+        return AIMessage(content=text[5:])
+    if text.startswith("User: "):
+        return HumanMessage(content=text[6:])
+    return HumanMessage(content=text)
+
+
+# -----------------------------
+# Rolling summary store
+# -----------------------------
+def get_summary(user_email: str):
+    """(summary text, id of the last message it covers); ("", 0) if none yet"""
+    with connection(user_email) as conn:
+        row = conn.execute(
+            "SELECT summary, last_message_id FROM conversation_summaries WHERE user_email=?",
+            (user_email,)
+        ).fetchone()
+    return (row[0], row[1]) if row else ("", 0)
+
+
+def save_summary(user_email: str, summary: str, last_message_id: int):
+    """Store a newer summary; one covering fewer messages never overwrites it."""
+    with connection(user_email) as conn:
+        conn.execute(
+            """
+            INSERT INTO conversation_summaries (user_email, summary, last_message_id)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_email) DO UPDATE SET
+                summary=excluded.summary,
+                last_message_id=excluded.last_message_id,
+                updated_at=CURRENT_TIMESTAMP
+            WHERE excluded.last_message_id > conversation_summaries.last_message_id
+            """,
+            (user_email, summary, last_message_id)
+        )
+
+
+def _messages_to_fold(user_email: str, after_id: int, before_id: int):
+    """
+    Unsummarized messages just before the window, newest first up to
+    SUMMARY_INPUT_TOKENS, returned in chronological order. A backlog larger
+    than that (history from before summaries existed) is skipped, not
+    folded batch by batch.
+    """
+    with connection(user_email) as conn:
+        rows = conn.execute(
+            "SELECT id, message FROM conversations WHERE user_email=? AND id > ? AND id < ? "
+            "ORDER BY id DESC LIMIT ?",
+            (user_email, after_id, before_id, CONTEXT_FETCH_LIMIT)
+        ).fetchall()
+    batch, used = [], 0
+    for row_id, message in rows:
+        used += count_tokens(message)
+        if batch and used > SUMMARY_INPUT_TOKENS:
+            break
+        batch.append((row_id, message))
+    batch.reverse()
+    return batch
+
+
+# -----------------------------
+# Context assembly
+# -----------------------------
+def build_context(user_email: str, system_prompt: str, budget: int = None, current_session: bool = False,
+                  new_message: str = None):
+    """
+    Prompt messages for the user's next model call, within a token budget:
+    system prompt + rolling summary, then the newest stored turns (typed
+    Human/AI) that fit. Only messages newer than the summary are read, at
+    most CONTEXT_FETCH_LIMIT of them, so cost does not grow with history.
+    The newest message is always included.
+
+    :param budget: token budget (defaults to CONTEXT_TOKEN_BUDGET)
+    :param current_session: recent turns from the current booking session only
+    :param new_message: this turn's "User: ..." row when it is saved together
+                        with the reply (after the model call) rather than before
+    :return: dict with messages, tokens, and the summarization backlog
+             (pending_summary messages older than the window, fold_before_id)
+    """
+    from langchain_core.messages import SystemMessage
+
+    budget = budget or CONTEXT_TOKEN_BUDGET
+    summary, summary_through = get_summary(user_email)
+    rows = get_messages_after(user_email, summary_through, CONTEXT_FETCH_LIMIT, current_session)
+
+    if summary:
+        system_prompt = f"{system_prompt}\n\nSummary of the earlier conversation:\n{summary}"
+    used = count_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+    window = []
+    if new_message is not None:
+        used += count_tokens(new_message) + MESSAGE_OVERHEAD_TOKENS
+    for row in reversed(rows):
+        cost = count_tokens(row["message"]) + MESSAGE_OVERHEAD_TOKENS
+        if (window or new_message is not None) and used + cost > budget:
+            break
+        window.append(row)
+        used += cost
+    window.reverse()
+
+    pending = 0
+    # Oldest stored row in the window, or (when only the unsaved new message
+    # fit) just past the newest stored row
+    fold_before_id = window[0]["id"] if window else (rows[-1]["id"] + 1 if rows else None)
+    if fold_before_id is not None:
+        # Same scope as the window: earlier sessions never count as overflow of this one
+        session_filter = (
+            "AND session_id=COALESCE((SELECT session_id FROM booking_sessions WHERE user_email=?), 0)"
+            if current_session else ""
+        )
+        params = (user_email, summary_through, fold_before_id) + ((user_email,) if current_session else ())
+        with connection(user_email) as conn:
+            pending = conn.execute(
+                f"SELECT COUNT(*) FROM conversations WHERE user_email=? AND id > ? AND id < ? {session_filter}",
+                params
+            ).fetchone()[0]
+
+    messages = [SystemMessage(content=system_prompt)] + [to_chat_message(r["message"]) for r in window]
+    if new_message is not None:
+        messages.append(to_chat_message(new_message))
+    return {
+        "messages": messages,
+        "tokens": used,
+        "turns": len(messages) - 1,
+        "summary": summary,
+        "pending_summary": pending,
+        "fold_before_id": fold_before_id
+    }
+
+
+# -----------------------------
+# Incremental summarization
+# -----------------------------
+def _get_summary_model():
+    global _summary_model
+    if _summary_model is None:
+        from langchain_openai import ChatOpenAI
+
+        _summary_model = ChatOpenAI(model_name=SUMMARY_MODEL, temperature=0, max_tokens=SUMMARY_MAX_TOKENS)
+    return _summary_model
+
+
+async def fold_into_summary(user_email: str, fold_before_id: int):
+    """
+    Merge the messages that fell out of the window into the stored summary.
+    Each call reads one bounded batch (see _messages_to_fold).
+    """
+    from langchain_core.messages import HumanMessage
+
+    summary, summary_through = await run_db(get_summary, user_email)
+    batch = await run_db(_messages_to_fold, user_email, summary_through, fold_before_id)
+    if not batch:
+        return summary
+
+    prompt = (
+        "Update the running summary of a customer's conversation with a cleaning service assistant. "
+        "Keep names, addresses, requested services, dates, preferences and anything still unresolved. "
+        f"Reply with the updated summary only, under {SUMMARY_MAX_TOKENS * 3 // 4} words.\n\n"
+        f"Current summary:\n{summary or '(none)'}\n\n"
+        "New messages:\n" + "\n".join(message for _, message in batch)
+    )
+    async with llm_slot():
+        summary = (await _get_summary_model().ainvoke([HumanMessage(content=prompt)])).content.strip()
+    await run_db(save_summary, user_email, summary, fold_before_id - 1)
+    return summary
+
+
+def refresh_summary_later(user_email: str, context: dict):
+    """
+    Fold the window's overflow into the summary in the background once
+    SUMMARY_BATCH messages are waiting, so the reply never waits for it.
+    One summarization per user at a time; after a failure the user's next
+    attempt waits SUMMARY_RETRY_SECONDS, doubling up to SUMMARY_RETRY_MAX_SECONDS.
+    """
+    if context["pending_summary"] < SUMMARY_BATCH or user_email in _summary_tasks:
+        return
+    failures, retry_at = _summary_failures.get(user_email, (0, 0.0))
+    if time.monotonic() < retry_at:
+        return
+
+    async def run():
+        try:
+            await fold_into_summary(user_email, context["fold_before_id"])
+            _summary_failures.pop(user_email, None)
+        except Exception as e:
+            # Back off (doubling, capped) instead of retrying on every turn
+            delay = min(SUMMARY_RETRY_SECONDS * 2 ** failures, SUMMARY_RETRY_MAX_SECONDS)
+            _summary_failures[user_email] = (failures + 1, time.monotonic() + delay)
+            print(f"❌ Summary update failed for {user_email} (retry in {delay:.0f}s): {e}")
+        finally:
+            _summary_tasks.pop(user_email, None)
+
+    _summary_tasks[user_email] = asyncio.create_task(run())
@@ -0,0 +1,333 @@
+# services/conversation_archive.py
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import zstandard
+from services.conversation_store import shard_connection, shard_count
+
+# Closed sessions whose last message is older than this move to the archive (0 = off)
+ARCHIVE_AFTER_DAYS = float(os.getenv("CONVERSATION_ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("CONVERSATION_ARCHIVE_INTERVAL", "3600"))
+COMPRESSION_LEVEL = int(os.getenv("CONVERSATION_ARCHIVE_LEVEL", "9"))
+# Train a zstd dictionary per shard from the first sessions archived there
+USE_DICTIONARY = os.getenv("CONVERSATION_ARCHIVE_DICTIONARY", "true").lower() == "true"
+DICTIONARY_SIZE = 16 * 1024
+MIN_DICTIONARY_SAMPLES = 200
+# Sessions claimed per query; each session moves in its own short transaction
+SESSIONS_PER_BATCH = 500
+# Users whose reads are timed before and after a compaction pass
+PROBE_USERS = 20
+
+# Larger than any message id (SQLite rowids are signed 64-bit)
+MAX_ID = 2 ** 63 - 1
+
+# Tables and indexes of the hot message table (for the storage report)
+HOT_OBJECTS = ("conversations", "idx_conversations_user_ts", "idx_conversations_user_session",
+               "idx_conversations_user_id")
+
+_dictionaries = {}  # (shard, dictionary id) -> ZstdCompressionDict
+_dictionaries_lock = threading.Lock()
+_local = threading.local()  # per-thread decompressors (they are not thread-safe)
+
+
+# -----------------------------
+# Encoding
+# -----------------------------
+def _encode(rows):
+    """[(id, message, timestamp), ...] -> JSON bytes"""
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _dictionary(conn, shard: int, dictionary_id: int):
+    if dictionary_id is None:
+        return None
+    key = (shard, dictionary_id)
+    with _dictionaries_lock:
+        if key not in _dictionaries:
+            row = conn.execute("SELECT dictionary FROM archive_dictionaries WHERE id=?", (dictionary_id,)).fetchone()
+            _dictionaries[key] = zstandard.ZstdCompressionDict(row[0])
+        return _dictionaries[key]
+
+
+def _decode(conn, shard: int, payload: bytes, dictionary_id: int):
+    decompressors = _local.__dict__.setdefault("decompressors", {})
+    key = (shard, dictionary_id)
+    if key not in decompressors:
+        decompressors[key] = zstandard.ZstdDecompressor(dict_data=_dictionary(conn, shard, dictionary_id))
+    raw = decompressors[key].decompress(payload)
+    return [tuple(row) for row in json.loads(raw)]
+
+
+# -----------------------------
+# Reading archived sessions
+# -----------------------------
+def archived_messages(conn, shard: int, user_email: str, limit: int = None, before_id: int = None):
+    """
+    A user's archived messages as [(id, message, timestamp), ...] in id
+    order; with `limit`, only the newest `limit` (whole sessions are
+    decompressed, newest first, until enough are read).
+    :param before_id: only messages with a smaller id (keyset paging)
+    """
+    cursor = conn.execute(
+        "SELECT payload, dictionary_id FROM conversation_archives WHERE user_email=? AND first_id < ? "
+        "ORDER BY session_id DESC",
+        (user_email, before_id if before_id is not None else MAX_ID)
+    )
+    sessions, count = [], 0
+    for payload, dictionary_id in cursor:
+        rows = _decode(conn, shard, payload, dictionary_id)
+        if before_id is not None:
+            rows = [row for row in rows if row[0] < before_id]
+        sessions.append(rows)
+        count += len(rows)
+        if limit and count >= limit:
+            break
+    rows = [row for session in reversed(sessions) for row in session]
+    return rows[-limit:] if limit else rows
+
+
+def iter_archived_rows(shard: int, batch_size: int):
+    """Every archived message of one shard: (user_email, session_id, id, message, timestamp)"""
+    last_rowid = 0
+    while True:
+        with shard_connection(shard) as conn:
+            batch = conn.execute(
+                "SELECT rowid, user_email, session_id, payload, dictionary_id FROM conversation_archives "
+                "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size)
+            ).fetchall()
+            sessions = [(r[1], r[2], _decode(conn, shard, r[3], r[4])) for r in batch]
+        for user_email, session_id, rows in sessions:
+            for row_id, message, timestamp in rows:
+                yield user_email, session_id, row_id, message, timestamp
+        if len(batch) < batch_size:
+            return
+        last_rowid = batch[-1][0]
+
+
+# -----------------------------
+# Compaction
+# -----------------------------
+def _closed_sessions(conn, cutoff: str, limit: int):
+    """(user_email, session_id) of closed sessions whose last message is older than cutoff"""
+    return conn.execute(
+        """
+        SELECT c.user_email, c.session_id FROM conversations c
+        JOIN booking_sessions b ON b.user_email = c.user_email
+        WHERE c.session_id < b.session_id
+        GROUP BY c.user_email, c.session_id
+        HAVING MAX(c.timestamp) < datetime('now', ?)
+        LIMIT ?
+        """,
+        (cutoff, limit)
+    ).fetchall()
+
+
+def _session_rows(conn, user_email: str, session_id: int):
+    return conn.execute(
+        "SELECT id, message, timestamp FROM conversations WHERE user_email=? AND session_id=? ORDER BY id",
+        (user_email, session_id)
+    ).fetchall()
+
+
+def _get_or_train_dictionary(shard: int, sessions: list):
+    """
+    Id of the shard's dictionary, training one from the sessions about to
+    be archived the first time enough are available; None without one.
+    """
+    with shard_connection(shard) as conn:
+        row = conn.execute("SELECT id FROM archive_dictionaries ORDER BY id DESC LIMIT 1").fetchone()
+        if row:
+            return row[0]
+        if len(sessions) < MIN_DICTIONARY_SAMPLES:
+            return None
+        samples = [_encode([tuple(r) for r in _session_rows(conn, *s)]) for s in sessions]
+        try:
+            trained = zstandard.train_dictionary(DICTIONARY_SIZE, samples, level=COMPRESSION_LEVEL)
+        except zstandard.ZstdError as e:
+            print(f"❌ Archive dictionary training failed on shard {shard}: {e}")
+            return None
+        cur = conn.execute("INSERT INTO archive_dictionaries (dictionary) VALUES (?)", (trained.as_bytes(),))
+        print(f"✅ Trained a {len(trained.as_bytes()) // 1024} KB archive dictionary on shard {shard} "
+              f"from {len(samples)} sessions")
+        return cur.lastrowid
+
+
+def _archive_session(shard: int, user_email: str, session_id: int, dictionary_id: int):
+    """
+    Move one closed session into the archive in a single transaction.
+    Messages that reach an already archived session later are merged
+    into its blob.
+    :return: (messages moved, raw bytes, compressed bytes)
+    """
+    with shard_connection(shard) as conn:
+        rows = _session_rows(conn, user_email, session_id)
+        if not rows:
+            return 0, 0, 0
+        existing = conn.execute(
+            "SELECT payload, dictionary_id FROM conversation_archives WHERE user_email=? AND session_id=?",
+            (user_email, session_id)
+        ).fetchone()
+        archived = _decode(conn, shard, existing[0], existing[1]) if existing else []
+        merged = sorted(archived + [tuple(r) for r in rows])
+        raw = _encode(merged)
+        compressor = zstandard.ZstdCompressor(
+            level=COMPRESSION_LEVEL, dict_data=_dictionary(conn, shard, dictionary_id)
+        )
+        payload = compressor.compress(raw)
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO conversation_archives
+                (user_email, session_id, first_id, last_id, message_count, first_timestamp,
+                 last_timestamp, raw_bytes, dictionary_id, payload)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (user_email, session_id, merged[0][0], merged[-1][0], len(merged), merged[0][2],
+             merged[-1][2], len(raw), dictionary_id, payload)
+        )
+        conn.execute(
+            "DELETE FROM conversations WHERE user_email=? AND session_id=? AND id <= ?",
+            (user_email, session_id, rows[-1][0])
+        )
+    return len(rows), len(raw), len(payload)
+
+
+def _hot_bytes(shard: int):
+    """Bytes in the pages of the hot table and its indexes (None without dbstat)"""
+    try:
+        with shard_connection(shard) as conn:
+            placeholders = ",".join("?" * len(HOT_OBJECTS))
+            return conn.execute(
+                f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({placeholders})", HOT_OBJECTS
+            ).fetchone()[0]
+    except Exception:
+        return None
+
+
+def _probe_ms(users: list):
+    """Median ms of the current-conversation and full-history reads for `users`"""
+    from services.conversation_service import get_current_conversation, get_user_messages
+
+    timings = {"current_conversation_ms": [], "user_messages_ms": []}
+    for user_email in users:
+        for name, read in (("current_conversation_ms", get_current_conversation),
+                           ("user_messages_ms", get_user_messages)):
+            start = time.perf_counter()
+            read(user_email)
+            timings[name].append((time.perf_counter() - start) * 1000)
+    return {name: round(statistics.median(values), 3) if values else None for name, values in timings.items()}
+
+
+def compact_archives(older_than_days: float = ARCHIVE_AFTER_DAYS, use_dictionary: bool = USE_DICTIONARY):
+    """
+    Move closed booking sessions whose last message is older than
+    `older_than_days` out of the hot conversations table into
+    zstd-compressed archive blobs, on every shard.
+    get_user_messages keeps returning them; prompts (hot rows + rolling
+    summary) and the current conversation never read the archive.
+
+    :return: report with sessions/messages moved, raw vs. compressed bytes,
+             hot table size and read latency of sampled users before and after
+    """
+    started = time.perf_counter()
+    cutoff = f"-{older_than_days} days"
+    report = {"sessions": 0, "messages": 0, "raw_bytes": 0, "archived_bytes": 0}
+    candidates = {}
+    for shard in range(shard_count()):
+        with shard_connection(shard) as conn:
+            candidates[shard] = _closed_sessions(conn, cutoff, SESSIONS_PER_BATCH)
+    users = list({user for sessions in candidates.values() for user, _ in sessions})
+    probe_users = random.sample(users, min(PROBE_USERS, len(users)))
+    before = _probe_ms(probe_users)
+
+    hot_before, hot_after = [], []
+    for shard in range(shard_count()):
+        sessions = candidates[shard]
+        hot_before.append(_hot_bytes(shard))
+        while sessions:
+            dictionary_id = _get_or_train_dictionary(shard, sessions) if use_dictionary else None
+            for user_email, session_id in sessions:
+                moved, raw, compressed = _archive_session(shard, user_email, session_id, dictionary_id)
+                report["sessions"] += 1 if moved else 0
+                report["messages"] += moved
+                report["raw_bytes"] += raw
+                report["archived_bytes"] += compressed
+            if len(sessions) < SESSIONS_PER_BATCH:
+                break
+            with shard_connection(shard) as conn:
+                sessions = _closed_sessions(conn, cutoff, SESSIONS_PER_BATCH)
+        hot_after.append(_hot_bytes(shard))
+
+    after = _probe_ms(probe_users)
+    report.update(
+        hot_bytes_before=None if None in hot_before else sum(hot_before),
+        hot_bytes_after=None if None in hot_after else sum(hot_after),
+        saved_bytes=report["raw_bytes"] - report["archived_bytes"],
+        compression_ratio=round(report["raw_bytes"] / report["archived_bytes"], 2) if report["archived_bytes"] else None,
+        probe_users=len(probe_users),
+        latency_before=before,
+        latency_after=after,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1)
+    )
+    if report["sessions"]:
+        print(f"✅ Archived {report['sessions']} sessions ({report['messages']} messages): "
+              f"{report['raw_bytes']} -> {report['archived_bytes']} bytes "
+              f"({report['compression_ratio']}x), hot table {report['hot_bytes_before']} -> "
+              f"{report['hot_bytes_after']} bytes")
+    return report
+
+
+def archive_stats():
+    """Totals over every shard's archive table"""
+    totals = {"sessions": 0, "messages": 0, "raw_bytes": 0, "archived_bytes": 0}
+    for shard in range(shard_count()):
+        with shard_connection(shard) as conn:
+            row = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(message_count), 0), COALESCE(SUM(raw_bytes), 0), "
+                "COALESCE(SUM(LENGTH(payload)), 0) FROM conversation_archives"
+            ).fetchone()
+        for key, value in zip(totals, row):
+            totals[key] += value
+    return totals
+
+
+class ArchiveWorker:
+    """
+    Background thread that runs compact_archives every
+    ARCHIVE_INTERVAL_SECONDS and keeps the last report.
+    """
+
+    def __init__(self, interval: float = ARCHIVE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.last_report = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="conversation-archive", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.last_report = compact_archives()
+            except Exception as e:
+                print(f"❌ Conversation archive worker error: {e}")
+            self._stopping.wait(self.interval)
+
+    def stats(self):
+        return {"enabled": ARCHIVE_AFTER_DAYS > 0, "last_report": self.last_report}
+
+
+archive_worker = ArchiveWorker()
@@ -1,45 +1,48 @@
 # services/conversation_service.py
-import sqlite3
-from datetime import datetime
+import json
+import os
+from services.conversation_store import DB_PATH, connection, shard_connection, shard_count, shard_for
+from services.conversation_archive import archived_messages, iter_archived_rows, MAX_ID
+from services.message_writer import message_writer
+
+
+# Upper bound for the current conversation returned to clients
+CURRENT_CONVERSATION_LIMIT = 50
+# Default and largest page of the paginated history
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 200
+# Messages older than this many days are deleted by apply_retention (0 = keep)
+RETENTION_DAYS = int(os.getenv("CONVERSATION_RETENTION_DAYS", "0"))
+# Rows per read (export) or delete (retention) on one shard; keeps each
+# transaction, and so each shard's writer lock, short
+SHARD_BATCH_SIZE = 1000
 
-DB_PATH = "conversations.db"
 
 # -----------------------------
-# Initialize the database
+# Save messages (group-committed by the message writer)
 # -----------------------------
-def init_db():
+def save_message(user_email: str, message: str, session_id: int = None, wait: bool = True):
     """
-    Create the conversations table if it doesn't exist.
+    Save a user or bot message to the database.
+    The message is stamped with `session_id`, or else with the user's
+    current booking session id when it is written.
+
+    :param wait: block until committed; with False the message is only
+                 queued (reads of this user's messages still see it)
     """
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS conversations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_email TEXT NOT NULL,
-            message TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
+    save_messages(user_email, [message], session_id, wait)
 
 
-# -----------------------------
-# Save a message
-# -----------------------------
-def save_message(user_email: str, message: str):
+def save_messages(user_email: str, messages: list, session_id: int = None, wait: bool = True):
     """
-    Save a user or bot message to the database.
+    Save several messages of one user in a single transaction
+    (see save_message).
+    :return: the stored rows [{"id", "message", "timestamp"}, ...], or with
+             wait=False the queued PendingWrite (its .wait() returns them)
     """
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO conversations (user_email, message) VALUES (?, ?)",
-        (user_email, message)
-    )
-    conn.commit()
-    conn.close()
+    if wait:
+        return message_writer.write(user_email, messages, session_id)
+    return message_writer.submit(user_email, messages, session_id)
 
 
 # -----------------------------
@@ -47,80 +50,157 @@ def save_message(user_email: str, message: str):
 # -----------------------------
 def get_user_messages(user_email: str, limit: int = None):
     """
-    Retrieve conversation messages for a user in chronological order.
-    Returns a list of dictionaries: [{"message": str, "timestamp": str}, ...]
+    Retrieve conversation messages for a user in chronological order,
+    including sessions moved to the compressed archive.
+    Returns a list of dictionaries: [{"id": int, "message": str, "timestamp": str}, ...]
     
     :param user_email: User's email address
     :param limit: Maximum number of messages to return (optional)
     """
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    c = conn.cursor()
-    
-    if limit:
-        c.execute(
-            "SELECT message, timestamp FROM conversations WHERE user_email=? ORDER BY timestamp DESC LIMIT ?",
-            (user_email, limit)
-        )
-        rows = c.fetchall()
-        rows.reverse()  # Reverse to get chronological order
-    else:
-        c.execute(
-            "SELECT message, timestamp FROM conversations WHERE user_email=? ORDER BY timestamp",
-            (user_email,)
-        )
-        rows = c.fetchall()
-    
-    conn.close()
-    return [{"message": r[0], "timestamp": r[1]} for r in rows]
+    message_writer.wait_for(user_email)
+    with connection(user_email) as conn:
+        if limit:
+            rows = conn.execute(
+                "SELECT id, message, timestamp FROM conversations WHERE user_email=? "
+                "ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (user_email, limit)
+            ).fetchall()
+            rows.reverse()  # Reverse to get chronological order
+        else:
+            rows = conn.execute(
+                "SELECT id, message, timestamp FROM conversations WHERE user_email=? "
+                "ORDER BY timestamp, id",
+                (user_email,)
+            ).fetchall()
+        # Archived sessions are only read when the hot rows do not fill the limit
+        if not limit or len(rows) < limit:
+            archived = archived_messages(conn, shard_for(user_email), user_email,
+                                         limit - len(rows) if limit else None)
+            if archived:
+                rows = sorted(archived + rows, key=lambda r: (r[2], r[0]))
+
+    return [{"id": r[0], "message": r[1], "timestamp": r[2]} for r in rows]
+
+
+# -----------------------------
+# Get the newest messages after a given id
+# -----------------------------
+def get_messages_after(user_email: str, after_id: int, limit: int, current_session: bool = False):
+    """
+    Newest messages with id > after_id, in chronological order.
+    Returns a list of dictionaries: [{"id": int, "message": str}, ...]
+
+    :param after_id: only messages newer than this id (0 for all)
+    :param limit: Maximum number of messages to return
+    :param current_session: only messages of the current booking session
+    """
+    session_filter = (
+        "AND session_id=COALESCE((SELECT session_id FROM booking_sessions WHERE user_email=?), 0)"
+        if current_session else ""
+    )
+    message_writer.wait_for(user_email)
+    params = (user_email, after_id) + ((user_email,) if current_session else ()) + (limit,)
+    with connection(user_email) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT id, message FROM conversations
+            WHERE user_email=? AND id > ? {session_filter}
+            ORDER BY id DESC LIMIT ?
+            """,
+            params
+        ).fetchall()
+
+    rows.reverse()  # Reverse to get chronological order
+    return [{"id": r[0], "message": r[1]} for r in rows]
 
 
 # -----------------------------
-# Get current conversation only (NEW FUNCTION)
+# Get current conversation only
 # -----------------------------
-def get_current_conversation(user_email: str, limit: int = None):
+def get_current_conversation(user_email: str, limit: int = CURRENT_CONVERSATION_LIMIT):
     """
     Get only the current ongoing conversation (after last booking completion).
-    Filters out completed bookings and internal state messages.
+    A single indexed range query on (user_email, session_id), newest first.
     
     :param user_email: User's email address
-    :param limit: Maximum number of messages to return (optional)
+    :param limit: Maximum number of messages to return
     :return: List of messages in current conversation
+             [{"id": int, "message": str, "timestamp": str}, ...]
     """
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    c = conn.cursor()
-    
-    # Get all messages in reverse order (newest first)
-    c.execute(
-        "SELECT message, timestamp FROM conversations WHERE user_email=? ORDER BY timestamp DESC",
-        (user_email,)
-    )
-    rows = c.fetchall()
-    conn.close()
-    
-    # Find the current conversation (after last BOOKING_CONFIRMED or BOOKING_CANCELLED)
-    current_conv = []
-    for row in rows:
-        message, timestamp = row
-        
-        # Stop at last completed/cancelled booking (but include it)
-        if "BOOKING_CONFIRMED" in message or "BOOKING_CANCELLED" in message:
-            # Include the confirmation message itself
-            if "Bot:" in message:
-                current_conv.append({"message": message, "timestamp": timestamp})
-            break
-        
-        # Skip internal state messages from display
-        if not any(x in message for x in ["PENDING_APPOINTMENT:", "SELECTED_SERVICE:", "BOOKING_CONFIRMED", "BOOKING_CANCELLED"]):
-            current_conv.append({"message": message, "timestamp": timestamp})
-    
-    # Reverse to get chronological order
-    current_conv.reverse()
-    
-    # Apply limit if specified
-    if limit and len(current_conv) > limit:
-        current_conv = current_conv[-limit:]
-    
-    return current_conv
+    message_writer.wait_for(user_email)
+    with connection(user_email) as conn:
+        rows = conn.execute(
+            """
+            SELECT id, message, timestamp FROM conversations
+            WHERE user_email=?
+              AND session_id=COALESCE((SELECT session_id FROM booking_sessions WHERE user_email=?), 0)
+            ORDER BY id DESC LIMIT ?
+            """,
+            (user_email, user_email, limit)
+        ).fetchall()
+
+    rows.reverse()  # Reverse to get chronological order
+    return [{"id": r[0], "message": r[1], "timestamp": r[2]} for r in rows]
+
+
+# -----------------------------
+# Incremental and paginated history
+# -----------------------------
+def get_messages_since(user_email: str, since: int, limit: int = CURRENT_CONVERSATION_LIMIT):
+    """
+    Messages newer than the `since` cursor (a message id the client
+    already has), across session boundaries, in chronological order.
+    At most the newest `limit`; older gaps can be read with get_history_page.
+    """
+    message_writer.wait_for(user_email)
+    with connection(user_email) as conn:
+        rows = conn.execute(
+            "SELECT id, message, timestamp FROM conversations WHERE user_email=? AND id > ? "
+            "ORDER BY id DESC LIMIT ?",
+            (user_email, since, limit)
+        ).fetchall()
+
+    rows.reverse()  # Reverse to get chronological order
+    return [{"id": r[0], "message": r[1], "timestamp": r[2]} for r in rows]
+
+
+def get_latest_message_id(user_email: str):
+    """Id of the user's newest stored message (0 if none); a `since` cursor for what follows"""
+    message_writer.wait_for(user_email)
+    with connection(user_email) as conn:
+        return conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM conversations WHERE user_email=?", (user_email,)
+        ).fetchone()[0]
+
+
+def get_history_page(user_email: str, before_id: int = None, limit: int = HISTORY_PAGE_SIZE):
+    """
+    One page of a user's full history (archived sessions included),
+    newest first by keyset: messages with id < before_id, returned in
+    chronological order. Pass the returned next_before to get the page
+    before it; it is None on the oldest page.
+    """
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+    before = before_id if before_id is not None else MAX_ID
+    message_writer.wait_for(user_email)
+    with connection(user_email) as conn:
+        rows = conn.execute(
+            "SELECT id, message, timestamp FROM conversations WHERE user_email=? AND id < ? "
+            "ORDER BY id DESC LIMIT ?",
+            (user_email, before, limit + 1)
+        ).fetchall()
+        rows.reverse()
+        # One row beyond the page tells whether an older page exists
+        if len(rows) <= limit:
+            archived = archived_messages(conn, shard_for(user_email), user_email, limit + 1 - len(rows), before)
+            rows = sorted(archived + rows)
+
+    has_more = len(rows) > limit
+    rows = rows[-limit:]
+    return {
+        "messages": [{"id": r[0], "message": r[1], "timestamp": r[2]} for r in rows],
+        "next_before": rows[0][0] if has_more else None
+    }
 
 
 # -----------------------------
@@ -131,14 +211,90 @@ def clear_conversation(user_email: str):
     Clear all conversation history for a specific user.
     Useful for testing or allowing users to start fresh.
     """
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    c = conn.cursor()
-    c.execute("DELETE FROM conversations WHERE user_email=?", (user_email,))
-    conn.commit()
-    conn.close()
+    message_writer.wait_for(user_email)
+    with connection(user_email) as conn:
+        conn.execute("DELETE FROM conversations WHERE user_email=?", (user_email,))
+        conn.execute("DELETE FROM booking_sessions WHERE user_email=?", (user_email,))
+        conn.execute("DELETE FROM conversation_summaries WHERE user_email=?", (user_email,))
+        conn.execute("DELETE FROM conversation_archives WHERE user_email=?", (user_email,))
 
 
 # -----------------------------
-# Initialize DB at import
+# Cross-shard operations
 # -----------------------------
-init_db()
\ No newline at end of file
+def iter_all_messages(batch_size: int = SHARD_BATCH_SIZE):
+    """
+    Every stored message of every user, shard by shard: hot rows in id
+    order, then archived sessions (decompressed).
+    Reads in short keyset-paged batches, so writers are never held up.
+    Yields dictionaries: {"shard", "id", "user_email", "session_id", "message", "timestamp"}
+    (ids are per shard).
+    """
+    message_writer.flush()
+    for shard in range(shard_count()):
+        last_id = 0
+        while True:
+            with shard_connection(shard) as conn:
+                rows = conn.execute(
+                    "SELECT id, user_email, session_id, message, timestamp FROM conversations "
+                    "WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            for r in rows:
+                yield {"shard": shard, "id": r[0], "user_email": r[1], "session_id": r[2],
+                       "message": r[3], "timestamp": r[4]}
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1][0]
+        for user_email, session_id, row_id, message, timestamp in iter_archived_rows(shard, batch_size):
+            yield {"shard": shard, "id": row_id, "user_email": user_email, "session_id": session_id,
+                   "message": message, "timestamp": timestamp}
+
+
+def export_conversations(path: str):
+    """
+    Write every message of every shard to `path` as JSON lines.
+    :return: number of messages written
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for row in iter_all_messages():
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    print(f"✅ Exported {count} messages from {shard_count()} shard(s) to {path}")
+    return count
+
+
+def apply_retention(days: int = RETENTION_DAYS):
+    """
+    Delete messages, archived sessions and rolling summaries older than
+    `days` on every shard, in batches. Ids grow with time, so each batch is read from
+    the start of the table.
+    :return: number of messages deleted
+    """
+    if days <= 0:
+        return 0
+    cutoff = f"-{days} days"
+    deleted = 0
+    for shard in range(shard_count()):
+        while True:
+            with shard_connection(shard) as conn:
+                removed = conn.execute(
+                    "DELETE FROM conversations WHERE id IN ("
+                    "SELECT id FROM conversations WHERE timestamp < datetime('now', ?) ORDER BY id LIMIT ?)",
+                    (cutoff, SHARD_BATCH_SIZE)
+                ).rowcount
+            deleted += removed
+            if removed < SHARD_BATCH_SIZE:
+                break
+        with shard_connection(shard) as conn:
+            deleted += conn.execute(
+                "SELECT COALESCE(SUM(message_count), 0) FROM conversation_archives "
+                "WHERE last_timestamp < datetime('now', ?)", (cutoff,)
+            ).fetchone()[0]
+            conn.execute("DELETE FROM conversation_archives WHERE last_timestamp < datetime('now', ?)", (cutoff,))
+            conn.execute(
+                "DELETE FROM conversation_summaries WHERE updated_at < datetime('now', ?)", (cutoff,)
+            )
+    print(f"✅ Retention ({days} days): deleted {deleted} messages from {shard_count()} shard(s)")
+    return deleted
@@ -0,0 +1,334 @@
+# services/conversation_store.py
+import os
+import threading
+from datetime import datetime
+import xxhash
+from services.sqlite_pool import SQLitePool, migrate
+
+DB_PATH = os.getenv("CONVERSATION_DB_PATH", "conversations.db")
+POOL_SIZE = int(os.getenv("CONVERSATION_DB_POOL_SIZE", "8"))
+# Users are spread over this many database files (1 = DB_PATH only).
+# Changing it moves users between shards: export and re-import their data.
+SHARD_COUNT = int(os.getenv("CONVERSATION_SHARDS", "1"))
+# "sqlite" (files) or "memory" (in-process, for tests and tools)
+BACKEND = os.getenv("CONVERSATION_BACKEND", "sqlite")
+
+# Legacy marker rows written into the transcript before booking state and
+# session ids had their own columns
+BOUNDARY_MARKERS = ("BOOKING_CONFIRMED", "BOOKING_CANCELLED")
+STATE_MARKER_PREFIXES = ("SELECTED_SERVICE:", "PENDING_APPOINTMENT:")
+
+
+def _parse_state_marker(message: str):
+    """
+    booking_sessions fields for a legacy marker row, or None if unreadable:
+    "SELECTED_SERVICE: id|name|duration" or
+    "PENDING_APPOINTMENT: start|end|service_id|name|description"
+    """
+    prefix, _, body = message.partition(": ")
+    parts = body.split("|")
+    try:
+        if prefix == "SELECTED_SERVICE":
+            int(parts[2])
+            return {"selected_service_id": parts[0], "pending_start": None, "pending_end": None,
+                    "status": "service_selected"}
+        if prefix == "PENDING_APPOINTMENT" and len(parts) >= 5:
+            return {"selected_service_id": parts[2],
+                    "pending_start": datetime.fromisoformat(parts[0]).isoformat(),
+                    "pending_end": datetime.fromisoformat(parts[1]).isoformat(),
+                    "status": "pending_confirmation"}
+    except (IndexError, ValueError):
+        pass
+    return None
+
+
+def _backfill_booking_state(conn):
+    """
+    Carry in-progress bookings over from the marker rows: each user's newest
+    SELECTED_SERVICE / PENDING_APPOINTMENT marker, if no boundary marker
+    follows it, becomes their booking_sessions state.
+    """
+    rows = conn.execute(
+        """
+        SELECT c.user_email, c.message FROM conversations c JOIN (
+            SELECT user_email,
+                   MAX(CASE WHEN message LIKE ? OR message LIKE ? THEN id END) AS marker_id,
+                   MAX(CASE WHEN message IN (?, ?) THEN id END) AS boundary_id
+            FROM conversations GROUP BY user_email
+        ) latest ON c.id = latest.marker_id
+        WHERE latest.marker_id > COALESCE(latest.boundary_id, 0)
+        """,
+        tuple(f"{prefix}%" for prefix in STATE_MARKER_PREFIXES) + BOUNDARY_MARKERS
+    ).fetchall()
+    for user_email, message in rows:
+        state = _parse_state_marker(message)
+        if state is None:
+            continue
+        conn.execute(
+            """
+            INSERT INTO booking_sessions (user_email, selected_service_id, pending_start, pending_end, status)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_email) DO UPDATE SET
+                selected_service_id = excluded.selected_service_id,
+                pending_start = excluded.pending_start,
+                pending_end = excluded.pending_end,
+                status = excluded.status
+            """,
+            (user_email, state["selected_service_id"], state["pending_start"], state["pending_end"],
+             state["status"])
+        )
+
+
+def _add_session_ids(conn):
+    """
+    Stamp every message with the booking session (epoch) it belongs to.
+    Legacy rows are numbered by counting the boundary markers before them;
+    in-progress booking state is copied into booking_sessions, then all
+    marker rows are dropped from the transcript.
+    """
+    conn.execute("ALTER TABLE conversations ADD COLUMN session_id INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE booking_sessions ADD COLUMN session_id INTEGER NOT NULL DEFAULT 0")
+
+    rows = conn.execute(
+        """
+        SELECT id, sid FROM (
+            SELECT id, COALESCE(SUM(message IN (?, ?)) OVER (
+                PARTITION BY user_email ORDER BY id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ), 0) AS sid
+            FROM conversations
+        ) WHERE sid > 0
+        """,
+        BOUNDARY_MARKERS
+    ).fetchall()
+    conn.executemany(
+        "UPDATE conversations SET session_id=? WHERE id=?",
+        [(sid, row_id) for row_id, sid in rows]
+    )
+
+    conn.execute(
+        """
+        INSERT INTO booking_sessions (user_email, session_id)
+        SELECT user_email, COUNT(*) FROM conversations
+        WHERE message IN (?, ?) GROUP BY user_email
+        ON CONFLICT(user_email) DO UPDATE SET session_id = excluded.session_id
+        """,
+        BOUNDARY_MARKERS
+    )
+    _backfill_booking_state(conn)
+    conn.execute(
+        "DELETE FROM conversations WHERE message IN (?, ?) OR message LIKE ? OR message LIKE ?",
+        BOUNDARY_MARKERS + tuple(f"{prefix}%" for prefix in STATE_MARKER_PREFIXES)
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_conversations_user_session "
+        "ON conversations (user_email, session_id)"
+    )
+
+
+# -----------------------------
+# Schema migrations (append only)
+# -----------------------------
+MIGRATIONS = [
+    # 1: original table
+    """
+    CREATE TABLE IF NOT EXISTS conversations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_email TEXT NOT NULL,
+        message TEXT NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    """,
+    # 2: per-user history index; rowid is implicitly the last key column,
+    # so "WHERE user_email=? ORDER BY timestamp, id" is an index range scan
+    """
+    CREATE INDEX IF NOT EXISTS idx_conversations_user_ts
+        ON conversations (user_email, timestamp);
+    """,
+    # 3: typed per-user booking state (replaces marker strings in history)
+    """
+    CREATE TABLE IF NOT EXISTS booking_sessions (
+        user_email TEXT PRIMARY KEY,
+        selected_service_id TEXT,
+        pending_start TEXT,
+        pending_end TEXT,
+        status TEXT NOT NULL DEFAULT 'idle',
+        version INTEGER NOT NULL DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID;
+    """,
+    # 4: session (epoch) id on every message
+    _add_session_ids,
+    # 5: outbox of confirmed bookings waiting to be written to Google Calendar
+    """
+    CREATE TABLE IF NOT EXISTS calendar_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_email TEXT NOT NULL,
+        dedupe_key TEXT NOT NULL UNIQUE,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL DEFAULT 0,
+        event_id TEXT,
+        event_link TEXT,
+        last_error TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_calendar_outbox_due
+        ON calendar_outbox (status, next_attempt_at);
+    """,
+    # 6: cleaner assigned to pending and confirmed bookings
+    """
+    ALTER TABLE booking_sessions ADD COLUMN pending_cleaner_id TEXT;
+    ALTER TABLE calendar_outbox ADD COLUMN cleaner_id TEXT;
+    """,
+    # 7: rolling summary of each user's older messages (up to last_message_id),
+    # and an index so "newest messages after id N" reads only those rows
+    """
+    CREATE TABLE IF NOT EXISTS conversation_summaries (
+        user_email TEXT PRIMARY KEY,
+        summary TEXT NOT NULL,
+        last_message_id INTEGER NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_conversations_user_id
+        ON conversations (user_email, id);
+    """,
+    # 8: closed sessions moved out of the hot table, one zstd-compressed
+    # blob per session, optionally compressed with a trained dictionary
+    """
+    CREATE TABLE IF NOT EXISTS conversation_archives (
+        user_email TEXT NOT NULL,
+        session_id INTEGER NOT NULL,
+        first_id INTEGER NOT NULL,
+        last_id INTEGER NOT NULL,
+        message_count INTEGER NOT NULL,
+        first_timestamp DATETIME,
+        last_timestamp DATETIME,
+        raw_bytes INTEGER NOT NULL,
+        dictionary_id INTEGER,
+        payload BLOB NOT NULL,
+        archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_email, session_id)
+    );
+    CREATE TABLE IF NOT EXISTS archive_dictionaries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dictionary BLOB NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    """,
+]
+
+# -----------------------------
+# Storage backends
+# -----------------------------
+def shard_paths(path: str, shards: int):
+    """conversations.db -> [conversations.db] or [conversations.0.db, conversations.1.db, ...]"""
+    if shards == 1:
+        return [path]
+    root, ext = os.path.splitext(path)
+    return [f"{root}.{i}{ext or '.db'}" for i in range(shards)]
+
+
+class ShardedSQLiteStore:
+    """
+    Conversation data split over N SQLite databases by a stable hash of
+    user_email. Every table is keyed by user, so all of a user's rows
+    (messages, booking session, summary, outbox) live in one shard and
+    per-user work stays a single-database transaction. Each shard has its
+    own pool, schema version and writer lock.
+    """
+
+    def __init__(self, paths: list, pool_size: int = POOL_SIZE):
+        self.paths = list(paths)
+        self.pools = [SQLitePool(path, size=pool_size) for path in self.paths]
+        self._ready = [False] * len(self.paths)
+        self._lock = threading.Lock()
+
+    @property
+    def shard_count(self):
+        return len(self.pools)
+
+    def shard_for(self, user_email: str):
+        """Shard index of a user (xxhash64: stable across processes and restarts)"""
+        if len(self.pools) == 1:
+            return 0
+        return xxhash.xxh64_intdigest(user_email) % len(self.pools)
+
+    def connection(self, shard: int):
+        """Borrow a pooled connection to one shard, migrating it on first use"""
+        if not self._ready[shard]:
+            self.init_shard(shard)
+        return self.pools[shard].connection()
+
+    def init_shard(self, shard: int):
+        with self._lock:
+            if not self._ready[shard]:
+                with self.pools[shard].connection() as conn:
+                    migrate(conn, MIGRATIONS)
+                self._ready[shard] = True
+
+    def close(self):
+        for pool in self.pools:
+            pool.close()
+
+
+class MemoryStore(ShardedSQLiteStore):
+    """
+    In-process SQLite databases (nothing on disk) with the same schema and
+    queries, for tests and tools. One connection per shard, so threads
+    take turns through the pool; data lives as long as the store.
+    """
+
+    def __init__(self, shards: int = 1):
+        super().__init__([":memory:"] * shards, pool_size=1)
+
+
+def create_store(backend: str = BACKEND, path: str = DB_PATH, shards: int = SHARD_COUNT):
+    if backend == "memory":
+        return MemoryStore(shards)
+    if backend == "sqlite":
+        return ShardedSQLiteStore(shard_paths(path, shards))
+    raise ValueError(f"Unknown conversation backend: {backend}")
+
+
+store = create_store()
+
+
+# -----------------------------
+# Connections
+# -----------------------------
+def connection(user_email: str):
+    """
+    Borrow a pooled connection to the shard holding `user_email`.
+    The schema is created or upgraded on first use.
+    Usage: `with connection(user_email) as conn: ...`
+    """
+    return store.connection(store.shard_for(user_email))
+
+
+def shard_for(user_email: str):
+    return store.shard_for(user_email)
+
+
+def shard_count():
+    return store.shard_count
+
+
+def shard_connection(shard: int):
+    """Borrow a connection to one shard (for work spanning all users)"""
+    return store.connection(shard)
+
+
+def init_db():
+    """
+    Create or upgrade the conversation schema on every shard (once per process).
+    """
+    for shard in range(store.shard_count):
+        store.init_shard(shard)
+
+
+def close():
+    """Close idle connections of every shard (shutdown and tools)"""
+    store.close()
@@ -0,0 +1,314 @@
+# services/date_extraction.py
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import repeat
+
+# Batches smaller than this are parsed in-process (pool start-up costs more)
+BATCH_POOL_MIN_SIZE = int(os.getenv("DATE_BATCH_POOL_MIN_SIZE", "2000"))
+BATCH_CHUNK_SIZE = int(os.getenv("DATE_BATCH_CHUNK_SIZE", "500"))
+
+DATEPARSER_SETTINGS = {
+    "PREFER_DATES_FROM": "future",
+    "TIMEZONE": "Asia/Dhaka",
+    "RETURN_AS_TIMEZONE_AWARE": False,
+}
+# Booking words stripped before the dateparser fallback
+FILLER_KEYWORDS = ["book", "appointment", "schedule", "cleaning"]
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8, "sep": 9, "sept": 9,
+    "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11, "dec": 12, "december": 12,
+    "জানুয়ারি": 1, "জানুয়ারী": 1, "ফেব্রুয়ারি": 2, "ফেব্রুয়ারী": 2, "মার্চ": 3, "এপ্রিল": 4,
+    "মে": 5, "জুন": 6, "জুলাই": 7, "আগস্ট": 8, "আগষ্ট": 8, "সেপ্টেম্বর": 9, "অক্টোবর": 10,
+    "নভেম্বর": 11, "ডিসেম্বর": 12,
+}
+WEEKDAYS = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tue": 1, "tues": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thur": 3, "thurs": 3, "friday": 4, "fri": 4, "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+    "সোমবার": 0, "মঙ্গলবার": 1, "বুধবার": 2, "বৃহস্পতিবার": 3, "শুক্রবার": 4, "শনিবার": 5,
+    "রবিবার": 6, "রোববার": 6,
+}
+RELATIVE_DAYS = {
+    "today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2,
+    "আজকে": 0, "আজ": 0, "আগামীকাল": 1, "কালকে": 1, "কাল": 1, "পরশুদিন": 2, "পরশু": 2,
+}
+# Day-period words that settle am/pm for a bare hour
+PM_PERIODS = {"afternoon", "evening", "tonight", "night", "দুপুর", "বিকাল", "বিকেল", "সন্ধ্যা", "রাত"}
+AM_PERIODS = {"morning", "সকাল"}
+
+
+def _alternation(words):
+    return "|".join(sorted(map(re.escape, words), key=len, reverse=True))
+
+
+# Bengali vowel signs are not \w, so token edges are spelled out: nothing
+# alphanumeric or Bengali (vowel signs included) before a token, no letter
+# or digit of any script after it ("মে" does not match inside "মেঝে"), while
+# vowel-sign case endings like -e ("শুক্রবারে") are still allowed
+_L = r"(?<![\wঀ-৿])"
+_R = r"(?!\w)"
+_MONTH = f"(?P<month>{_alternation(MONTHS)})"
+_ORDINAL = r"(?:st|nd|rd|th)?"
+
+DATE_PATTERNS = [
+    ("relative", re.compile(f"{_L}(?P<word>{_alternation(RELATIVE_DAYS)}){_R}")),
+    ("in_days", re.compile(f"{_L}in\\s+(?P<n>\\d{{1,2}})\\s+days?{_R}")),
+    ("weekday", re.compile(f"{_L}(?:(?:next|this|coming|সামনের)\\s+)?(?P<weekday>{_alternation(WEEKDAYS)}){_R}")),
+    ("iso", re.compile(f"{_L}(?P<year>\\d{{4}})-(?P<m>\\d{{1,2}})-(?P<d>\\d{{1,2}}){_R}")),
+    ("numeric", re.compile(
+        f"{_L}(?P<a>\\d{{1,2}})/(?P<b>\\d{{1,2}})(?:/(?P<year>\\d{{4}}|\\d{{2}}))?{_R}(?!/)"
+        f"|{_L}(?P<a2>\\d{{1,2}})\\.(?P<b2>\\d{{1,2}})\\.(?P<year2>\\d{{4}}){_R}"
+    )),
+    ("month_day", re.compile(
+        f"{_L}{_MONTH}\\.?\\s*(?P<d>\\d{{1,2}}){_ORDINAL}{_R}(?:,?\\s*(?P<year>\\d{{4}}){_R})?"
+    )),
+    ("day_month", re.compile(
+        f"{_L}(?P<d>\\d{{1,2}}){_ORDINAL}\\s*(?:of\\s+)?{_MONTH}\\.?{_R}(?:,?\\s*(?P<year>\\d{{4}}){_R})?"
+    )),
+]
+TIME_PATTERNS = [
+    ("ampm", re.compile(f"{_L}(?P<h>\\d{{1,2}})(?:[:.](?P<m>\\d{{2}}))?\\s*(?P<ampm>[ap])\\.?m\\.?{_R}")),
+    ("clock", re.compile(f"{_L}(?P<h>[01]?\\d|2[0-3]):(?P<m>[0-5]\\d){_R}")),
+    ("word", re.compile(f"{_L}(?P<word>noon|midday|midnight){_R}")),
+    ("bare", re.compile(
+        f"{_L}(?:at|@)\\s*(?P<h>\\d{{1,2}}){_R}(?!\\s*(?:[:/.-]\\d|[ap]\\.?m|o'?clock|টা))"
+        f"|{_L}(?P<h2>\\d{{1,2}})\\s*(?:o'?clock{_R}|টা)"
+    )),
+]
+PERIOD_PATTERN = re.compile(f"{_L}({_alternation(PM_PERIODS | AM_PERIODS)})")
+# Date vocabulary the fast path does not model: leave such messages to dateparser
+_DEFER_WORDS = (
+    r"week|weeks|weekend|fortnight|month|months|year|years|ago|hours?|minutes?|later|after|before|"
+    r"last|yesterday|\d{1,2}(?:st|nd|rd|th)|সপ্তাহ|মাস|বছর|গতকাল"
+)
+DEFER_PATTERN = re.compile(f"{_L}({_DEFER_WORDS}){_R}")
+# Anything dateparser could read as a date; without it there is nothing to parse
+DATE_HINT_PATTERN = re.compile(
+    f"\\d|{_L}(now|noon|midnight|morning|evening|night|days?|{_DEFER_WORDS}|"
+    f"{_alternation(set(MONTHS) | set(WEEKDAYS) | set(RELATIVE_DAYS))})"
+)
+_BENGALI_DIGITS = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+
+
+def normalize_message(message: str):
+    """NFC, lower case, Bengali digits as ASCII"""
+    return unicodedata.normalize("NFC", message).lower().translate(_BENGALI_DIGITS)
+
+
+# -----------------------------
+# Fast path
+# -----------------------------
+def _resolve_date(kind: str, match, now: datetime):
+    """
+    (date, mode) for one date match, or None if invalid. mode is
+    "relative" (keeps the current time), "fixed" or "yearless" (rolls to
+    next year once past).
+    """
+    today = now.date()
+    groups = match.groupdict()
+    if kind == "relative":
+        return today + timedelta(days=RELATIVE_DAYS[groups["word"]]), "relative"
+    if kind == "in_days":
+        return today + timedelta(days=int(groups["n"])), "relative"
+    if kind == "weekday":
+        return today + timedelta(days=(WEEKDAYS[groups["weekday"]] - today.weekday()) % 7 or 7), "fixed"
+
+    if kind == "iso":
+        year, month, day = int(groups["year"]), int(groups["m"]), int(groups["d"])
+    elif kind == "numeric":
+        a, b = int(groups["a"] or groups["a2"]), int(groups["b"] or groups["b2"])
+        year = groups["year"] or groups["year2"]
+        year = int(year) + (2000 if year and len(year) == 2 else 0) if year else None
+        if a > 12 >= b:
+            day, month = a, b
+        elif b > 12 >= a:
+            month, day = a, b
+        elif year and groups["a2"]:
+            day, month = a, b  # 15.12.2026 style is always day first
+        else:
+            return None  # 05/06: month/day order is ambiguous
+    else:
+        year, month, day = groups["year"], MONTHS[groups["month"]], int(groups["d"])
+        year = int(year) if year else None
+    try:
+        if year:
+            return datetime(year, month, day).date(), "fixed"
+        return datetime(today.year, month, day).date(), "yearless"
+    except ValueError:
+        return None
+
+
+def _resolve_time(kind: str, match, period: str):
+    """(hour, minute) for one time match, or None if invalid"""
+    groups = match.groupdict()
+    if kind == "word":
+        return (0, 0) if groups["word"] == "midnight" else (12, 0)
+    if kind == "ampm":
+        hour, minute = int(groups["h"]), int(groups["m"] or 0)
+        if not 1 <= hour <= 12:
+            return None
+        return hour % 12 + (12 if groups["ampm"] == "p" else 0), minute
+    if kind == "clock":
+        return int(groups["h"]), int(groups["m"])
+
+    hour = int(groups["h"] or groups["h2"])
+    if hour > 23:
+        return None
+    if 1 <= hour <= 11:
+        if period in PM_PERIODS:
+            hour += 12
+        elif period not in AM_PERIODS and hour <= 7:
+            hour += 12  # "at 3" means 3 PM in cleaning hours
+    return hour, 0
+
+
+def _unique(values):
+    values = set(v for v in values if v is not None)
+    return values.pop() if len(values) == 1 else (None if not values else False)
+
+
+def fast_extract(message: str, now: datetime = None):
+    """
+    Regex extraction of the common booking phrasings: today / tomorrow /
+    day after tomorrow (and Bengali আজ, কাল, পরশু), weekdays, "in 3 days",
+    "Dec 15", "15th December", 2026-12-15, 15/12, with times like 2 PM,
+    14:30, noon, "at 3" and Bengali "বিকাল ৩টায়". Bengali digits count.
+
+    :return: {"datetime", "has_date", "has_time", "source": "fast"};
+             {"datetime": None, ...} when the message holds no date at all;
+             None when the message is ambiguous or uses phrasing this path
+             does not model (the caller should fall back to dateparser)
+    Conventions follow dateparser's future preference: weekdays and
+    calendar dates without a time are at 00:00, relative days keep the
+    current time, past dates roll to next week/year. Two deliberate
+    differences: a time alone is today if still ahead (dateparser: always
+    tomorrow), and a bare hour 1-7 is read as PM.
+    """
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    text = normalize_message(message)
+
+    dates, times, consumed = [], [], []
+    for kind, pattern in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            if any(match.start() < end and start < match.end() for start, end in consumed):
+                continue
+            consumed.append(match.span())
+            dates.append(_resolve_date(kind, match, now) or False)
+    period = _unique(m.group(1) for m in PERIOD_PATTERN.finditer(text)) or None
+    for kind, pattern in TIME_PATTERNS:
+        for match in pattern.finditer(text):
+            if any(match.start() < end and start < match.end() for start, end in consumed):
+                continue
+            consumed.append(match.span())
+            times.append(_resolve_time(kind, match, period) or False)
+
+    if False in dates or False in times:
+        return None
+    remainder = text
+    for start, end in sorted(consumed, reverse=True):
+        remainder = remainder[:start] + " " + remainder[end:]
+    if DEFER_PATTERN.search(remainder):
+        return None
+    day, clock = _unique(dates), _unique(times)
+    if day is False or clock is False:
+        return None  # two different dates or times
+    if day is None and clock is None:
+        return {"datetime": None, "has_date": False, "has_time": False, "source": "fast"}
+
+    if day is None:
+        # Time alone: the next occurrence
+        when = datetime.combine(now.date(), datetime.min.time()).replace(hour=clock[0], minute=clock[1])
+        if when <= now:
+            when += timedelta(days=1)
+        return {"datetime": when, "has_date": False, "has_time": True, "source": "fast"}
+
+    date, mode = day
+    if clock:
+        when = datetime(date.year, date.month, date.day, clock[0], clock[1])
+    elif mode == "relative":
+        when = datetime.combine(date, now.time())
+    else:
+        when = datetime(date.year, date.month, date.day)
+    if mode == "yearless" and when <= now:
+        try:
+            when = when.replace(year=when.year + 1)
+        except ValueError:
+            return None  # Feb 29
+    return {"datetime": when, "has_date": True, "has_time": bool(clock), "source": "fast"}
+
+
+# -----------------------------
+# dateparser fallback
+# -----------------------------
+@lru_cache(maxsize=8)
+def _dateparser(relative_base: datetime):
+    """One configured DateDataParser per minute of relative base"""
+    from dateparser.date import DateDataParser
+
+    return DateDataParser(languages=["en"], settings=dict(DATEPARSER_SETTINGS, RELATIVE_BASE=relative_base))
+
+
+@lru_cache(maxsize=4096)
+def _dateparser_parse(text: str, relative_base: datetime):
+    return _dateparser(relative_base).get_date_data(text).date_obj
+
+
+def dateparser_extract(message: str, now: datetime = None):
+    """
+    dateparser on the message with booking words removed (one parse,
+    cached per message and minute). Returns a fast_extract-style dict.
+    """
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    text = message.lower()
+    for keyword in FILLER_KEYWORDS:
+        text = text.replace(keyword, "")
+    when = _dateparser_parse(text.strip(), now)
+    return {"datetime": when, "has_date": when is not None, "has_time": None, "source": "dateparser"}
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def extract_date_time(message: str, now: datetime = None):
+    """
+    Date/time in a chat message: the fast path when it can decide,
+    dateparser for everything else that looks date-like.
+    :return: {"datetime": datetime or None, "has_date", "has_time", "source"}
+             (has_time is None when dateparser decided)
+    """
+    result = fast_extract(message, now)
+    if result is not None and (result["datetime"] or not DATE_HINT_PATTERN.search(normalize_message(message))):
+        return result
+    return dateparser_extract(message, now)
+
+
+def extract_datetime(message: str, now: datetime = None):
+    """Datetime in a chat message, or None"""
+    return extract_date_time(message, now)["datetime"]
+
+
+def _extract_chunk(messages: list, now: datetime):
+    return [extract_date_time(message, now) for message in messages]
+
+
+def extract_batch(messages: list, now: datetime = None, workers: int = None, chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    extract_date_time over many messages (offline jobs, e.g. backfills),
+    spread over a process pool once the batch is large enough to pay for it.
+    :param now: reference time shared by the whole batch (defaults to now)
+    :param workers: pool size (defaults to the CPU count; 1 = in-process)
+    :return: one result dict per message, in input order
+    """
+    now = now or datetime.now()
+    if workers == 1 or len(messages) < BATCH_POOL_MIN_SIZE:
+        return _extract_chunk(messages, now)
+
+    chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [result for chunk in pool.map(_extract_chunk, chunks, repeat(now)) for result in chunk]
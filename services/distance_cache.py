@@ -0,0 +1,207 @@
+# services/distance_cache.py
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from services.sqlite_pool import SQLitePool, migrate
+
+DB_PATH = os.getenv("DISTANCE_CACHE_DB_PATH", "route_cache.db")
+POOL_SIZE = int(os.getenv("DISTANCE_CACHE_POOL_SIZE", "4"))
+# Road networks change slowly; a week keeps ORS quota use low
+TTL_SECONDS = float(os.getenv("DISTANCE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Decimal places kept when snapping coordinates (4 ~ 11 m, 3 ~ 110 m)
+PRECISION = int(os.getenv("DISTANCE_CACHE_PRECISION", "4"))
+MEMORY_SIZE = int(os.getenv("DISTANCE_CACHE_MEMORY_SIZE", "10000"))
+
+MIGRATIONS = [
+    # 1: persistent tier
+    """
+    CREATE TABLE IF NOT EXISTS route_distances (
+        cache_key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_route_distances_expiry
+        ON route_distances (expires_at);
+    """,
+]
+
+
+def route_key(profile: str, origin_lat, origin_lon, dest_lat, dest_lon, precision: int = PRECISION):
+    """
+    Cache key for one origin/destination pair, with coordinates snapped
+    to `precision` decimal places so nearby lookups share an entry.
+    """
+    coords = (round(float(c), precision) + 0.0 for c in (origin_lat, origin_lon, dest_lat, dest_lon))
+    return profile + ":" + ",".join(f"{c:.{precision}f}" for c in coords)
+
+
+class DistanceCache:
+    """
+    Two-tier cache of route results.
+    - memory: bounded LRU, checked first
+    - SQLite: survives restarts, entries expire after `ttl` seconds
+    A disk hit is promoted into memory. Disk errors are logged and treated
+    as misses so routing keeps working without the cache.
+    """
+
+    def __init__(self, path: str = DB_PATH, ttl: float = TTL_SECONDS, memory_size: int = MEMORY_SIZE):
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._pool = SQLitePool(path, size=POOL_SIZE)
+        self._schema_ready = False
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+            "writes": 0,
+            "disk_errors": 0
+        }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _connection(self):
+        if not self._schema_ready:
+            with self._pool.connection() as conn:
+                migrate(conn, MIGRATIONS)
+            self._schema_ready = True
+        return self._pool.connection()
+
+    def _remember(self, key: str, expires_at: float, value: dict):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM route_distances WHERE cache_key=? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+        except Exception as e:
+            print(f"❌ Distance cache read failed: {e}")
+            self._count("disk_errors")
+            row = None
+
+        if row is None:
+            self._count("misses")
+            return None
+        value = json.loads(row[0])
+        self._remember(key, row[1], value)
+        self._count("disk_hits")
+        return value
+
+    def get_many(self, keys: list):
+        """
+        {key: value} for every cached key; one SQLite query for the
+        keys that are not in memory.
+        """
+        now = time.time()
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    found[key] = entry[1]
+                else:
+                    if entry is not None:
+                        del self._memory[key]
+                        self._stats["expired"] += 1
+                    missing.append(key)
+
+        if missing:
+            rows = []
+            try:
+                with self._connection() as conn:
+                    rows = conn.execute(
+                        f"SELECT cache_key, value, expires_at FROM route_distances "
+                        f"WHERE cache_key IN ({','.join('?' * len(missing))}) AND expires_at > ?",
+                        (*missing, now)
+                    ).fetchall()
+            except Exception as e:
+                print(f"❌ Distance cache read failed: {e}")
+                self._count("disk_errors")
+            for key, value, expires_at in rows:
+                value = json.loads(value)
+                self._remember(key, expires_at, value)
+                found[key] = value
+            self._count("disk_hits", len(rows))
+            self._count("misses", len(missing) - len(rows))
+        return found
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def put_many(self, items: dict):
+        """
+        Store {key: value} in both tiers.
+        """
+        if not items:
+            return
+        expires_at = time.time() + self.ttl
+        for key, value in items.items():
+            self._remember(key, expires_at, value)
+        try:
+            with self._connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO route_distances (cache_key, value, expires_at) VALUES (?, ?, ?)",
+                    [(key, json.dumps(value), expires_at) for key, value in items.items()]
+                )
+        except Exception as e:
+            print(f"❌ Distance cache write failed: {e}")
+            self._count("disk_errors")
+        self._count("writes", len(items))
+
+    def put(self, key: str, value: dict):
+        self.put_many({key: value})
+
+    def purge_expired(self):
+        """
+        Drop expired rows from the SQLite tier. Returns the number removed.
+        """
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM route_distances WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self._connection() as conn:
+            conn.execute("DELETE FROM route_distances")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else None
+        return stats
+
+
+distance_cache = DistanceCache()
@@ -0,0 +1,54 @@
+# services/executors.py
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# -----------------------------
+# Per-upstream concurrency limits
+# -----------------------------
+DB_WORKERS = int(os.getenv("DB_WORKERS", "8"))
+CALENDAR_WORKERS = int(os.getenv("CALENDAR_WORKERS", "8"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "64"))
+
+# Blocking work runs on bounded pools so a slow upstream can only tie up
+# its own threads, never the event loop or another upstream's capacity
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+CALENDAR_EXECUTOR = ThreadPoolExecutor(max_workers=CALENDAR_WORKERS, thread_name_prefix="calendar")
+
+_llm_semaphore = None
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Run a blocking SQLite call on the bounded DB pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, partial(fn, *args, **kwargs))
+
+
+async def run_calendar(fn, *args, **kwargs):
+    """
+    Run a blocking Google Calendar call on the bounded calendar pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(CALENDAR_EXECUTOR, partial(fn, *args, **kwargs))
+
+
+def llm_slot():
+    """
+    Semaphore capping in-flight LLM requests per worker.
+    Usage: `async with llm_slot(): ...`
+    """
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    return _llm_semaphore
+
+
+def shutdown_executors():
+    """
+    Wait for queued blocking work to finish (called on app shutdown).
+    """
+    DB_EXECUTOR.shutdown(wait=True)
+    CALENDAR_EXECUTOR.shutdown(wait=True)
@@ -0,0 +1,222 @@
+# services/intent_router.py
+import math
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from services.service_catalog import SERVICES
+from services.date_extraction import fast_extract
+
+# Answer deterministic turns locally instead of asking the model
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+# Minimum classifier confidence for a local answer; below it the model decides
+INTENT_CONFIDENCE = float(os.getenv("INTENT_CONFIDENCE", "0.8"))
+# Longer messages usually carry more than one intent
+MAX_LOCAL_WORDS = 8
+# Dates further ahead than this are more likely misparses than bookings
+MAX_BOOKING_DAYS_AHEAD = 180
+
+# Lookarounds instead of \b: Bengali vowel signs are not \w, so \b fails next to them.
+# "করুন" ("do") alone is not a yes: "বাতিল করুন" means "please cancel"
+CONFIRM_PATTERN = re.compile(r'(?<!\w)(yes|yeah|sure|ok|confirm|yep|correct|right|হ্যাঁ|ঠিক|নিশ্চিত)(?!\w)')
+REJECT_PATTERN = re.compile(r'(?<!\w)(no|nope|cancel|না|বাতিল)(?!\w)')
+
+_BENGALI_DIGITS = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+_SERVICE_NUMBER = re.compile(r"^(?:(?:service|option|number|no\.?)\s*)?#?\s*(\d)\s*[.)]?$")
+# "option 2" inside a longer message (e.g. together with a date)
+_SERVICE_OPTION = re.compile(r"\b(?:service|option|number)\s*#?\s*\d\b")
+_QUESTION = re.compile(
+    r"\?|(?<!\w)(what|how|which|why|when|where|does|do|is|are|can|price|cost|much|include|includes|কত|কি|কী)(?!\w)"
+)
+# "not the office one", "I don't want deep cleaning": naming a service is not choosing it
+_NEGATION = re.compile(r"\b(not|no|never|nor|without|instead\s+of|dont|doesnt|isnt)\b|n't\b|(?<!\w)(না|নয়)(?!\w)")
+# Words that name a service -> service id
+SERVICE_ALIASES = {
+    "standard": "1", "basic": "1", "regular": "1",
+    "deep": "2",
+    "move": "3", "moving": "3", "movein": "3", "moveout": "3",
+    "construction": "4", "renovation": "4",
+    "office": "5",
+}
+
+# Seed phrases for the on-box classifier (greeting / service inquiry vs anything else)
+TRAINING_PHRASES = {
+    "greeting": [
+        "hi", "hello", "hey", "hi there", "hello there", "hey there", "good morning", "good afternoon",
+        "good evening", "assalamualaikum", "assalamu alaikum", "salam", "hola", "yo", "greetings",
+        "hello good morning", "hi good evening", "হ্যালো", "হাই", "আসসালামু আলাইকুম", "সালাম",
+    ],
+    "service_inquiry": [
+        "what services do you offer", "what services do you have", "show me your services",
+        "which services are available", "list your services", "show services", "services",
+        "what cleaning services", "what can you do", "what do you offer", "i want to book a cleaning",
+        "i need a cleaning", "i need a cleaner", "book a cleaning", "i want to book", "book cleaning",
+        "can i book a cleaning", "i want cleaning service", "show me the menu", "options",
+        "কি সার্ভিস আছে", "সার্ভিস", "ক্লিনিং বুক করতে চাই",
+    ],
+    "other": [
+        "how much does it cost", "what is the price", "do you bring your own supplies", "can i reschedule",
+        "cancel my booking", "my cleaner was late", "i have a complaint", "do you clean carpets",
+        "how long does it take", "where are you located", "are you open on friday", "can you clean windows",
+        "thanks", "thank you", "is it safe", "who will come", "do you work on weekends",
+        "can i pay by card", "what time do you start", "change my address", "talk to a human",
+        "i booked yesterday", "is the cleaner trained", "do you have discounts",
+        "i don't want deep cleaning", "not the office one", "no deep cleaning", "without moving",
+        "standard instead of deep",
+    ],
+}
+
+
+def _words(text: str):
+    return _WORD.findall(text.lower().translate(_BENGALI_DIGITS))
+
+
+class NaiveBayesIntentClassifier:
+    """
+    Multinomial naive Bayes over words, trained in-process on TRAINING_PHRASES.
+    A message that is exactly a seed phrase (punctuation aside) gets its
+    label outright. Otherwise confidence is the posterior scaled by the
+    share of the message's words the winning intent has seen, so
+    unfamiliar text never scores high.
+    """
+
+    def __init__(self, phrases: dict = TRAINING_PHRASES):
+        self.labels = list(phrases)
+        self.exact = {tuple(_words(p)): label for label, examples in phrases.items() for p in examples}
+        self.word_counts = {
+            label: Counter(w for p in examples for w in _words(p)) for label, examples in phrases.items()
+        }
+        self.totals = {label: sum(counts.values()) for label, counts in self.word_counts.items()}
+        self.vocabulary = set().union(*self.word_counts.values())
+        examples = sum(len(p) for p in phrases.values())
+        self.log_priors = {label: math.log(len(p) / examples) for label, p in phrases.items()}
+
+    def predict(self, text: str):
+        """(label, confidence) for `text`"""
+        words = _words(text)
+        if not words:
+            return "other", 0.0
+        if tuple(words) in self.exact:
+            return self.exact[tuple(words)], 1.0
+        vocabulary_size = len(self.vocabulary)
+        scores = {}
+        for label in self.labels:
+            counts, total = self.word_counts[label], self.totals[label]
+            scores[label] = self.log_priors[label] + sum(
+                math.log((counts[w] + 1) / (total + vocabulary_size)) for w in words
+            )
+        best = max(scores, key=scores.get)
+        posterior = 1 / sum(math.exp(score - scores[best]) for score in scores.values())
+        known = sum(1 for w in words if self.word_counts[best][w]) / len(words)
+        return best, posterior * known
+
+
+class IntentRouter:
+    """
+    Decides the booking chat turns that need no model call:
+    greetings and service inquiries (classifier), service selection by
+    number or name, explicit date + clock time once a service is chosen
+    (the date extractor's fast path, never dateparser). Messages with a
+    negation ("not", "don't", "without", "instead of") always go to the model.
+    route() returns a result shaped like the model's JSON answer with
+    "response" left empty (the booking flow writes it), or None to ask
+    the model. Counters record who served each turn.
+    """
+
+    def __init__(self, enabled: bool = INTENT_ROUTER_ENABLED, min_confidence: float = INTENT_CONFIDENCE):
+        self.enabled = enabled
+        self.min_confidence = min_confidence
+        self.classifier = NaiveBayesIntentClassifier()
+        self._lock = threading.Lock()
+        self._local = Counter()
+        self._model_turns = 0
+
+    # -----------------------------
+    # Routing
+    # -----------------------------
+    def route(self, message: str, selected_service: dict = None, now: datetime = None):
+        if not self.enabled:
+            return None
+        text = message.strip().lower().translate(_BENGALI_DIGITS)
+        words = _words(text)
+        if not words or len(words) > MAX_LOCAL_WORDS:
+            return None
+
+        number = _SERVICE_NUMBER.match(text)
+        if number:
+            if number.group(1) in SERVICES:
+                return self._result("service_selection", selected_service_id=number.group(1))
+            return None
+
+        if _NEGATION.search(text):
+            return None  # the model reads what is being ruled out
+
+        service_ids = {SERVICE_ALIASES[w] for w in words if w in SERVICE_ALIASES}
+        now = now or datetime.now()
+        match = fast_extract(message, now)
+        if service_ids or _SERVICE_OPTION.search(text):
+            if match is None or match["datetime"]:
+                return None  # a service change and a time together: the model handles both
+        if selected_service and match and match["has_date"] and match["has_time"]:
+            if now < match["datetime"] <= now + timedelta(days=MAX_BOOKING_DAYS_AHEAD):
+                return self._result("datetime_provided", datetime=match["datetime"].strftime("%Y-%m-%d %H:%M"))
+        if match is None or match["datetime"]:
+            return None  # a date or time the rules cannot act on
+
+        if len(service_ids) == 1 and not _QUESTION.search(text):
+            return self._result("service_selection", selected_service_id=service_ids.pop())
+
+        label, confidence = self.classifier.predict(text)
+        if label != "other" and confidence >= self.min_confidence:
+            return self._result(label, confidence=round(confidence, 3))
+        return None
+
+    @staticmethod
+    def _result(intent: str, selected_service_id: str = None, datetime: str = None, confidence: float = 1.0):
+        return {
+            "intent": intent,
+            "selected_service_id": selected_service_id,
+            "datetime": datetime,
+            "response": None,
+            "confidence": confidence
+        }
+
+    # -----------------------------
+    # Counters
+    # -----------------------------
+    def record_local(self, intent: str):
+        with self._lock:
+            self._local[intent] += 1
+
+    def record_model(self):
+        with self._lock:
+            self._model_turns += 1
+
+    def stats(self):
+        with self._lock:
+            local, model_turns = dict(self._local), self._model_turns
+        served_locally = sum(local.values())
+        turns = served_locally + model_turns
+        return {
+            "enabled": self.enabled,
+            "turns": turns,
+            "local_turns": served_locally,
+            "model_turns": model_turns,
+            "local_share": round(served_locally / turns, 4) if turns else None,
+            "local_by_intent": local
+        }
+
+
+def confirmation_intent(message: str):
+    """"confirm", "reject" or None for a reply to a pending appointment"""
+    text = message.lower()
+    if CONFIRM_PATTERN.search(text):
+        return "confirm"
+    if REJECT_PATTERN.search(text):
+        return "reject"
+    return None
+
+
+intent_router = IntentRouter()
@@ -0,0 +1,269 @@
+# services/llm_cache.py
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import zstandard
+from services.sqlite_pool import SQLitePool, migrate
+
+DB_PATH = os.getenv("LLM_CACHE_DB_PATH", "llm_cache.db")
+POOL_SIZE = int(os.getenv("LLM_CACHE_POOL_SIZE", "4"))
+MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "2000"))
+COMPRESSION_LEVEL = 3
+
+# How long an answer stays fresh in the cache, per call site
+CALL_SITE_TTLS = {
+    "ai_chat": 3600,
+    "cohere_chatbot": 6 * 3600,
+    "chatbot_response": 24 * 3600,
+    "suggest_price": 6 * 3600,
+    "predict_next_schedule": 24 * 3600,
+}
+# Caching is opt-in per call site. By default only sites whose prompt alone
+# determines a shareable answer (FAQ-style questions, date forecasts); chat
+# with a user's history and price suggestions stay uncached unless listed
+# in LLM_CACHE_SITES (comma-separated, empty to disable caching everywhere).
+DEFAULT_SITES = ("chatbot_response", "predict_next_schedule")
+ENABLED_SITES = set(
+    s.strip() for s in os.getenv("LLM_CACHE_SITES", ",".join(DEFAULT_SITES)).split(",") if s.strip()
+)
+
+MIGRATIONS = [
+    # 1: persistent tier (values are zstd-compressed JSON)
+    """
+    CREATE TABLE IF NOT EXISTS llm_responses (
+        cache_key TEXT PRIMARY KEY,
+        site TEXT NOT NULL,
+        value BLOB NOT NULL,
+        latency_ms REAL NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_llm_responses_expiry
+        ON llm_responses (expires_at);
+    """,
+]
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n.?!,;:"
+
+
+def normalize_prompt(text: str):
+    """
+    Fold away differences that do not change the question:
+    Unicode form, case, runs of whitespace, trailing punctuation.
+    "What does  Deep Cleaning include?" == "what does deep cleaning include"
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _WHITESPACE.sub(" ", text).strip(_EDGE_PUNCTUATION)
+
+
+def cache_key(model: str, params: dict, messages: list, normalize: bool = True):
+    """
+    Key for one model call.
+    :param messages: list of (role, content) pairs, or a single prompt string
+    """
+    if isinstance(messages, str):
+        messages = [("user", messages)]
+    payload = {
+        "model": model,
+        "params": params or {},
+        "messages": [[role, normalize_prompt(content) if normalize else content] for role, content in messages]
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    Response cache for model calls.
+    - memory: bounded LRU
+    - SQLite: zstd-compressed values, survives restarts
+    Each entry keeps the latency of the call that produced it, so hits
+    can report how much model time they saved. Only successful calls are
+    stored: if `compute` raises, the error propagates and nothing is cached.
+    """
+
+    def __init__(self, path: str = DB_PATH, memory_size: int = MEMORY_SIZE, sites: set = None):
+        self.memory_size = memory_size
+        self.sites = ENABLED_SITES if sites is None else sites
+        self._memory = OrderedDict()  # key -> (expires_at, value, latency_ms)
+        self._lock = threading.Lock()
+        self._pool = SQLitePool(path, size=POOL_SIZE)
+        self._schema_ready = False
+        self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._site_stats = {}
+        self._evictions = 0
+        self._disk_errors = 0
+
+    def enabled(self, site: str):
+        return site in self.sites
+
+    def _connection(self):
+        if not self._schema_ready:
+            with self._pool.connection() as conn:
+                migrate(conn, MIGRATIONS)
+            self._schema_ready = True
+        return self._pool.connection()
+
+    def _count(self, site: str, name: str, amount: float = 1):
+        with self._lock:
+            stats = self._site_stats.setdefault(site, {
+                "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "saved_ms": 0.0
+            })
+            stats[name] += amount
+
+    def _remember(self, key: str, expires_at: float, value, latency_ms: float):
+        with self._lock:
+            self._memory[key] = (expires_at, value, latency_ms)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+                self._evictions += 1
+
+    # -----------------------------
+    # Lookups and writes
+    # -----------------------------
+    def get_memory(self, site: str, key: str):
+        """(hit, value) from the in-process tier only."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= now:
+                del self._memory[key]
+                return False, None
+            self._memory.move_to_end(key)
+        self._count(site, "memory_hits")
+        self._count(site, "saved_ms", entry[2])
+        return True, entry[1]
+
+    def get_disk(self, site: str, key: str):
+        """(hit, value) from SQLite; a hit is promoted into memory."""
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT value, latency_ms, expires_at FROM llm_responses WHERE cache_key=? AND expires_at > ?",
+                    (key, time.time())
+                ).fetchone()
+        except Exception as e:
+            print(f"❌ LLM cache read failed: {e}")
+            with self._lock:
+                self._disk_errors += 1
+            row = None
+        if row is None:
+            self._count(site, "misses")
+            return False, None
+        value = json.loads(self._decompressor.decompress(row[0]))
+        self._remember(key, row[2], value, row[1])
+        self._count(site, "disk_hits")
+        self._count(site, "saved_ms", row[1])
+        return True, value
+
+    def put(self, site: str, key: str, value, latency_ms: float, ttl: float = None):
+        expires_at = time.time() + (ttl if ttl is not None else CALL_SITE_TTLS.get(site, 3600))
+        self._remember(key, expires_at, value, latency_ms)
+        try:
+            blob = self._compressor.compress(json.dumps(value, ensure_ascii=False).encode())
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (cache_key, site, value, latency_ms, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, site, blob, latency_ms, expires_at)
+                )
+        except Exception as e:
+            print(f"❌ LLM cache write failed: {e}")
+            with self._lock:
+                self._disk_errors += 1
+        self._count(site, "stores")
+
+    # -----------------------------
+    # Call-site helpers
+    # -----------------------------
+    def get_or_compute(self, site: str, model: str, params: dict, messages, compute, ttl: float = None):
+        """
+        Cached result of `compute()` for this model call, if `site` opted in.
+        """
+        if not self.enabled(site):
+            return compute()
+        key = cache_key(model, params, messages)
+        hit, value = self.get_memory(site, key)
+        if not hit:
+            hit, value = self.get_disk(site, key)
+        if hit:
+            return value
+        start = time.perf_counter()
+        value = compute()
+        self.put(site, key, value, (time.perf_counter() - start) * 1000, ttl)
+        return value
+
+    async def alookup(self, site: str, model: str, params: dict, messages):
+        """
+        (hit, value, key) for an async call site; `key` is None when the
+        site has not opted in. Pair with `astore` when the call streams.
+        """
+        if not self.enabled(site):
+            return False, None, None
+        from services.executors import run_db
+
+        key = cache_key(model, params, messages)
+        hit, value = self.get_memory(site, key)
+        if not hit:
+            hit, value = await run_db(self.get_disk, site, key)
+        return hit, value, key
+
+    async def astore(self, site: str, key: str, value, latency_ms: float, ttl: float = None):
+        if key is None:
+            return
+        from services.executors import run_db
+
+        await run_db(self.put, site, key, value, latency_ms, ttl)
+
+    async def aget_or_compute(self, site: str, model: str, params: dict, messages, compute, ttl: float = None):
+        """
+        Async variant: `compute` is a coroutine function; SQLite work runs
+        on the DB executor.
+        """
+        hit, value, key = await self.alookup(site, model, params, messages)
+        if hit:
+            return value
+        start = time.perf_counter()
+        value = await compute()
+        await self.astore(site, key, value, (time.perf_counter() - start) * 1000, ttl)
+        return value
+
+    # -----------------------------
+    # Maintenance and metrics
+    # -----------------------------
+    def purge_expired(self):
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self._connection() as conn:
+            conn.execute("DELETE FROM llm_responses")
+
+    def stats(self):
+        with self._lock:
+            sites = {site: dict(stats) for site, stats in self._site_stats.items()}
+            memory_entries, evictions, disk_errors = len(self._memory), self._evictions, self._disk_errors
+        for stats in sites.values():
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else None
+            stats["saved_ms"] = round(stats["saved_ms"], 1)
+        return {
+            "enabled_sites": sorted(self.sites),
+            "memory_entries": memory_entries,
+            "evictions": evictions,
+            "disk_errors": disk_errors,
+            "sites": sites
+        }
+
+
+llm_cache = LLMCache()
@@ -0,0 +1,259 @@
+# services/message_writer.py
+import os
+import threading
+import time
+from collections import Counter, deque
+from services.conversation_store import shard_connection, shard_for
+
+# How long the writer may hold a batch open for more messages
+FLUSH_INTERVAL_MS = float(os.getenv("MESSAGE_FLUSH_INTERVAL_MS", "5"))
+# Upper bound of messages per group commit
+MAX_BATCH_SIZE = int(os.getenv("MESSAGE_BATCH_SIZE", "500"))
+# How long a caller waits for its messages to be committed before giving up
+WAIT_TIMEOUT = float(os.getenv("MESSAGE_WAIT_TIMEOUT", "10"))
+
+# An explicit session id wins; otherwise the user's current session at commit time
+_INSERT = """
+    INSERT INTO conversations (user_email, message, session_id)
+    VALUES (?, ?, COALESCE(?, (SELECT session_id FROM booking_sessions WHERE user_email=?), 0))
+    RETURNING id, message, timestamp
+"""
+
+
+def _insert(conn, rows):
+    """Insert one save call's rows; returns them as stored (ids for the history delta)"""
+    saved = []
+    for row in rows:
+        row_id, message, timestamp = conn.execute(_INSERT, row).fetchone()
+        saved.append({"id": row_id, "message": message, "timestamp": timestamp})
+    return saved
+
+
+class PendingWrite:
+    """
+    Messages of one save call; done once their group commit finished.
+    `saved` then holds the stored rows ({"id", "message", "timestamp"}).
+    """
+
+    def __init__(self, user_email: str, messages: list, session_id: int = None):
+        self.user_email = user_email
+        self.rows = [(user_email, message, session_id, user_email) for message in messages]
+        self.saved = None
+        self.error = None
+        self._done = threading.Event()
+
+    def wait(self, timeout: float = WAIT_TIMEOUT):
+        """Block until committed and return the stored rows; re-raises the write's error"""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Message write for {self.user_email} not committed after {timeout}s")
+        if self.error:
+            raise self.error
+        return self.saved
+
+
+class MessageWriter:
+    """
+    Background thread that writes conversation messages in group commits.
+    Messages queued by concurrent requests go out together, one transaction
+    per shard and batch, after at most FLUSH_INTERVAL_MS (or once MAX_BATCH_SIZE are
+    waiting). The messages of one save call always share a transaction.
+
+    Read-your-writes: readers call wait_for(user_email), which flushes
+    right away and returns once that user's queued messages are committed.
+    Other users' messages may still be in flight. Other worker processes
+    see a message once its batch commits.
+    """
+
+    def __init__(self, flush_interval_ms: float = FLUSH_INTERVAL_MS, max_batch: int = MAX_BATCH_SIZE):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self._queue = deque()
+        self._pending = Counter()  # user_email -> queued save calls
+        self._urgent = False
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = Counter()
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+    def submit(self, user_email: str, messages: list, session_id: int = None):
+        """
+        Queue messages for the next group commit without waiting.
+        The writer thread starts on first use.
+        :return: PendingWrite (call .wait() for durability)
+        """
+        write = PendingWrite(user_email, messages, session_id)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Message writer is stopped")
+            self._ensure_running()
+            self._queue.append(write)
+            self._pending[user_email] += 1
+            self._cond.notify_all()
+        return write
+
+    def write(self, user_email: str, messages: list, session_id: int = None, timeout: float = WAIT_TIMEOUT):
+        """
+        Queue messages and wait until their group commit finished.
+        :return: the stored rows, with their ids
+        """
+        write = self.submit(user_email, messages, session_id)
+        with self._cond:
+            self._urgent = True
+            self._cond.notify_all()
+        return write.wait(timeout)
+
+    # -----------------------------
+    # Consistency barriers
+    # -----------------------------
+    def wait_for(self, user_email: str, timeout: float = WAIT_TIMEOUT):
+        """
+        Return once every message queued for `user_email` is committed.
+        Cheap when nothing is queued for the user (the common case).
+        Raises TimeoutError if that takes longer than `timeout` seconds.
+        """
+        with self._cond:
+            if not self._pending[user_email]:
+                return
+            self._ensure_running()
+            self._urgent = True
+            self._cond.notify_all()
+            if not self._cond.wait_for(lambda: not self._pending[user_email], timeout):
+                raise TimeoutError(f"Queued messages for {user_email} not committed after {timeout}s")
+
+    def flush(self, timeout: float = WAIT_TIMEOUT):
+        """
+        Return once everything queued so far is committed.
+        Raises TimeoutError if that takes longer than `timeout` seconds.
+        """
+        with self._cond:
+            if not self._queue and not self._pending:
+                return
+            self._ensure_running()
+            self._urgent = True
+            self._cond.notify_all()
+            if not self._cond.wait_for(lambda: not self._queue and not self._pending, timeout):
+                raise TimeoutError(f"Queued messages not committed after {timeout}s")
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="message-writer", daemon=True)
+        self._thread.start()
+
+    def _ensure_running(self):
+        # Caller holds the lock; waiting on a dead writer would never return
+        if self._thread and self._thread.is_alive():
+            return
+        if self._stopping:
+            raise RuntimeError("Message writer is stopped")
+        if self._thread:
+            print("❌ Message writer thread died, restarting it")
+        self._start()
+
+    def start(self):
+        with self._cond:
+            self._stopping = False
+            if not (self._thread and self._thread.is_alive()):
+                self._start()
+
+    def stop(self, timeout: float = 10):
+        """Commit what is queued, then stop the thread (called on shutdown)"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _next_batch(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or self._stopping)
+            if not self._queue:
+                return None
+            # Hold the batch open briefly so concurrent requests share the commit
+            deadline = time.monotonic() + self.flush_interval
+            while (not self._urgent and not self._stopping
+                   and sum(len(w.rows) for w in self._queue) < self.max_batch):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self._urgent = False
+            batch, size = [], 0
+            while self._queue and (not batch or size + len(self._queue[0].rows) <= self.max_batch):
+                write = self._queue.popleft()
+                batch.append(write)
+                size += len(write.rows)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._commit(batch)
+            with self._cond:
+                for write in batch:
+                    self._pending[write.user_email] -= 1
+                    if not self._pending[write.user_email]:
+                        del self._pending[write.user_email]
+                self._cond.notify_all()
+            for write in batch:
+                write._done.set()
+
+    def _commit(self, batch):
+        by_shard = {}
+        for write in batch:
+            by_shard.setdefault(shard_for(write.user_email), []).append(write)
+        for shard, writes in by_shard.items():
+            self._commit_shard(shard, writes)
+
+    def _commit_shard(self, shard: int, batch: list):
+        try:
+            with shard_connection(shard) as conn:
+                saved = [_insert(conn, write.rows) for write in batch]
+            for write, rows in zip(batch, saved):
+                write.saved = rows
+            self._record(batch)
+            return
+        except Exception as e:
+            print(f"❌ Group commit of {len(batch)} message writes failed, retrying one by one: {e}")
+        # One bad write must not fail the others in its batch
+        for write in batch:
+            try:
+                with shard_connection(shard) as conn:
+                    rows = _insert(conn, write.rows)
+                write.saved = rows
+                self._record([write])
+            except Exception as e:
+                write.error = e
+                with self._cond:
+                    self._stats["failed_writes"] += 1
+                print(f"❌ Saving messages for {write.user_email} failed: {e}")
+
+    def _record(self, batch):
+        with self._cond:
+            self._stats["commits"] += 1
+            self._stats["messages"] += sum(len(write.rows) for write in batch)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+
+    def stats(self):
+        with self._cond:
+            queued = sum(len(w.rows) for w in self._queue)
+            stats = dict(self._stats)
+        commits = stats.get("commits", 0)
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "queued_messages": queued,
+            "commits": commits,
+            "messages": stats.get("messages", 0),
+            "messages_per_commit": round(stats.get("messages", 0) / commits, 2) if commits else None,
+            "max_writes_per_commit": stats.get("max_batch", 0),
+            "failed_writes": stats.get("failed_writes", 0)
+        }
+
+
+message_writer = MessageWriter()
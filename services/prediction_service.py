@@ -1,71 +1,104 @@
 # services/prediction_service.py
 import os
 from dotenv import load_dotenv
-from huggingface_hub import InferenceClient
+from services.pricing_engine import pricing_engine
+from services.schedule_forecaster import forecast_next_schedule
+from services.llm_cache import llm_cache, cache_key
+from services.single_flight import SingleFlight
 
 # Load API keys from .env
 load_dotenv()
 HF_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+# Price with the text-generation model instead of the rules table
+PRICING_USE_LLM = os.getenv("PRICING_USE_LLM", "false").lower() == "true"
+# Forecast with the text-generation model instead of the local forecaster
+SCHEDULE_USE_LLM = os.getenv("SCHEDULE_USE_LLM", "false").lower() == "true"
 
-# Initialize Hugging Face Inference Client
-client = InferenceClient(token=HF_API_KEY)
+# Hugging Face Inference Client, created on first use (see get_client)
+client = None
+HF_MODEL = "google/flan-t5-base"  # Upgraded model
+# Identical prompts in flight at the same time share one Hugging Face request
+hf_flight = SingleFlight("huggingface")
 
 
-def predict_next_schedule(dates: str):
+def get_client():
+    """The shared InferenceClient; huggingface_hub is imported on first call."""
+    global client
+    if client is None:
+        from huggingface_hub import InferenceClient
+
+        client = InferenceClient(token=HF_API_KEY)
+    return client
+
+
+def _generate(site: str, prompt: str, max_new_tokens: int):
+    """
+    Text generation through the response cache; errors are raised, not cached.
+    Concurrent identical prompts (e.g. the same /price/ query from many
+    clients) wait for one request instead of each calling the model.
+    """
+    params = {"max_new_tokens": max_new_tokens}
+    return hf_flight.do((site, cache_key(HF_MODEL, params, prompt)), lambda: llm_cache.get_or_compute(
+        site, HF_MODEL, params, prompt,
+        lambda: get_client().text_generation(model=HF_MODEL, prompt=prompt, max_new_tokens=max_new_tokens)
+    ))
+
+
+def predict_next_schedule(dates: str, use_llm: bool = None):
     """
     Predicts the next cleaning schedule based on given dates.
     :param dates: Comma-separated string of dates (YYYY-MM-DD)
-    :return: Predicted next schedule text
+    :param use_llm: ask the text-generation model instead of the local
+                    forecaster (defaults to SCHEDULE_USE_LLM)
+    :return: Predicted next date with confidence and the interval used
     """
+    forecast = forecast_next_schedule(dates)
+    if not (SCHEDULE_USE_LLM if use_llm is None else use_llm):
+        return forecast
+
     prompt = f"Given these cleaning dates: {dates}, suggest the next optimal cleaning date in YYYY-MM-DD format."
     
     try:
-        response = client.text_generation(
-            model="google/flan-t5-base",  # Upgraded model
-            prompt=prompt,
-            max_new_tokens=30
-        )
-        return {"predicted_next_schedule": response.strip()}
+        response = _generate("predict_next_schedule", prompt, max_new_tokens=30)
+        return dict(forecast, predicted_next_schedule=response.strip(), source="llm")
     except Exception as e:
-        # Fallback: simple date prediction
-        import datetime
-        date_list = [datetime.datetime.strptime(d.strip(), "%Y-%m-%d") for d in dates.split(",")]
-        if len(date_list) >= 2:
-            interval = (date_list[-1] - date_list[-2]).days
-            next_date = date_list[-1] + datetime.timedelta(days=interval)
-            return {"predicted_next_schedule": next_date.strftime("%Y-%m-%d")}
-        return {"predicted_next_schedule": f"Error: {str(e)}"}
+        # Fallback: local forecast
+        return forecast
 
 
-def suggest_price(area: str, frequency: int, rating: float):
+def suggest_price(area: str, frequency: int, rating: float, service_id: str = "1",
+                  urgency: str = "standard", use_llm: bool = None):
     """
     Suggest a cleaning price based on area, frequency, and rating.
     :param area: Name of the area (e.g., Dhanmondi)
     :param frequency: Cleaning frequency per month
     :param rating: Customer rating (1-5)
-    :return: Suggested price text
+    :param service_id: key of SERVICES
+    :param urgency: standard, next_day or same_day
+    :param use_llm: ask the text-generation model instead of the pricing
+                    engine (defaults to PRICING_USE_LLM)
+    :return: Suggested price text plus the structured quote
     """
+    try:
+        quote = pricing_engine.quote(area, frequency, rating, service_id=service_id, urgency=urgency)
+    except ValueError as e:
+        return {"error": str(e)}
+    local = {"recommended_price": f"{quote['currency']} {quote['price']} {quote['unit']}", "quote": quote}
+
+    if not (PRICING_USE_LLM if use_llm is None else use_llm):
+        return local
+
     prompt = (
         f"What is a fair price in BDT for cleaning service in {area} area, "
         f"{frequency} times per month, customer rating {rating}/5? Answer with just the price."
     )
     
     try:
-        response = client.text_generation(
-            model="google/flan-t5-base",  # Upgraded model
-            prompt=prompt,
-            max_new_tokens=30
-        )
-        return {"recommended_price": response.strip()}
+        response = _generate("suggest_price", prompt, max_new_tokens=30)
+        return {"recommended_price": response.strip(), "quote": quote}
     except Exception as e:
-        # Fallback: simple pricing logic
-        base_price = 1500  # Base price in BDT
-        area_multiplier = 1.2 if area.lower() in ["gulshan", "banani", "dhanmondi"] else 1.0
-        frequency_discount = 0.9 if frequency >= 4 else 1.0
-        rating_bonus = 1 + (rating - 3) * 0.1  # ±10% per rating point from 3.0
-        
-        price = base_price * area_multiplier * frequency_discount * rating_bonus
-        return {"recommended_price": f"BDT {int(price)} per session"}
+        # Fallback: rules-based quote
+        return local
 
 
 def chatbot_response(query: str):
@@ -77,11 +110,7 @@ def chatbot_response(query: str):
     prompt = f"Answer the following question as a helpful assistant: {query}"
     
     try:
-        response = client.text_generation(
-            model="google/flan-t5-base",  # Upgraded model
-            prompt=prompt,
-            max_new_tokens=100
-        )
+        response = _generate("chatbot_response", prompt, max_new_tokens=100)
         return {"response": response.strip()}
     except Exception as e:
         return {"response": f"Error: {str(e)}"}
\ No newline at end of file
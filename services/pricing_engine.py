@@ -0,0 +1,191 @@
+# services/pricing_engine.py
+import bisect
+import json
+import math
+import os
+import numpy as np
+from services.service_catalog import SERVICES
+
+# Optional JSON file overriding any of the default rules below
+PRICING_RULES_FILE = os.getenv("PRICING_RULES_FILE")
+
+# -----------------------------
+# Default rules table
+# -----------------------------
+# price = base_price x area x service x duration x frequency x rating x urgency
+# (rounded down to whole BDT per session)
+DEFAULT_RULES = {
+    "currency": "BDT",
+    "base_price": 1500,  # one Standard Cleaning session
+    "area_multipliers": {"gulshan": 1.2, "banani": 1.2, "dhanmondi": 1.2},
+    "default_area_multiplier": 1.0,
+    # Keyed by SERVICES id
+    "service_multipliers": {"1": 1.0, "2": 1.8, "3": 2.6, "4": 3.4, "5": 1.4},
+    # [minimum sessions per month, multiplier], ascending
+    "frequency_tiers": [[0, 1.0], [4, 0.9]],
+    "urgency_multipliers": {"standard": 1.0, "next_day": 1.15, "same_day": 1.3},
+    # +/- rating_step per rating point away from rating_pivot
+    "rating_pivot": 3.0,
+    "rating_step": 0.1,
+    "rating_range": [1.0, 5.0]
+}
+
+
+def load_rules(path: str = PRICING_RULES_FILE):
+    """
+    Default rules with any top-level keys from `path` (JSON) replacing them.
+    """
+    rules = json.loads(json.dumps(DEFAULT_RULES))
+    if path and os.path.exists(path):
+        with open(path) as f:
+            rules.update(json.load(f))
+    return rules
+
+
+class PricingEngine:
+    """
+    Deterministic price quotes from a rules table.
+    `quote` prices one request in plain Python; `quote_batch` prices
+    whole columns at once with NumPy. Both apply the same multipliers in
+    the same order, so a row gets the same price either way.
+    Unknown service ids or urgencies raise ValueError.
+    """
+
+    def __init__(self, rules: dict = None):
+        self.rules = rules or load_rules()
+        self.currency = self.rules["currency"]
+        self.base_price = float(self.rules["base_price"])
+        self.area_multipliers = {k.lower(): float(v) for k, v in self.rules["area_multipliers"].items()}
+        self.default_area_multiplier = float(self.rules["default_area_multiplier"])
+        self.service_multipliers = {str(k): float(v) for k, v in self.rules["service_multipliers"].items()}
+        self.urgency_multipliers = {k: float(v) for k, v in self.rules["urgency_multipliers"].items()}
+        tiers = sorted(self.rules["frequency_tiers"])
+        self.tier_mins = np.array([t[0] for t in tiers], dtype=np.float64)
+        self.tier_multipliers = np.array([t[1] for t in tiers], dtype=np.float64)
+        self._tier_min_list = self.tier_mins.tolist()
+        self._tier_multiplier_list = self.tier_multipliers.tolist()
+        self.rating_pivot = float(self.rules["rating_pivot"])
+        self.rating_step = float(self.rules["rating_step"])
+        self.rating_min, self.rating_max = (float(r) for r in self.rules["rating_range"])
+
+    # -----------------------------
+    # Single quote
+    # -----------------------------
+    def _service_multiplier(self, service_id: str):
+        if service_id not in self.service_multipliers or service_id not in SERVICES:
+            raise ValueError(f"Unknown service_id: {service_id}")
+        return self.service_multipliers[service_id]
+
+    def _urgency_multiplier(self, urgency: str):
+        if urgency not in self.urgency_multipliers:
+            raise ValueError(f"Unknown urgency: {urgency} (expected one of {', '.join(self.urgency_multipliers)})")
+        return self.urgency_multipliers[urgency]
+
+    def _frequency_multiplier(self, frequency: int):
+        if frequency < 0:
+            raise ValueError("frequency must be >= 0")
+        tier = max(bisect.bisect_right(self._tier_min_list, frequency) - 1, 0)
+        return self._tier_multiplier_list[tier]
+
+    def quote(self, area: str, frequency: int, rating: float, service_id: str = "1",
+              urgency: str = "standard", duration_hours: float = None):
+        """
+        Price one cleaning.
+        :param area: Name of the area (e.g., Dhanmondi)
+        :param frequency: Cleanings per month
+        :param rating: Customer rating (1-5, clamped)
+        :param service_id: key of SERVICES
+        :param urgency: key of the urgency table (standard, next_day, same_day)
+        :param duration_hours: booked hours if different from the service default
+        :return: structured quote with the price per session and its breakdown
+        """
+        service_id = str(service_id)
+        service_multiplier = self._service_multiplier(service_id)
+        urgency_multiplier = self._urgency_multiplier(urgency)
+        frequency_multiplier = self._frequency_multiplier(frequency)
+        area_multiplier = self.area_multipliers.get(area.strip().lower(), self.default_area_multiplier)
+        duration_factor = duration_hours / SERVICES[service_id]["duration"] if duration_hours else 1.0
+        rating = min(max(float(rating), self.rating_min), self.rating_max)
+        rating_bonus = 1 + (rating - self.rating_pivot) * self.rating_step
+
+        price = (self.base_price * area_multiplier * service_multiplier * duration_factor
+                 * frequency_multiplier * rating_bonus * urgency_multiplier)
+        price = math.floor(price)
+        return {
+            "price": price,
+            "currency": self.currency,
+            "unit": "per session",
+            "monthly_total": price * frequency,
+            "service_id": service_id,
+            "service": SERVICES[service_id]["name"],
+            "duration_hours": duration_hours or SERVICES[service_id]["duration"],
+            "breakdown": {
+                "base_price": self.base_price,
+                "area_multiplier": area_multiplier,
+                "service_multiplier": service_multiplier,
+                "duration_factor": round(duration_factor, 4),
+                "frequency_multiplier": frequency_multiplier,
+                "rating_bonus": round(rating_bonus, 4),
+                "urgency_multiplier": urgency_multiplier
+            }
+        }
+
+    # -----------------------------
+    # Vectorized batch
+    # -----------------------------
+    @staticmethod
+    def _lookup(values, table: dict, default=None, label: str = "value", normalize=None):
+        """
+        Map a column of keys through `table`, resolving (and normalizing)
+        each distinct key once.
+        """
+        mapped = {}
+        for key in set(values):
+            table_key = normalize(key) if normalize else key
+            if table_key in table:
+                mapped[key] = table[table_key]
+            elif default is not None:
+                mapped[key] = default
+            else:
+                raise ValueError(f"Unknown {label}: {key}")
+        return np.fromiter(map(mapped.__getitem__, values), dtype=np.float64, count=len(values))
+
+    def quote_batch(self, areas, frequencies, ratings, service_ids=None, urgencies=None, duration_hours=None):
+        """
+        Price many rows at once; every argument is a column of equal length
+        (service_ids, urgencies and duration_hours may be None for defaults,
+        duration_hours entries may be None/0 for the service default).
+        :return: {"prices": int64 array, "monthly_totals": int64 array}
+        """
+        count = len(areas)
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        if len(frequencies) != count or len(ratings) != count:
+            raise ValueError("All columns must have the same length")
+        if (frequencies < 0).any():
+            raise ValueError("frequency must be >= 0")
+
+        area_multiplier = self._lookup(areas, self.area_multipliers, default=self.default_area_multiplier,
+                                       normalize=lambda area: area.strip().lower())
+        service_ids = ["1"] * count if service_ids is None else service_ids
+        catalog = {sid: m for sid, m in self.service_multipliers.items() if sid in SERVICES}
+        service_multiplier = self._lookup(service_ids, catalog, label="service_id", normalize=str)
+        default_hours = self._lookup(service_ids, {sid: SERVICES[sid]["duration"] for sid in catalog}, normalize=str)
+        if duration_hours is None:
+            duration_factor = np.ones(count)
+        else:
+            hours = np.array([h or np.nan for h in duration_hours], dtype=np.float64)
+            duration_factor = np.where(np.isnan(hours), 1.0, hours / default_hours)
+        urgency_multiplier = (np.ones(count) if urgencies is None
+                              else self._lookup(urgencies, self.urgency_multipliers, label="urgency"))
+        tiers = np.maximum(np.searchsorted(self.tier_mins, frequencies, side="right") - 1, 0)
+        frequency_multiplier = self.tier_multipliers[tiers]
+        ratings = np.clip(np.asarray(ratings, dtype=np.float64), self.rating_min, self.rating_max)
+        rating_bonus = 1 + (ratings - self.rating_pivot) * self.rating_step
+
+        prices = (self.base_price * area_multiplier * service_multiplier * duration_factor
+                  * frequency_multiplier * rating_bonus * urgency_multiplier)
+        prices = np.floor(prices).astype(np.int64)
+        return {"prices": prices, "monthly_totals": prices * frequencies.astype(np.int64)}
+
+
+pricing_engine = PricingEngine()
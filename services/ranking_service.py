@@ -0,0 +1,106 @@
+# services/ranking_service.py
+import os
+import numpy as np
+from services.route_service import get_distance_matrix
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Combined score = DISTANCE_WEIGHT * distance score + RATING_WEIGHT * rating / 5
+DISTANCE_WEIGHT = float(os.getenv("MATCH_DISTANCE_WEIGHT", "0.7"))
+RATING_WEIGHT = float(os.getenv("MATCH_RATING_WEIGHT", "0.3"))
+# Distance at which the distance score drops to 0.5
+DISTANCE_SCALE_KM = float(os.getenv("MATCH_DISTANCE_SCALE_KM", "5"))
+# Straight-line shortlist size relative to top_k, re-scored with road distance
+ROAD_CANDIDATES_FACTOR = 2
+# ORS rejects matrix requests above this many source x destination pairs
+# (one source here, so it caps the shortlist)
+ORS_MATRIX_ELEMENT_LIMIT = int(os.getenv("ORS_MATRIX_ELEMENT_LIMIT", "3500"))
+MAX_TOP_K = min(100, ORS_MATRIX_ELEMENT_LIMIT // ROAD_CANDIDATES_FACTOR)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray):
+    """
+    Great-circle distance from one point to arrays of points, vectorized.
+    """
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def combined_score(distances_km: np.ndarray, ratings: np.ndarray):
+    distance_score = 1.0 / (1.0 + distances_km / DISTANCE_SCALE_KM)
+    return DISTANCE_WEIGHT * distance_score + RATING_WEIGHT * (ratings / 5.0)
+
+
+def _top_indices(scores: np.ndarray, k: int):
+    """Indices of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def rank_cleaners(customer_lat: float, customer_lon: float, cleaners: list, top_k: int = 5,
+                  max_distance_km: float = None, road_distance: bool = True):
+    """
+    Rank a cleaner pool for one customer.
+    1. Straight-line distance and score for the whole pool (NumPy)
+    2. Optional radius filter
+    3. A shortlist goes to a single ORS matrix call for road distances
+    4. Final ranking by the combined distance/rating score
+    """
+    if not cleaners:
+        return {"matches": [], "candidates": 0, "distance_source": "haversine"}
+
+    lats = np.fromiter((c.lat for c in cleaners), dtype=np.float64, count=len(cleaners))
+    lons = np.fromiter((c.lon for c in cleaners), dtype=np.float64, count=len(cleaners))
+    ratings = np.fromiter((c.rating for c in cleaners), dtype=np.float64, count=len(cleaners))
+
+    distances = haversine_km(customer_lat, customer_lon, lats, lons)
+    candidates = np.arange(len(cleaners))
+    if max_distance_km is not None:
+        candidates = candidates[distances <= max_distance_km]
+    if len(candidates) == 0:
+        return {"matches": [], "candidates": 0, "distance_source": "haversine"}
+
+    scores = combined_score(distances[candidates], ratings[candidates])
+    shortlist_size = top_k * ROAD_CANDIDATES_FACTOR if road_distance else top_k
+    shortlist = candidates[_top_indices(scores, shortlist_size)]
+
+    shortlist_distances = distances[shortlist]
+    durations = None
+    distance_source = "haversine"
+    if road_distance:
+        matrix = get_distance_matrix(
+            [(customer_lat, customer_lon)],
+            [(cleaners[i].lat, cleaners[i].lon) for i in shortlist]
+        )
+        if "error" not in matrix:
+            road = np.array(matrix["distances_km"][0], dtype=np.float64)
+            # ORS returns null for unroutable pairs; keep the straight-line value
+            shortlist_distances = np.where(np.isnan(road), shortlist_distances, road)
+            durations = matrix["durations_min"][0]
+            distance_source = "road"
+        else:
+            print(f"❌ ORS matrix failed, ranking by straight-line distance: {matrix['error']}")
+
+    final_scores = combined_score(shortlist_distances, ratings[shortlist])
+    order = _top_indices(final_scores, top_k)
+
+    matches = []
+    for position in order:
+        cleaner = cleaners[shortlist[position]]
+        match = {
+            "id": cleaner.id,
+            "name": cleaner.name,
+            "rating": cleaner.rating,
+            "distance_km": round(float(shortlist_distances[position]), 2),
+            "score": round(float(final_scores[position]), 4)
+        }
+        if durations is not None and durations[position] is not None:
+            match["duration_min"] = round(durations[position], 1)
+        matches.append(match)
+
+    return {"matches": matches, "candidates": int(len(candidates)), "distance_source": distance_source}
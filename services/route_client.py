@@ -0,0 +1,194 @@
+# services/route_client.py
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+OPENROUTE_API_KEY = os.getenv("OPENROUTE_API_KEY")
+# Point at tools/fake_ors_server.py (or a self-hosted ORS) for offline runs
+ORS_BASE_URL = os.getenv("ORS_BASE_URL", "https://api.openrouteservice.org")
+ORS_CONNECT_TIMEOUT = float(os.getenv("ORS_CONNECT_TIMEOUT", "3.05"))
+ORS_READ_TIMEOUT = float(os.getenv("ORS_READ_TIMEOUT", "15"))
+ORS_POOL_SIZE = int(os.getenv("ORS_POOL_SIZE", "10"))
+ROUTE_PROFILE = "driving-car"
+
+
+# -----------------------------
+# Request / response shapes
+# -----------------------------
+def _directions_body(origin, destination):
+    # ORS expects [lon, lat]
+    return {"coordinates": [[origin[1], origin[0]], [destination[1], destination[0]]]}
+
+
+def _matrix_body(sources, destinations):
+    locations = [[lon, lat] for lat, lon in list(sources) + list(destinations)]
+    return {
+        "locations": locations,
+        "sources": list(range(len(sources))),
+        "destinations": list(range(len(sources), len(locations))),
+        "metrics": ["distance", "duration"]
+    }
+
+
+def _api_error(data):
+    error = data.get("error", {}) if isinstance(data, dict) else {}
+    message = error.get("message", "Unknown error") if isinstance(error, dict) else str(error)
+    return {"error": f"API Error: {message}"}
+
+
+def _parse_directions(status_code: int, data):
+    if status_code != 200:
+        return _api_error(data)
+    segment = data["routes"][0]["segments"][0]
+    duration = segment.get("duration")
+    return {
+        "distance_km": segment["distance"] / 1000,
+        "duration_min": duration / 60 if duration is not None else None
+    }
+
+
+def _parse_matrix(status_code: int, data):
+    if status_code != 200:
+        return _api_error(data)
+    return {
+        "distances_km": [[d / 1000 if d is not None else None for d in row] for row in data["distances"]],
+        "durations_min": [[t / 60 if t is not None else None for t in row] for row in data["durations"]]
+    }
+
+
+class RouteClient:
+    """
+    OpenRouteService client with pooled keep-alive connections.
+    - sync calls share one requests.Session (retries 502/503/504)
+    - async calls share one httpx.AsyncClient
+    Both use explicit connect/read timeouts, so a hung ORS call fails
+    instead of blocking a worker. Every call returns a dict; failures
+    come back as {"error": ...} like the rest of the services.
+    requests and httpx are imported when their client is first built.
+    """
+
+    def __init__(self, base_url: str = None, api_key: str = None, profile: str = ROUTE_PROFILE,
+                 connect_timeout: float = ORS_CONNECT_TIMEOUT, read_timeout: float = ORS_READ_TIMEOUT,
+                 pool_size: int = ORS_POOL_SIZE):
+        self.base_url = (base_url or ORS_BASE_URL).rstrip("/")
+        self.api_key = api_key if api_key is not None else OPENROUTE_API_KEY
+        self.profile = profile
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self._session = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def _url(self, service: str):
+        return f"{self.base_url}/v2/{service}/{self.profile}"
+
+    def _headers(self):
+        return {"Authorization": self.api_key or "", "Content-Type": "application/json"}
+
+    # -----------------------------
+    # Sync (requests)
+    # -----------------------------
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    from urllib3.util.retry import Retry
+
+                    session = requests.Session()
+                    # Retry refused connections and gateway errors, never a
+                    # read timeout (ORS is already slow at that point)
+                    retry = Retry(total=2, read=False, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                                  allowed_methods=frozenset(["POST"]), raise_on_status=False)
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                                          max_retries=retry)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self._headers())
+                    self._session = session
+        return self._session
+
+    def _post(self, service: str, body: dict, parse):
+        import requests
+
+        try:
+            response = self.session.post(self._url(service), json=body,
+                                         timeout=(self.connect_timeout, self.read_timeout))
+            return parse(response.status_code, response.json())
+        except requests.Timeout:
+            return {"error": f"OpenRouteService {service} request timed out"}
+        except KeyError as e:
+            return {"error": f"Unexpected API response structure: {str(e)}"}
+        except Exception as e:
+            return {"error": str(e)}
+
+    def directions(self, origin, destination):
+        """
+        Road distance/duration for one (lat, lon) -> (lat, lon) pair.
+        :return: {"distance_km": ..., "duration_min": ...}
+        """
+        return self._post("directions", _directions_body(origin, destination), _parse_directions)
+
+    def matrix(self, sources, destinations):
+        """
+        Every source x destination pair in one /v2/matrix request.
+        :param sources: list of (lat, lon)
+        :param destinations: list of (lat, lon)
+        :return: {"distances_km": [[...]], "durations_min": [[...]]} (rows = sources)
+        """
+        return self._post("matrix", _matrix_body(sources, destinations), _parse_matrix)
+
+    # -----------------------------
+    # Async (httpx)
+    # -----------------------------
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            import httpx
+
+            self._async_client = httpx.AsyncClient(
+                headers=self._headers(),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            )
+        return self._async_client
+
+    async def _apost(self, service: str, body: dict, parse):
+        import httpx
+
+        try:
+            response = await self.async_client.post(self._url(service), json=body)
+            return parse(response.status_code, response.json())
+        except httpx.TimeoutException:
+            return {"error": f"OpenRouteService {service} request timed out"}
+        except KeyError as e:
+            return {"error": f"Unexpected API response structure: {str(e)}"}
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def adirections(self, origin, destination):
+        return await self._apost("directions", _directions_body(origin, destination), _parse_directions)
+
+    async def amatrix(self, sources, destinations):
+        return await self._apost("matrix", _matrix_body(sources, destinations), _parse_matrix)
+
+    # -----------------------------
+    # Shutdown
+    # -----------------------------
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+
+route_client = RouteClient()
@@ -1,42 +1,98 @@
-import requests
-import os
-from dotenv import load_dotenv
+from services.distance_cache import distance_cache, route_key
+from services.executors import run_db
+from services.route_client import route_client, ROUTE_PROFILE
+from services.single_flight import SingleFlight
+
+# Identical lookups in flight at the same time share one ORS request
+directions_flight = SingleFlight("ors_directions")
+
+
+def _match_result(result):
+    if "error" in result:
+        return result
+    return {
+        "distance_km": round(result["distance_km"], 2),
+        "message": "Cleaner matched successfully"
+    }
+
+
+def _fetch_directions(cache_key, customer, cleaner):
+    result = route_client.directions(customer, cleaner)
+    if "error" not in result:
+        distance_cache.put(cache_key, result)
+    return result
 
-load_dotenv()
-OPENROUTE_API_KEY = os.getenv("OPENROUTE_API_KEY")
 
 def get_distance_based_match(customer_lat, customer_lon, cleaner_lat, cleaner_lon):
     """Get distance between customer and cleaner using OpenRouteService"""
+    cache_key = route_key(ROUTE_PROFILE, customer_lat, customer_lon, cleaner_lat, cleaner_lon)
+    cached = distance_cache.get(cache_key)
+    if cached is not None:
+        return _match_result(cached)
+
+    try:
+        result = directions_flight.do(cache_key, lambda: _fetch_directions(
+            cache_key, (customer_lat, customer_lon), (cleaner_lat, cleaner_lon)
+        ))
+    except TimeoutError as e:
+        return {"error": str(e)}
+    return _match_result(result)
+
+
+async def aget_distance_based_match(customer_lat, customer_lon, cleaner_lat, cleaner_lon):
+    """
+    Async variant of get_distance_based_match: the ORS call goes through
+    the shared httpx client and cache I/O runs on the DB executor.
+    """
+    cache_key = route_key(ROUTE_PROFILE, customer_lat, customer_lon, cleaner_lat, cleaner_lon)
+    cached = await run_db(distance_cache.get, cache_key)
+    if cached is not None:
+        return _match_result(cached)
+
+    async def fetch():
+        result = await route_client.adirections((customer_lat, customer_lon), (cleaner_lat, cleaner_lon))
+        if "error" not in result:
+            await run_db(distance_cache.put, cache_key, result)
+        return result
+
     try:
-        url = "https://api.openrouteservice.org/v2/directions/driving-car"
-        headers = {
-            "Authorization": OPENROUTE_API_KEY,
-            "Content-Type": "application/json"
-        }
-        # Correct format: [[lon, lat], [lon, lat]]
-        body = {
-            "coordinates": [
-                [customer_lon, customer_lat],
-                [cleaner_lon, cleaner_lat]
-            ]
-        }
-        
-        response = requests.post(url, json=body, headers=headers)
-        data = response.json()
-        
-        # Check if request was successful
-        if response.status_code != 200:
-            return {"error": f"API Error: {data.get('error', {}).get('message', 'Unknown error')}"}
-        
-        # Correct path for distance
-        distance_meters = data["routes"][0]["segments"][0]["distance"]
-        distance_km = distance_meters / 1000
-        
-        return {
-            "distance_km": round(distance_km, 2), 
-            "message": "Cleaner matched successfully"
-        }
-    except KeyError as e:
-        return {"error": f"Unexpected API response structure: {str(e)}"}
-    except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        result = await directions_flight.ado(cache_key, fetch)
+    except TimeoutError as e:
+        return {"error": str(e)}
+    return _match_result(result)
+
+def get_distance_matrix(sources, destinations):
+    """
+    Road distances/durations between every source and destination with one
+    OpenRouteService matrix request.
+    :param sources: list of (lat, lon)
+    :param destinations: list of (lat, lon)
+    :return: {"distances_km": [[...]], "durations_min": [[...]]} (rows = sources)
+    Pairs already in the distance cache are not requested again; only
+    destinations with at least one uncached pair go to ORS.
+    """
+    sources, destinations = list(sources), list(destinations)
+    keys = [[route_key(ROUTE_PROFILE, s_lat, s_lon, d_lat, d_lon) for d_lat, d_lon in destinations]
+            for s_lat, s_lon in sources]
+    cached = distance_cache.get_many([key for row in keys for key in row])
+    missing = [j for j in range(len(destinations)) if any(row[j] not in cached for row in keys)]
+
+    fetched = {}
+    if missing:
+        result = route_client.matrix(sources, [destinations[j] for j in missing])
+        if "error" in result:
+            return result
+        for i, row in enumerate(keys):
+            for position, j in enumerate(missing):
+                fetched[row[j]] = {
+                    "distance_km": result["distances_km"][i][position],
+                    "duration_min": result["durations_min"][i][position]
+                }
+        # Unroutable pairs (null) may be transient, so they are not cached
+        distance_cache.put_many({key: value for key, value in fetched.items() if value["distance_km"] is not None})
+
+    entries = {**cached, **fetched}
+    return {
+        "distances_km": [[entries[key]["distance_km"] for key in row] for row in keys],
+        "durations_min": [[entries[key]["duration_min"] for key in row] for row in keys]
+    }
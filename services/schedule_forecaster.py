@@ -0,0 +1,238 @@
+# services/schedule_forecaster.py
+import datetime
+import math
+import os
+import statistics
+import warnings
+import numpy as np
+
+# Intervals further than this many (scaled) MADs from the median are ignored
+OUTLIER_MAD_FACTOR = float(os.getenv("FORECAST_OUTLIER_MAD_FACTOR", "3"))
+# Snap to the customer's usual weekday when it holds this share of bookings
+WEEKDAY_PREFERENCE_SHARE = float(os.getenv("FORECAST_WEEKDAY_SHARE", "0.6"))
+# Outlier rejection needs a few intervals to know what is normal
+MIN_INTERVALS_FOR_OUTLIERS = 3
+# ...and a weekday preference a few bookings on that day
+MIN_WEEKDAY_MATCHES = 3
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+EPOCH = datetime.date(1970, 1, 1)  # a Thursday: weekday(day) = (day + 3) % 7
+DIGIT_POSITIONS = [0, 1, 2, 3, 5, 6, 8, 9]  # of YYYY-MM-DD
+
+
+def _parse_history(dates):
+    """
+    Sorted unique day numbers (days since 1970-01-01) plus the entries that
+    could not be parsed.
+    :param dates: comma-separated string or list of YYYY-MM-DD strings/dates
+    """
+    if isinstance(dates, str):
+        dates = dates.split(",")
+    days, ignored = set(), []
+    for value in dates:
+        text = str(value).strip()
+        try:
+            # Exactly YYYY-MM-DD, like the batch parser
+            if len(text) != 10:
+                raise ValueError(text)
+            days.add((datetime.date.fromisoformat(text) - EPOCH).days)
+        except ValueError:
+            if text:
+                ignored.append(text)
+    return sorted(days), ignored
+
+
+def _civil_to_days(year, month, day):
+    """
+    Days since 1970-01-01 for arrays of proleptic Gregorian dates
+    (H. Hinnant's days_from_civil, integer-only).
+    """
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _pack_histories(histories: list):
+    """
+    Parse every history in one pass.
+    :return: (row index, day number) arrays sorted by row then day with
+             duplicates removed, and the unparseable entries per row
+    YYYY-MM-DD strings (and date objects, via str()) are decoded
+    arithmetically from their character codes instead of one by one.
+    """
+    split = [h.split(",") if isinstance(h, str) else list(h) for h in histories]
+    flat = np.char.strip(np.array([d for h in split for d in h] or [""], dtype=str))[:sum(map(len, split))]
+    rows = np.repeat(np.arange(len(split)), [len(h) for h in split])
+    valid = np.char.str_len(flat) == 10
+    codes = flat.astype("<U10").view(np.uint32).reshape(-1, 10).astype(np.int64) - ord("0")
+    valid &= ((codes[:, DIGIT_POSITIONS] >= 0) & (codes[:, DIGIT_POSITIONS] <= 9)).all(axis=1)
+    valid &= (codes[:, [4, 7]] == ord("-") - ord("0")).all(axis=1)
+
+    year = codes[:, 0] * 1000 + codes[:, 1] * 100 + codes[:, 2] * 10 + codes[:, 3]
+    month = codes[:, 5] * 10 + codes[:, 6]
+    day = codes[:, 8] * 10 + codes[:, 9]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[np.clip(month, 0, 12)]
+    month_days = month_days + (leap & (month == 2))
+    valid &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+
+    ignored = [[] for _ in split]
+    for row, value in zip(rows[~valid].tolist(), flat[~valid].tolist()):
+        if value:
+            ignored[row].append(value)
+
+    rows = rows[valid]
+    days = _civil_to_days(year[valid], month[valid], day[valid])
+    order = np.lexsort((days, rows))
+    rows, days = rows[order], days[order]
+    unique = np.ones(len(rows), dtype=bool)
+    unique[1:] = (rows[1:] != rows[:-1]) | (days[1:] != days[:-1])
+    return rows[unique], days[unique].astype(np.float64), ignored
+
+
+def forecast_batch(histories: list, today: datetime.date = None):
+    """
+    Forecast the next cleaning date for many customers at once.
+
+    Histories are packed into one NaN-padded day matrix, so every step
+    below is a NumPy operation over all customers:
+    1. intervals between consecutive cleanings
+    2. MAD-based outlier rejection (skipped / holiday gaps, double bookings)
+    3. median interval -> next date, rolled forward if it is before `today`
+    4. snap to the customer's usual weekday when one dominates
+    5. confidence from interval regularity, history length, outlier share
+       and how stale the history is
+
+    :param histories: one date history per customer (see _parse_history)
+    :param today: reference date (defaults to today)
+    :return: one result dict per customer, in input order
+    """
+    today_day = ((today or datetime.date.today()) - EPOCH).days
+    count = len(histories)
+    if count == 0:
+        return []
+
+    rows, days, ignored = _pack_histories(histories)
+    lengths = np.bincount(rows, minlength=count)
+    width = max(int(lengths.max()), 2)
+    matrix = np.full((count, width), np.nan)
+    cols = np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    matrix[rows, cols] = days
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # all-NaN rows (short histories)
+
+        intervals = np.diff(matrix, axis=1)
+        n_intervals = lengths - 1
+        median = np.nanmedian(intervals, axis=1)
+
+        deviation = np.abs(intervals - median[:, None])
+        spread = np.maximum(1.4826 * np.nanmedian(deviation, axis=1), np.maximum(0.1 * median, 1.0))
+        keep = deviation <= OUTLIER_MAD_FACTOR * spread[:, None]
+        keep |= (n_intervals < MIN_INTERVALS_FOR_OUTLIERS)[:, None] & ~np.isnan(intervals)
+        kept = np.where(keep, intervals, np.nan)
+        kept_count = keep.sum(axis=1)
+
+        interval = np.maximum(np.rint(np.nanmedian(kept, axis=1)), 1)
+        cv = np.nanstd(kept, axis=1) / np.nanmean(kept, axis=1)
+
+    valid = lengths >= 2
+    interval = np.where(valid, interval, 1)
+    last = np.where(valid, matrix[np.arange(count), np.maximum(lengths - 1, 0)], 0)
+
+    # Roll missed dates forward in whole intervals
+    candidate = last + interval
+    missed = np.maximum(np.ceil((today_day - candidate) / interval), 0)
+    candidate = candidate + missed * interval
+
+    # Weekday preference, only meaningful for weekly-or-longer cadences
+    weekdays = (matrix + 3) % 7
+    weekday_counts = np.stack([(weekdays == k).sum(axis=1) for k in range(7)], axis=1)
+    preferred = weekday_counts.argmax(axis=1)
+    matches = weekday_counts.max(axis=1)
+    share = matches / np.maximum(lengths, 1)
+    snap = valid & (share >= WEEKDAY_PREFERENCE_SHARE) & (matches >= MIN_WEEKDAY_MATCHES) & (interval >= 7)
+    shift = (preferred - (candidate + 3) % 7 + 3) % 7 - 3
+    candidate = np.where(snap, candidate + shift, candidate)
+    candidate = np.where(snap & (candidate < today_day), candidate + 7, candidate)
+
+    regularity = 1 / (1 + 2 * np.nan_to_num(cv))
+    history = 1 - np.exp(-kept_count / 3)
+    kept_share = kept_count / np.maximum(n_intervals, 1)
+    confidence = np.round(regularity * history * kept_share / (1 + missed), 2)
+
+    results = []
+    for i in range(count):
+        if not valid[i]:
+            results.append({
+                "predicted_next_schedule": None,
+                "error": "Need at least two valid dates (YYYY-MM-DD)",
+                "ignored": ignored[i]
+            })
+            continue
+        results.append({
+            "predicted_next_schedule": (EPOCH + datetime.timedelta(days=int(candidate[i]))).isoformat(),
+            "confidence": float(confidence[i]),
+            "interval_days": int(interval[i]),
+            "preferred_weekday": WEEKDAYS[int(preferred[i])] if snap[i] else None,
+            "dates_used": int(lengths[i]),
+            "outliers": int(n_intervals[i] - kept_count[i]),
+            "overdue": bool(missed[i] > 0),
+            "ignored": ignored[i]
+        })
+    return results
+
+
+def forecast_next_schedule(dates, today: datetime.date = None):
+    """
+    Forecast for one customer: the forecast_batch steps in plain Python,
+    which beats NumPy's per-call overhead for a single short history.
+    :param dates: comma-separated string or list of YYYY-MM-DD dates
+    """
+    today_day = ((today or datetime.date.today()) - EPOCH).days
+    days, ignored = _parse_history(dates)
+    if len(days) < 2:
+        return {"predicted_next_schedule": None, "error": "Need at least two valid dates (YYYY-MM-DD)",
+                "ignored": ignored}
+
+    intervals = [b - a for a, b in zip(days, days[1:])]
+    kept = intervals
+    if len(intervals) >= MIN_INTERVALS_FOR_OUTLIERS:
+        median = statistics.median(intervals)
+        deviation = [abs(x - median) for x in intervals]
+        spread = max(1.4826 * statistics.median(deviation), max(0.1 * median, 1.0))
+        kept = [x for x, d in zip(intervals, deviation) if d <= OUTLIER_MAD_FACTOR * spread]
+
+    interval = max(round(statistics.median(kept)), 1)
+    cv = statistics.pstdev(kept) / statistics.fmean(kept)
+
+    candidate = days[-1] + interval
+    missed = max(math.ceil((today_day - candidate) / interval), 0)
+    candidate += missed * interval
+
+    weekday_counts = [0] * 7
+    for day in days:
+        weekday_counts[(day + 3) % 7] += 1
+    matches = max(weekday_counts)
+    preferred = weekday_counts.index(matches)
+    snap = (matches / len(days) >= WEEKDAY_PREFERENCE_SHARE and matches >= MIN_WEEKDAY_MATCHES
+            and interval >= 7)
+    if snap:
+        candidate += (preferred - (candidate + 3) % 7 + 3) % 7 - 3
+        if candidate < today_day:
+            candidate += 7
+
+    confidence = (1 / (1 + 2 * cv)) * (1 - math.exp(-len(kept) / 3)) * (len(kept) / len(intervals)) / (1 + missed)
+    return {
+        "predicted_next_schedule": (EPOCH + datetime.timedelta(days=candidate)).isoformat(),
+        "confidence": round(confidence, 2),
+        "interval_days": interval,
+        "preferred_weekday": WEEKDAYS[preferred] if snap else None,
+        "dates_used": len(days),
+        "outliers": len(intervals) - len(kept),
+        "overdue": missed > 0,
+        "ignored": ignored
+    }
@@ -1,63 +1,35 @@
 # services/scheduling.py
-from datetime import datetime, timedelta
-import dateparser
+from datetime import timedelta
 from services.calendar_service import create_calendar_event
-from services.conversation_service import save_message, get_user_messages
+from services.date_extraction import extract_datetime
+from services.conversation_service import save_messages, get_messages_since, get_latest_message_id
 
 
 def parse_date_from_message(message: str):
     """
-    Try to extract a datetime from a user message using dateparser.
+    Try to extract a datetime from a user message
+    (regex fast path, dateparser fallback; see services/date_extraction.py).
     """
-    keywords = ["book", "appointment", "schedule", "cleaning"]
-    
-    # Primary parsing
-    parsed_date = dateparser.parse(
-        message,
-        languages=["en"],
-        settings={
-            "PREFER_DATES_FROM": "future",
-            "TIMEZONE": "Asia/Dhaka",
-            "RETURN_AS_TIMEZONE_AWARE": False,
-            "RELATIVE_BASE": datetime.now(),
-            "STRICT_PARSING": True
-        }
-    )
-
-    if parsed_date:
-        return parsed_date
-
-    # Fallback: remove keywords and try again
-    filtered_msg = message.lower()
-    for kw in keywords:
-        filtered_msg = filtered_msg.replace(kw, "")
-    
-    parsed_date = dateparser.parse(
-        filtered_msg,
-        languages=["en"],
-        settings={
-            "PREFER_DATES_FROM": "future",
-            "TIMEZONE": "Asia/Dhaka",
-            "RETURN_AS_TIMEZONE_AWARE": False,
-            "RELATIVE_BASE": datetime.now()
-        }
-    )
-    return parsed_date
+    return extract_datetime(message)
 
 
-def create_chat_appointment(user_email: str, message: str, service_name: str = "Smart Cleaning"):
+def create_chat_appointment(user_email: str, message: str, service_name: str = "Smart Cleaning",
+                            since: int = None):
     """
     Create a Google Calendar appointment based on a user message.
-    Saves conversation history and returns event details.
+    Saves the user's message and the reply (one write) and returns event details.
+    The returned conversation_history holds only messages newer than the
+    `since` cursor (by default, the two saved by this call), never the
+    whole transcript.
     """
-    # Save user message
-    save_message(user_email, f"User: {message}")
+    if since is None:
+        since = get_latest_message_id(user_email)
 
     # Parse date
     appointment_time = parse_date_from_message(message)
     if not appointment_time:
         response = "Could not detect date/time from your message."
-        save_message(user_email, f"Bot: {response}")
+        save_messages(user_email, [f"User: {message}", f"Bot: {response}"])
         return {"status": "error", "response": response}
 
     start_time = appointment_time
@@ -75,11 +47,11 @@ def create_chat_appointment(user_email: str, message: str, service_name: str = "
     # Prepare bot response
     response = f"✅ Appointment created for {start_time.strftime('%Y-%m-%d %H:%M')}"
 
-    # Save bot response
-    save_message(user_email, f"Bot: {response}")
+    # Save user message and bot response
+    save_messages(user_email, [f"User: {message}", f"Bot: {response}"])
 
-    # Retrieve conversation history
-    conversation_history = get_user_messages(user_email)
+    # Retrieve the new part of the conversation history
+    conversation_history = get_messages_since(user_email, since)
 
     return {
         "status": "success",
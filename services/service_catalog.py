@@ -0,0 +1,30 @@
+# services/service_catalog.py
+
+# Services offered; duration is in hours
+SERVICES = {
+    "1": {
+        "name": "Standard Cleaning",
+        "description": "Basic cleaning of all rooms, dusting, vacuuming, and surface wiping",
+        "duration": 2
+    },
+    "2": {
+        "name": "Deep Cleaning",
+        "description": "Thorough cleaning including kitchen appliances, behind furniture, scrubbing bathrooms, and detailed dusting",
+        "duration": 4
+    },
+    "3": {
+        "name": "Move-in/Move-out Cleaning",
+        "description": "Complete cleaning for vacant properties, including inside cabinets, appliances, and deep scrubbing",
+        "duration": 6
+    },
+    "4": {
+        "name": "Post-Construction Cleaning",
+        "description": "Removal of construction debris, dust, and thorough cleaning of all surfaces",
+        "duration": 8
+    },
+    "5": {
+        "name": "Office Cleaning",
+        "description": "Professional cleaning of office spaces, desks, floors, and common areas",
+        "duration": 3
+    }
+}
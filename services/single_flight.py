@@ -0,0 +1,150 @@
+# services/single_flight.py
+import asyncio
+import os
+import threading
+import time
+
+# How long a call may stay in flight before callers stop joining it
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "30"))
+
+_groups = {}
+
+
+class _Call:
+    """One in-flight upstream call and the callers sharing it."""
+
+    def __init__(self, timeout: float):
+        self.deadline = time.monotonic() + timeout
+        self.callers = 1
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.task = None  # asyncio.Task for async calls
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key runs
+    the upstream call, callers arriving while it is in flight wait for it
+    and get the same result (or the same exception). Nothing is kept once
+    the call finishes; caching stays with the caches.
+    - do(key, fn): blocking callers (threads)
+    - ado(key, fn): coroutine callers; `fn` is a coroutine function and
+      runs as its own task, so a caller timing out or disconnecting does
+      not cancel the call for the others
+    Each key's call has a deadline (`timeout`): waiters give up with
+    TimeoutError when it passes, and later callers start a fresh call
+    instead of joining a stuck one.
+    """
+
+    def __init__(self, name: str, timeout: float = SINGLE_FLIGHT_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self._calls = {}
+        self._acalls = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0, "timeouts": 0, "max_shared": 1}
+        _groups[name] = self
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _join(self, calls: dict, key, timeout: float):
+        """(call, leader) for `key`; must be called with the lock held"""
+        self._stats["calls"] += 1
+        call = calls.get(key)
+        if call is not None and call.remaining() > 0:
+            call.callers += 1
+            self._stats["coalesced"] += 1
+            self._stats["max_shared"] = max(self._stats["max_shared"], call.callers)
+            return call, False
+        call = calls[key] = _Call(self.timeout if timeout is None else timeout)
+        self._stats["executions"] += 1
+        return call, True
+
+    def _release(self, calls: dict, key, call: _Call):
+        with self._lock:
+            if calls.get(key) is call:
+                del calls[key]
+
+    def _timed_out(self, key):
+        self._count("timeouts")
+        return TimeoutError(f"{self.name}: shared call for {key!r} timed out")
+
+    # -----------------------------
+    # Blocking callers
+    # -----------------------------
+    def do(self, key, fn, timeout: float = None):
+        """
+        Result of `fn()`, shared with concurrent callers of the same key.
+        :param timeout: seconds this key's call may stay in flight
+                        (defaults to the group's timeout)
+        The caller that runs `fn` is bounded by the upstream client's own
+        timeouts; callers waiting on it raise TimeoutError at the deadline.
+        """
+        with self._lock:
+            call, leader = self._join(self._calls, key, timeout)
+
+        if not leader:
+            if not call.done.wait(max(call.remaining(), 0)):
+                raise self._timed_out(key)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            self._count("errors")
+            raise
+        finally:
+            self._release(self._calls, key, call)
+            call.done.set()
+
+    # -----------------------------
+    # Coroutine callers
+    # -----------------------------
+    async def ado(self, key, fn, timeout: float = None):
+        """
+        Async variant of `do`: awaits one shared `fn()` task per key.
+        Every caller, the first included, raises TimeoutError at the
+        deadline; the task itself keeps running for anyone still waiting.
+        """
+        with self._lock:
+            call, leader = self._join(self._acalls, key, timeout)
+        if leader:
+            call.task = asyncio.get_running_loop().create_task(fn())
+            call.task.add_done_callback(lambda task: self._finished(key, call, task))
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(call.task), max(call.remaining(), 0))
+        except asyncio.TimeoutError:
+            raise self._timed_out(key) from None
+
+    def _finished(self, key, call: _Call, task: asyncio.Task):
+        self._release(self._acalls, key, call)
+        # Retrieve the exception so a call nobody is still waiting for does not log it as unhandled
+        if not task.cancelled() and task.exception() is not None:
+            self._count("errors")
+
+    # -----------------------------
+    # Metrics
+    # -----------------------------
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls) + len(self._acalls)
+        # Share of calls answered by another caller's upstream request
+        stats["coalescing_ratio"] = round(stats["coalesced"] / stats["calls"], 4) if stats["calls"] else None
+        return stats
+
+
+def single_flight_stats():
+    """Counters of every single-flight group, by name"""
+    return {name: group.stats() for name, group in _groups.items()}
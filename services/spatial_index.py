@@ -0,0 +1,131 @@
+# services/spatial_index.py
+import math
+import threading
+import numpy as np
+from services.ranking_service import haversine_km
+
+KM_PER_DEGREE_LAT = 111.32
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid over point ids (cleaners).
+
+    - insert / update / remove are O(1) dict operations
+    - radius and nearest-k queries only visit cells near the query point,
+      so their cost depends on local density, not on the total count
+    """
+
+    def __init__(self, cell_degrees: float = 0.01):
+        self.cell_degrees = cell_degrees
+        self._cells = {}      # (row, col) -> {id: (lat, lon)}
+        self._positions = {}  # id -> (lat, lon)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _cell(self, lat: float, lon: float):
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def upsert(self, point_id, lat: float, lon: float):
+        with self._lock:
+            self._remove_locked(point_id)
+            self._cells.setdefault(self._cell(lat, lon), {})[point_id] = (lat, lon)
+            self._positions[point_id] = (lat, lon)
+
+    def remove(self, point_id):
+        with self._lock:
+            return self._remove_locked(point_id)
+
+    def _remove_locked(self, point_id):
+        position = self._positions.pop(point_id, None)
+        if position is None:
+            return False
+        cell_key = self._cell(*position)
+        cell = self._cells[cell_key]
+        del cell[point_id]
+        if not cell:
+            del self._cells[cell_key]
+        return True
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _collect(self, cells):
+        ids, lats, lons = [], [], []
+        for cell_key in cells:
+            cell = self._cells.get(cell_key)
+            if not cell:
+                continue
+            for point_id, (lat, lon) in cell.items():
+                ids.append(point_id)
+                lats.append(lat)
+                lons.append(lon)
+        return ids, np.array(lats), np.array(lons)
+
+    def _lon_cells_for(self, lat: float, radius_km: float):
+        km_per_degree_lon = KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01)
+        return math.ceil(radius_km / km_per_degree_lon / self.cell_degrees)
+
+    def within_radius(self, lat: float, lon: float, radius_km: float):
+        """
+        (id, distance_km) pairs within `radius_km`, nearest first.
+        """
+        row, col = self._cell(lat, lon)
+        d_row = math.ceil(radius_km / KM_PER_DEGREE_LAT / self.cell_degrees)
+        d_col = self._lon_cells_for(lat + math.copysign(radius_km / KM_PER_DEGREE_LAT, lat), radius_km)
+        with self._lock:
+            ids, lats, lons = self._collect(
+                (r, c) for r in range(row - d_row, row + d_row + 1) for c in range(col - d_col, col + d_col + 1)
+            )
+        if not ids:
+            return []
+        distances = haversine_km(lat, lon, lats, lons)
+        inside = np.nonzero(distances <= radius_km)[0]
+        inside = inside[np.argsort(distances[inside])]
+        return [(ids[i], float(distances[i])) for i in inside]
+
+    def nearest(self, lat: float, lon: float, k: int, max_radius_km: float = 200):
+        """
+        The `k` nearest (id, distance_km) pairs, nearest first.
+        Rings of cells are scanned outward until no unvisited cell can hold
+        anything closer than the current k-th candidate.
+        """
+        if k <= 0 or not self._positions:
+            return []
+        row, col = self._cell(lat, lon)
+        cell_km = self.cell_degrees * KM_PER_DEGREE_LAT * max(math.cos(math.radians(abs(lat) + 1)), 0.01)
+        max_ring = max(1, math.ceil(max_radius_km / cell_km))
+
+        ids, lats, lons = [], [], []
+        with self._lock:
+            for ring in range(max_ring + 1):
+                if ring == 0:
+                    ring_cells = [(row, col)]
+                else:
+                    ring_cells = [(row + dr, col + dc)
+                                  for dr in range(-ring, ring + 1)
+                                  for dc in (range(-ring, ring + 1) if abs(dr) == ring else (-ring, ring))]
+                ring_ids, ring_lats, ring_lons = self._collect(ring_cells)
+                ids.extend(ring_ids)
+                lats.extend(ring_lats.tolist())
+                lons.extend(ring_lons.tolist())
+
+                if len(ids) >= k:
+                    distances = haversine_km(lat, lon, np.array(lats), np.array(lons))
+                    kth = np.partition(distances, k - 1)[k - 1]
+                    # Anything in ring+1 or beyond is at least ring * cell_km away
+                    if kth <= ring * cell_km:
+                        break
+                if len(ids) == len(self._positions):
+                    break
+
+        if not ids:
+            return []
+        distances = haversine_km(lat, lon, np.array(lats), np.array(lons))
+        order = np.argsort(distances)[:k]
+        return [(ids[i], float(distances[i])) for i in order]
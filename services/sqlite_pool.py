@@ -0,0 +1,146 @@
+# services/sqlite_pool.py
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# -----------------------------
+# Connection tuning
+# -----------------------------
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",      # ~16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped reads
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def _connect(path: str):
+    """
+    Open a tuned SQLite connection that may be shared across threads
+    (one thread at a time, enforced by the pool).
+    """
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# -----------------------------
+# Bounded connection pool
+# -----------------------------
+class SQLitePool:
+    """
+    A bounded pool of long-lived SQLite connections.
+    Connections are opened lazily up to `size` and reused afterwards, so a
+    request never pays for connect + pragma setup more than once per slot.
+    """
+
+    def __init__(self, path: str, size: int = 4, acquire_timeout: float = 10.0):
+        self.path = path
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return _connect(self.path)
+                except Exception:
+                    self._opened -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Timed out waiting for a connection to {self.path}")
+
+    def _release(self, conn):
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for one unit of work.
+        Commits on success, rolls back on error, and always returns the
+        connection to the pool.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """
+        Close every idle connection (used on shutdown and in tools).
+        """
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+# -----------------------------
+# Schema migrations
+# -----------------------------
+def _statements(script: str):
+    """Split an SQL script into complete statements (executescript would autocommit each one)."""
+    statements, buffer = [], ""
+    for piece in script.split(";"):
+        buffer += piece + ";"
+        # A ";" inside a string literal or trigger body leaves the statement incomplete
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip(" \t\r\n;"):
+                statements.append(buffer.strip())
+            buffer = ""
+    return statements
+
+
+def migrate(conn, migrations):
+    """
+    Apply pending migrations, tracked through PRAGMA user_version.
+    `migrations` is an ordered list of SQL scripts or callables taking the
+    connection; entry N brings the schema to version N + 1.
+    Each step runs in one transaction together with its user_version bump
+    (SQLite DDL is transactional), so a failing step leaves the schema at
+    the previous version instead of half-applied.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, step in enumerate(migrations, start=1):
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if callable(step):
+                step(conn)
+            else:
+                for statement in _statements(step):
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version={version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return len(migrations)
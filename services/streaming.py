@@ -0,0 +1,96 @@
+# services/streaming.py
+import orjson
+
+# Headers for text/event-stream responses (no proxy buffering or caching)
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data):
+    """
+    One server-sent event; `data` is sent as JSON.
+    """
+    return f"event: {event}\ndata: {orjson.dumps(data, default=str).decode()}\n\n"
+
+
+class JsonFieldStreamer:
+    """
+    Pull one string field out of a JSON object while it is still being
+    generated, e.g. the "response" of {"intent": ..., "response": "Hi..."}.
+    Feed raw model deltas to `feed`; it returns the newly decoded part of
+    the field value (possibly empty). `prefix` holds everything before the
+    field, so earlier fields can be inspected once the field starts.
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self, field: str):
+        self.field = field
+        self.buffer = ""
+        self.prefix = None    # raw JSON before the field value, once found
+        self.done = False
+        self._position = None  # next unread index inside the field value
+
+    def started(self):
+        return self.prefix is not None
+
+    def _find_start(self):
+        marker = f'"{self.field}"'
+        index = self.buffer.find(marker)
+        while index != -1:
+            rest = self.buffer[index + len(marker):].lstrip()
+            if not rest:
+                return  # wait for more input
+            if rest[0] == ":":
+                value = rest[1:].lstrip()
+                if not value:
+                    return
+                if value[0] != '"':
+                    self.done = True  # null / non-string value: nothing to stream
+                    return
+                self.prefix = self.buffer[:index]
+                self._position = len(self.buffer) - len(value) + 1
+                return
+            index = self.buffer.find(marker, index + 1)
+
+    def feed(self, delta: str):
+        if self.done:
+            return ""
+        self.buffer += delta
+        if self._position is None:
+            self._find_start()
+            if self._position is None:
+                return ""
+
+        out = []
+        i = self._position
+        while i < len(self.buffer):
+            char = self.buffer[i]
+            if char == '"':
+                self.done = True
+                i += 1
+                break
+            if char == "\\":
+                if i + 1 >= len(self.buffer):
+                    break  # escape split across deltas
+                code = self.buffer[i + 1]
+                if code == "u":
+                    if i + 6 > len(self.buffer):
+                        break
+                    point = int(self.buffer[i + 2:i + 6], 16)
+                    if 0xD800 <= point < 0xDC00:  # surrogate pair (emoji etc.)
+                        if i + 12 > len(self.buffer):
+                            break
+                        low = int(self.buffer[i + 8:i + 12], 16)
+                        out.append(chr(0x10000 + ((point - 0xD800) << 10) + (low - 0xDC00)))
+                        i += 12
+                        continue
+                    out.append(chr(point))
+                    i += 6
+                    continue
+                out.append(self._ESCAPES.get(code, code))
+                i += 2
+                continue
+            out.append(char)
+            i += 1
+        self._position = i
+        return "".join(out)
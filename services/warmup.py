@@ -0,0 +1,91 @@
+# services/warmup.py
+import os
+import time
+
+# Do every lazy first-use step during start-up, before the worker reports
+# ready: a slower boot in exchange for no slow first requests
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "false").lower() == "true"
+
+
+def _warm_conversation_db():
+    from services.conversation_store import init_db
+
+    init_db()
+
+
+def _warm_caches():
+    from services.llm_cache import llm_cache
+    from services.distance_cache import distance_cache
+
+    llm_cache.purge_expired()
+    distance_cache.purge_expired()
+
+
+def _warm_chat_model():
+    from services.chat_service import get_chat_model
+
+    get_chat_model()
+
+
+def _warm_hf_client():
+    from services.prediction_service import get_client
+
+    get_client()
+
+
+def _warm_route_client():
+    from services.route_client import route_client
+
+    route_client.session
+    route_client.async_client
+
+
+def _warm_calendar_client():
+    from services.calendar_client import calendar_clients
+
+    calendar_clients.preload()
+
+
+def _warm_date_parser():
+    from services.date_extraction import dateparser_extract
+
+    dateparser_extract("next week")
+
+
+def _warm_tokenizer():
+    from services.context_builder import count_tokens
+
+    count_tokens("warm up")
+
+
+WARMUP_STEPS = [
+    ("conversation_db", _warm_conversation_db),
+    ("caches", _warm_caches),
+    ("chat_model", _warm_chat_model),
+    ("hf_client", _warm_hf_client),
+    ("route_client", _warm_route_client),
+    ("calendar_client", _warm_calendar_client),
+    ("date_parser", _warm_date_parser),
+    ("tokenizer", _warm_tokenizer),
+]
+
+
+def warm_up(extra_steps: list = None):
+    """
+    Run the warm-up steps (imports, clients, schemas, parser state).
+    A failing step is reported and skipped; its work happens on first use.
+    :param extra_steps: more (name, callable) pairs, e.g. router-owned clients
+    :return: {step: elapsed ms, or the error message}
+    """
+    timings = {}
+    for name, step in WARMUP_STEPS + (extra_steps or []):
+        start = time.perf_counter()
+        try:
+            step()
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        except Exception as e:
+            print(f"❌ Warm-up step {name} failed: {e}")
+            timings[name] = str(e)
+    total = sum(t for t in timings.values() if isinstance(t, float))
+    print(f"✅ Warm-up finished in {total:.0f} ms")
+    return timings
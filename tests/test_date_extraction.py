@@ -0,0 +1,60 @@
+# tests/test_date_extraction.py
+from datetime import datetime
+
+import pytest
+
+from services.date_extraction import fast_extract
+
+NOW = datetime(2026, 10, 17, 9, 0)  # a Saturday
+
+
+def extract(message):
+    result = fast_extract(message, NOW)
+    return result and (result["datetime"], result["has_date"], result["has_time"])
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("tomorrow at 10am", datetime(2026, 10, 18, 10, 0)),
+    ("December 20 at 2 PM", datetime(2026, 12, 20, 14, 0)),
+    ("15th December at 14:30", datetime(2026, 12, 15, 14, 30)),
+    ("2026-11-02 at noon", datetime(2026, 11, 2, 12, 0)),
+    ("in 3 days at 9:30 am", datetime(2026, 10, 20, 9, 30)),
+    ("next friday at 3pm", datetime(2026, 10, 23, 15, 0)),
+    ("May 5th at 3pm", datetime(2027, 5, 5, 15, 0)),
+])
+def test_english_date_and_time(message, expected):
+    assert extract(message) == (expected, True, True)
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("আগামীকাল সকাল ১০টায়", datetime(2026, 10, 18, 10, 0)),
+    ("কালকে বিকাল ৫টায়", datetime(2026, 10, 18, 17, 0)),
+    ("পরশু সন্ধ্যা ৭টায়", datetime(2026, 10, 19, 19, 0)),
+    ("আজ রাত ৮টায়", datetime(2026, 10, 17, 20, 0)),
+    ("২০ মে সকাল ১০টায়", datetime(2027, 5, 20, 10, 0)),
+    ("মে ২০, বিকাল ৪টায়", datetime(2027, 5, 20, 16, 0)),
+    # A vowel-sign case ending after the token still counts
+    ("শুক্রবারে বিকেল ৩টায়", datetime(2026, 10, 23, 15, 0)),
+])
+def test_bengali_date_and_time(message, expected):
+    assert extract(message) == (expected, True, True)
+
+
+@pytest.mark.parametrize("message", [
+    "৫ মেঝে পরিষ্কার",  # "মে" (May) inside মেঝে (floor)
+    "২ মেয়ের রুম",     # ... and inside মেয়ে (daughter)
+    "20 মেঝে",
+    "বিকালে আসবেন",      # "কাল" (tomorrow) inside বিকাল (afternoon)
+    "mayday",
+    "deep cleaning please",
+])
+def test_no_date_inside_other_words(message):
+    assert extract(message) == (None, False, False)
+
+
+def test_time_alone_is_today_if_ahead():
+    assert extract("at 3") == (datetime(2026, 10, 17, 15, 0), False, True)
+
+
+def test_date_alone_has_no_time():
+    assert extract("dec 15") == (datetime(2026, 12, 15, 0, 0), True, False)
@@ -0,0 +1,103 @@
+# tests/test_intent_router.py
+from datetime import datetime
+
+import pytest
+
+from services.intent_router import IntentRouter, confirmation_intent
+
+NOW = datetime(2026, 10, 17, 9, 0)
+SELECTED = {"id": "1", "name": "Standard Cleaning", "duration": 2}
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter(enabled=True)
+
+
+def route(router, message, selected_service=None):
+    result = router.route(message, selected_service, NOW)
+    return result and (result["intent"], result["selected_service_id"], result["datetime"])
+
+
+# -----------------------------
+# Answered locally
+# -----------------------------
+@pytest.mark.parametrize("message, expected", [
+    ("hi", ("greeting", None, None)),
+    ("Hello there!", ("greeting", None, None)),
+    ("হ্যালো", ("greeting", None, None)),
+    ("what services do you offer", ("service_inquiry", None, None)),
+    ("2", ("service_selection", "2", None)),
+    ("option 3", ("service_selection", "3", None)),
+    ("২", ("service_selection", "2", None)),
+    ("deep cleaning", ("service_selection", "2", None)),
+])
+def test_routes_locally(router, message, expected):
+    assert route(router, message) == expected
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("tomorrow at 10am", "2026-10-18 10:00"),
+    ("December 20 at 2 PM", "2026-12-20 14:00"),
+    ("আগামীকাল সকাল ১০টায়", "2026-10-18 10:00"),
+])
+def test_datetime_with_service_selected(router, message, expected):
+    assert route(router, message, SELECTED) == ("datetime_provided", None, expected)
+
+
+# -----------------------------
+# Handed to the model
+# -----------------------------
+@pytest.mark.parametrize("message", [
+    "option 2 tomorrow at 10am",
+    "deep cleaning tomorrow at 10am",
+    "service 5 on December 20 at 2 PM",
+])
+def test_service_change_with_datetime_goes_to_model(router, message):
+    assert route(router, message, SELECTED) is None
+
+
+@pytest.mark.parametrize("message", [
+    "not the office one",
+    "I don't want deep cleaning",
+    "no deep cleaning",
+    "anything without moving",
+    "অফিস না",
+    "ডিপ ক্লিনিং নয়",
+])
+def test_negation_goes_to_model(router, message):
+    assert route(router, message) is None
+
+
+@pytest.mark.parametrize("message", [
+    "what does deep cleaning include?",
+    "how much is office cleaning",
+    "tomorrow at 10am",  # no service selected yet
+    "please can you tell me everything about every single service you offer",
+])
+def test_ambiguous_goes_to_model(router, message):
+    assert route(router, message) is None
+
+
+def test_disabled_router_answers_nothing():
+    assert IntentRouter(enabled=False).route("hi", None, NOW) is None
+
+
+# -----------------------------
+# Replies to a pending appointment
+# -----------------------------
+@pytest.mark.parametrize("message, expected", [
+    ("yes please", "confirm"),
+    ("Ok", "confirm"),
+    ("হ্যাঁ", "confirm"),
+    ("ঠিক আছে", "confirm"),
+    ("নিশ্চিত করুন", "confirm"),
+    ("no thanks", "reject"),
+    ("cancel", "reject"),
+    ("না", "reject"),
+    ("বাতিল করুন", "reject"),
+    ("maybe later", None),
+    ("nothing", None),
+])
+def test_confirmation_intent(message, expected):
+    assert confirmation_intent(message) == expected
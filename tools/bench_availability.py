@@ -0,0 +1,66 @@
+# tools/bench_availability.py
+"""
+Benchmark: availability index at 10k cleaners x 90 days.
+
+Each cleaner gets 0-3 random bookings per day during working hours.
+
+Run from the repo root:
+    python tools/bench_availability.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.availability import AvailabilityIndex
+
+CLEANERS = 10_000
+DAYS = 90
+QUERIES = 20_000
+START = datetime(2026, 1, 1)
+
+
+def populate(index: AvailabilityIndex):
+    rng = random.Random(42)
+    bookings = 0
+    for cleaner in range(CLEANERS):
+        index.add_cleaner(cleaner)
+        for day in range(DAYS):
+            for _ in range(rng.randint(0, 3)):
+                start = START + timedelta(days=day, hours=rng.randint(8, 17), minutes=rng.choice([0, 30]))
+                index.book(cleaner, start, start + timedelta(hours=rng.choice([2, 3, 4])))
+                bookings += 1
+    return bookings
+
+
+def timed(label: str, fn, queries):
+    start = time.perf_counter()
+    for args in queries:
+        fn(*args)
+    per_call = (time.perf_counter() - start) / len(queries) * 1e6
+    print(f"{label:<40} {per_call:10.2f} us/call")
+
+
+if __name__ == "__main__":
+    index = AvailabilityIndex()
+    start = time.perf_counter()
+    bookings = populate(index)
+    print(f"🔹 Indexed {bookings:,} bookings for {CLEANERS:,} cleaners x {DAYS} days "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(7)
+
+    def random_time():
+        return START + timedelta(days=rng.randrange(DAYS), hours=rng.randint(8, 17), minutes=rng.choice([0, 30]))
+
+    slot_queries = [(rng.randrange(CLEANERS), random_time(), 120) for _ in range(QUERIES)]
+    timed("is_free(cleaner, start, 2h)", index.is_free, slot_queries)
+    timed("next_free_slots(cleaner, k=5, 4h)", index.next_free_slots,
+          [(c, t, 240, 5) for c, t, _ in slot_queries[:5_000]])
+    timed("find_free_cleaner(start, 2h)", index.find_free_cleaner,
+          [(t, 120) for _, t, _ in slot_queries[:5_000]])
+    timed("next_free_slots_any(k=5, 8h)", index.next_free_slots_any,
+          [(t, 480, 5) for _, t, _ in slot_queries[:200]])
@@ -0,0 +1,93 @@
+# tools/bench_chat_history_payload.py
+"""
+Benchmark: chat response size and rendering time per turn.
+
+Before: every reply carried the whole current conversation (up to 50
+messages; create_chat_appointment the whole transcript) and was rendered
+with jsonable_encoder + json.dumps. After: with a `since` cursor the
+reply carries only the new messages, rendered with orjson.
+
+Part 1 renders payloads directly for growing transcripts; part 2 times
+/schedule/chat end to end (locally answered turns, no model calls).
+
+Run from the repo root:
+    python tools/bench_chat_history_payload.py
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_conversations.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+
+TRANSCRIPT_SIZES = [10, 50, 500, 5000]
+RENDERS = 300
+TURNS = 100
+BOT_REPLY = ("Great choice! **Deep Cleaning** includes:\nThorough cleaning including kitchen appliances, "
+             "behind furniture, scrubbing bathrooms, and detailed dusting\n\nThis typically takes about 4 hours.")
+
+
+def history(count: int, first_id: int = 1):
+    return [
+        {"id": first_id + i, "message": f"User: message {i}" if i % 2 == 0 else f"Bot: {BOT_REPLY}",
+         "timestamp": "2026-10-17 10:53:00"}
+        for i in range(count)
+    ]
+
+
+def render_us(render, payload):
+    start = time.perf_counter()
+    for _ in range(RENDERS):
+        body = render(payload)
+    return (time.perf_counter() - start) / RENDERS * 1e6, len(body)
+
+
+def payload(conversation_history):
+    return {"response": BOT_REPLY, "appointment_confirmed": False, "service_selected": "Deep Cleaning",
+            "conversation_history": conversation_history}
+
+
+def before_render(content):
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def after_render(content):
+    return ORJSONResponse(content).body
+
+
+def turn_latency(client, email: str, use_cursor: bool):
+    since = None
+    timings, sizes = [], []
+    for i in range(TURNS):
+        body = {"email": email, "message": "hi" if i % 2 == 0 else "2"}
+        if use_cursor and since is not None:
+            body["since"] = since
+        start = time.perf_counter()
+        response = client.post("/schedule/chat", json=body)
+        timings.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(response.content))
+        since = response.json()["cursor"]
+    return statistics.median(timings[10:]), statistics.median(sizes[10:])
+
+
+if __name__ == "__main__":
+    print(f"{'transcript':>10} | {'before: bytes':>13} {'us':>9} | {'after: bytes':>12} {'us':>7}")
+    for size in TRANSCRIPT_SIZES:
+        old_us, old_bytes = render_us(before_render, payload(history(size)))
+        new_us, new_bytes = render_us(after_render, payload(history(2, first_id=size - 1)))
+        print(f"{size:>10} | {old_bytes:>13,} {old_us:9.1f} | {new_bytes:>12,} {new_us:7.1f}")
+
+    import main
+
+    with TestClient(main.app) as client:
+        print(f"\n/schedule/chat, {TURNS} turns per user (median after warm-up):")
+        for label, use_cursor in (("full current conversation", False), ("since cursor", True)):
+            ms, size = turn_latency(client, f"{label.replace(' ', '-')}@example.com", use_cursor)
+            print(f"  {label:<26} {ms:7.2f} ms  {size:>8,.0f} bytes")
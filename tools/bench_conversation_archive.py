@@ -0,0 +1,142 @@
+# tools/bench_conversation_archive.py
+"""
+Benchmark: compacting closed booking sessions into zstd archive blobs.
+
+Seeds a conversation database with USERS users x SESSIONS booking
+sessions (all but the last closed and two months old), then runs
+compact_archives without and with a trained dictionary on identical
+copies. Reports hot table size, file size after VACUUM, compression
+ratio and read latency (current conversation, last 50 messages, full
+history) before and after.
+
+Run from the repo root:
+    python tools/bench_conversation_archive.py
+"""
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WORKDIR = tempfile.mkdtemp()
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(WORKDIR, "seed.db")
+
+from services import conversation_store
+from services.conversation_store import ShardedSQLiteStore, connection, init_db
+from services.conversation_archive import compact_archives, archive_stats, _hot_bytes
+from services.conversation_service import get_current_conversation, get_user_messages
+from services.service_catalog import SERVICES
+
+USERS = 2000
+SESSIONS = 6
+REPEATS = 200
+
+SERVICE_LIST = "Hello! 👋 Welcome to Smart Cleaning Services. Here are the cleaning services we offer:\n\n" + "".join(
+    f"{sid}. **{s['name']}** ({s['duration']} hours)\n   - {s['description']}\n\n" for sid, s in SERVICES.items()
+) + "Which service would you like to book today?"
+
+
+def session_messages(rng: random.Random):
+    service = SERVICES[rng.choice(list(SERVICES))]
+    day, hour = rng.randint(1, 28), rng.randint(8, 17)
+    messages = [
+        f"User: {rng.choice(['hi', 'hello', 'hey there', 'good morning'])}",
+        f"Bot: {SERVICE_LIST}",
+        f"User: {rng.choice(['2', 'deep cleaning please', '1', 'office cleaning', '3'])}",
+        f"Bot: Great choice! **{service['name']}** includes:\n{service['description']}\n\nThis typically takes "
+        f"about {service['duration']} hours. When would you like to schedule this service? For example: "
+        f"'tomorrow at 10 AM' or 'December 15 at 2 PM'",
+        f"User: December {day} at {hour}:00",
+        f"Bot: 📅 Perfect! Let me confirm your booking:\n\n🧹 Service: **{service['name']}**\n🗓️ Date: December "
+        f"{day:02d}, 2026\n🕐 Time: {hour:02d}:00\n⏱️ Duration: {service['duration']} hours\n\n**Does this look good "
+        f"to you?** Reply 'Yes' to confirm or 'No' to reschedule.",
+        "User: yes",
+        f"Bot: ✅ Perfect! Your {service['name']} appointment is confirmed for December {day:02d}, 2026 at "
+        f"{hour:02d}:00. I'm adding it to your Google Calendar now.",
+    ]
+    if rng.random() < 0.4:
+        messages.insert(2, f"User: how much is it for a {rng.randint(1, 5)} bedroom flat at road {rng.randint(1, 99)}?")
+        messages.insert(3, f"Bot: For a {rng.randint(1, 5)} bedroom flat it usually costs around "
+                           f"{rng.randint(20, 90) * 100} BDT depending on the service.")
+    return messages
+
+
+def seed():
+    rng = random.Random(23)
+    init_db()
+    with connection("seed") as conn:
+        for u in range(USERS):
+            user_email = f"user{u}@example.com"
+            for session_id in range(SESSIONS):
+                age = f"-{60 - session_id * 5} days" if session_id < SESSIONS - 1 else "-1 hours"
+                conn.executemany(
+                    "INSERT INTO conversations (user_email, message, session_id, timestamp) "
+                    "VALUES (?, ?, ?, datetime('now', ?))",
+                    [(user_email, m, session_id, age) for m in session_messages(rng)]
+                )
+            conn.execute(
+                "INSERT INTO booking_sessions (user_email, session_id) VALUES (?, ?)", (user_email, SESSIONS - 1)
+            )
+    conversation_store.close()
+
+
+def use_database(path: str):
+    conversation_store.store = ShardedSQLiteStore([path])
+
+
+def latency_us(users):
+    results = {}
+    for name, read in (("current conversation", get_current_conversation),
+                       ("last 50 messages", lambda u: get_user_messages(u, 50)),
+                       ("full history", get_user_messages)):
+        timings = []
+        for i in range(REPEATS):
+            user_email = users[i % len(users)]
+            start = time.perf_counter()
+            read(user_email)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        results[name] = timings[len(timings) // 2] * 1e6
+    return results
+
+
+def vacuumed_size(path: str):
+    """File size after checkpoint + VACUUM (deleted rows otherwise stay as free pages)"""
+    conversation_store.close()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    conn.close()
+    use_database(path)
+    return os.path.getsize(path)
+
+
+if __name__ == "__main__":
+    seed()
+    users = [f"user{u}@example.com" for u in random.Random(5).sample(range(USERS), 50)]
+    print(f"{USERS} users x {SESSIONS} sessions ({SESSIONS - 1} closed, 35-60 days old)")
+
+    for label, use_dictionary in (("zstd", False), ("zstd + dictionary", True)):
+        path = os.path.join(WORKDIR, f"{label.replace(' ', '')}.db")
+        shutil.copy(os.path.join(WORKDIR, "seed.db"), path)
+        use_database(path)
+        hot_before, file_before = _hot_bytes(0), vacuumed_size(path)
+        before = latency_us(users)
+
+        report = compact_archives(older_than_days=30, use_dictionary=use_dictionary)
+        after = latency_us(users)
+        hot_after, stats = _hot_bytes(0), archive_stats()
+        file_after = vacuumed_size(path)
+
+        print(f"\n{label}: {report['sessions']:,} sessions / {report['messages']:,} messages archived "
+              f"in {report['elapsed_ms'] / 1000:.1f} s")
+        print(f"  message bytes      {stats['raw_bytes']:>14,} -> {stats['archived_bytes']:,} "
+              f"({stats['raw_bytes'] / stats['archived_bytes']:.1f}x)")
+        print(f"  hot table+indexes  {hot_before:>14,} -> {hot_after:,} bytes")
+        print(f"  file after VACUUM  {file_before:>14,} -> {file_after:,} bytes")
+        for name in before:
+            print(f"  {name:<20} {before[name]:9.1f} us -> {after[name]:9.1f} us (median)")
+    shutil.rmtree(WORKDIR)
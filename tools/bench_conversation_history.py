@@ -0,0 +1,55 @@
+# tools/bench_conversation_history.py
+"""
+Benchmark: get_current_conversation latency vs. total history per user.
+
+Run from the repo root:
+    python tools/bench_conversation_history.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_conversations.db")
+
+from services.conversation_store import connection, init_db
+from services.conversation_service import get_current_conversation
+
+HISTORY_SIZES = [10, 100, 1_000, 10_000, 100_000]
+MESSAGES_PER_SESSION = 20
+REPEATS = 500
+
+
+def seed(user_email: str, count: int):
+    """Insert `count` messages split into sessions; the last one stays open."""
+    current_session = (count - 1) // MESSAGES_PER_SESSION
+    with connection(user_email) as conn:
+        conn.executemany(
+            "INSERT INTO conversations (user_email, message, session_id) VALUES (?, ?, ?)",
+            ((user_email, f"User: message {i}", i // MESSAGES_PER_SESSION) for i in range(count))
+        )
+        conn.execute(
+            "INSERT INTO booking_sessions (user_email, session_id) VALUES (?, ?)",
+            (user_email, current_session)
+        )
+
+
+def bench(user_email: str):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        get_current_conversation(user_email)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1e6, timings[int(len(timings) * 0.99)] * 1e6
+
+
+if __name__ == "__main__":
+    init_db()
+    print(f"{'history':>10} | {'p50 (us)':>10} | {'p99 (us)':>10}")
+    for size in HISTORY_SIZES:
+        user = f"user{size}@example.com"
+        seed(user, size)
+        p50, p99 = bench(user)
+        print(f"{size:>10} | {p50:>10.1f} | {p99:>10.1f}")
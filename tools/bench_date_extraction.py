@@ -0,0 +1,114 @@
+# tools/bench_date_extraction.py
+"""
+Benchmark: date/time extraction from chat messages.
+
+Times the previous parse_date_from_message (dateparser called up to twice
+per message, settings rebuilt every call) against the regex fast path
+with the cached dateparser fallback, per message over a corpus of
+booking phrasings (English and Bengali) and ordinary chat lines. Then
+times extract_batch in-process and over the process pool.
+
+Run from the repo root:
+    python tools/bench_date_extraction.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dateparser
+from services import date_extraction
+from services.date_extraction import extract_batch, extract_date_time
+
+NOW = datetime(2026, 10, 17, 10, 53)
+PASSES = 20
+BATCH_SIZE = 20_000
+
+CORPUS = [
+    # booking phrasings
+    "tomorrow at 10am", "tomorrow at 10 am please", "can I book for tomorrow at 10am?",
+    "I want deep cleaning tomorrow at 10am", "December 15 at 2 PM", "Dec 15, 2026 at 2:30 pm",
+    "15/12 14:00", "15/12/2026", "2026-12-15 10:00", "2 pm tomorrow", "next monday 3pm",
+    "friday at 9", "monday", "this saturday at 11am", "Can you come on Sunday morning at 9?",
+    "tomorrow at noon", "day after tomorrow", "in 3 days at 4pm", "17 oct 9am", "15th december",
+    "tonight at 8", "10am", "3pm", "at 3",
+    # Bengali
+    "আগামীকাল সকাল ১০টায়", "কাল বিকাল ৩টায়", "শুক্রবার ১১টায়", "পরশু দুপুর ২টায়",
+    "১৫ ডিসেম্বর বিকাল ৪টা", "আজ সন্ধ্যা ৬টায় আসতে পারবেন", "সোমবার সকাল ৯টা",
+    # phrasings left to dateparser
+    "next week", "in two weeks", "the 20th at 5pm", "05/06",
+    # ordinary chat
+    "hi", "hello there", "2", "deep cleaning", "what services do you offer",
+    "how much for a 3 bedroom flat?", "do you bring your own supplies", "I have 2 bedrooms",
+    "thanks a lot", "সকালে আসতে পারবেন?", "আপনাদের সার্ভিস কি কি?",
+]
+
+
+def legacy_parse(message: str):
+    """parse_date_from_message before the extraction engine"""
+    keywords = ["book", "appointment", "schedule", "cleaning"]
+    parsed_date = dateparser.parse(message, languages=["en"], settings={
+        "PREFER_DATES_FROM": "future", "TIMEZONE": "Asia/Dhaka", "RETURN_AS_TIMEZONE_AWARE": False,
+        "RELATIVE_BASE": NOW, "STRICT_PARSING": True
+    })
+    if parsed_date:
+        return parsed_date
+    filtered_msg = message.lower()
+    for kw in keywords:
+        filtered_msg = filtered_msg.replace(kw, "")
+    return dateparser.parse(filtered_msg, languages=["en"], settings={
+        "PREFER_DATES_FROM": "future", "TIMEZONE": "Asia/Dhaka", "RETURN_AS_TIMEZONE_AWARE": False,
+        "RELATIVE_BASE": NOW
+    })
+
+
+def per_message_us(fn, clear_cache=False):
+    fn(CORPUS[0])  # load dateparser languages outside the timing
+    start = time.perf_counter()
+    for _ in range(PASSES):
+        if clear_cache:
+            date_extraction._dateparser_parse.cache_clear()
+        for message in CORPUS:
+            fn(message)
+    return (time.perf_counter() - start) / (PASSES * len(CORPUS)) * 1e6
+
+
+def synthetic_messages(rng: random.Random, count: int):
+    """Unique messages (so the fallback cache does not flatter the batch)"""
+    templates = [
+        "tomorrow at {h}am for flat {n}", "can you come on friday at {h} pm? house {n}",
+        "{d} december at {h}:30 pm, road {n}", "কাল সকাল {h}টায়, বাসা {n}",
+        "what is the price for {n} rooms", "in {d} days please, flat {n}", "the {d}th at {h}pm ref {n}",
+    ]
+    return [
+        rng.choice(templates).format(h=rng.randint(1, 11), d=rng.randint(1, 28), n=i)
+        for i in range(count)
+    ]
+
+
+if __name__ == "__main__":
+    fast_hits = sum(
+        1 for m in CORPUS
+        if extract_date_time(m, NOW)["source"] == "fast"
+    )
+    print(f"corpus: {len(CORPUS)} messages, {fast_hits / len(CORPUS):.0%} decided by the fast path")
+
+    before = per_message_us(legacy_parse)
+    after_cold = per_message_us(lambda m: extract_date_time(m, NOW), clear_cache=True)
+    after_warm = per_message_us(lambda m: extract_date_time(m, NOW))
+    print(f"before (dateparser, settings per call): {before:8.1f} us/message")
+    print(f"after  (fast path, cold fallback cache): {after_cold:8.1f} us/message ({before / after_cold:.1f}x)")
+    print(f"after  (fast path, warm fallback cache): {after_warm:8.1f} us/message ({before / after_warm:.1f}x)")
+
+    messages = synthetic_messages(random.Random(7), BATCH_SIZE)
+    for workers in (1, None):
+        date_extraction._dateparser_parse.cache_clear()
+        start = time.perf_counter()
+        results = extract_batch(messages, now=NOW, workers=workers)
+        elapsed = time.perf_counter() - start
+        label = "in-process" if workers == 1 else f"pool of {os.cpu_count()}"
+        print(f"extract_batch() {len(results):,} messages, {label:>10}: {elapsed:6.2f} s "
+              f"({len(results) / elapsed:,.0f} messages/s)")
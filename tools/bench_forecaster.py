@@ -0,0 +1,68 @@
+# tools/bench_forecaster.py
+"""
+Benchmark: local next-cleaning forecaster.
+
+Builds synthetic customers with weekly / fortnightly / monthly cadences,
+jitter, skipped weeks and the odd malformed entry, then times single
+forecasts and batch forecasts and reports how often the forecast lands
+within one day of the customer's true next cleaning.
+
+Run from the repo root:
+    python tools/bench_forecaster.py
+"""
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.schedule_forecaster import forecast_batch, forecast_next_schedule
+
+TODAY = datetime.date(2026, 1, 1)
+BATCH_SIZES = [1_000, 10_000, 50_000]
+
+
+def synthetic_customer(rng: random.Random):
+    """(history as YYYY-MM-DD strings, true next date)"""
+    cadence = rng.choice([7, 7, 7, 14, 14, 30])
+    day = TODAY - datetime.timedelta(days=cadence * rng.randint(4, 20) + rng.randint(0, cadence - 1))
+    history = []
+    while day < TODAY:
+        if rng.random() > 0.1:  # skipped cleaning
+            history.append(day + datetime.timedelta(days=rng.choice([0, 0, 0, 1, -1])))
+        day += datetime.timedelta(days=cadence)
+    dates = [d.isoformat() for d in history]
+    if rng.random() < 0.05:
+        dates.append("not-a-date")
+    return dates, day
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    customers = [synthetic_customer(rng) for _ in range(max(BATCH_SIZES))]
+
+    start = time.perf_counter()
+    singles = [forecast_next_schedule(dates, today=TODAY) for dates, _ in customers[:2_000]]
+    print(f"forecast_next_schedule(): {(time.perf_counter() - start) / 2_000 * 1e6:.0f} us per customer")
+    batch = forecast_batch([dates for dates, _ in customers[:2_000]], today=TODAY)
+    mismatches = sum(
+        (s["predicted_next_schedule"], s.get("interval_days"), s.get("confidence"))
+        != (b["predicted_next_schedule"], b.get("interval_days"), b.get("confidence"))
+        for s, b in zip(singles, batch)
+    )
+    assert mismatches == 0, f"{mismatches} single/batch forecasts differ"
+
+    for size in BATCH_SIZES:
+        histories = [dates for dates, _ in customers[:size]]
+        start = time.perf_counter()
+        results = forecast_batch(histories, today=TODAY)
+        elapsed = time.perf_counter() - start
+        print(f"forecast_batch() {size:>6,} customers: {elapsed * 1000:7.1f} ms ({elapsed / size * 1e6:.1f} us/customer)")
+
+    hits = sum(
+        abs(datetime.date.fromisoformat(r["predicted_next_schedule"]) - truth).days <= 1
+        for r, (_, truth) in zip(results, customers) if r["predicted_next_schedule"]
+    )
+    print(f"within +/-1 day of the true next cleaning: {hits / len(results):.1%}")
@@ -0,0 +1,90 @@
+# tools/bench_message_writer.py
+"""
+Benchmark: conversation logging throughput in messages per second.
+
+Concurrent "chat turns" (a user message and a bot reply each) written
+three ways:
+  - one transaction per message (the previous save_message)
+  - group commit, each caller waiting for its commit (save_message)
+  - group commit, queued (save_message(wait=False), flushed at the end)
+
+Run from the repo root:
+    python tools/bench_message_writer.py
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_conversations.db")
+
+from services.conversation_store import connection, init_db, close
+from services.conversation_service import save_message, get_current_conversation
+from services.message_writer import message_writer
+
+TURNS_PER_THREAD = 400
+CONCURRENCY = [1, 8, 32]
+
+
+def legacy_save(user_email: str, message: str):
+    """save_message before the message writer: its own transaction"""
+    with connection(user_email) as conn:
+        conn.execute(
+            """
+            INSERT INTO conversations (user_email, message, session_id)
+            VALUES (?, ?, COALESCE((SELECT session_id FROM booking_sessions WHERE user_email=?), 0))
+            """,
+            (user_email, message, user_email)
+        )
+
+
+def waited_save(user_email: str, message: str):
+    save_message(user_email, message)
+
+
+def queued_save(user_email: str, message: str):
+    save_message(user_email, message, wait=False)
+
+
+def run(save, threads: int, label: str):
+    def turns(worker: int):
+        user_email = f"{label}-{threads}-{worker}@example.com"
+        for i in range(TURNS_PER_THREAD):
+            save(user_email, f"User: message {i}")
+            save(user_email, f"Bot: reply {i}")
+
+    before = message_writer.stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(turns, range(threads)))
+    message_writer.flush()
+    elapsed = time.perf_counter() - start
+    after = message_writer.stats()
+
+    messages = threads * TURNS_PER_THREAD * 2
+    commits = after["commits"] - before["commits"]
+    per_commit = f"{(after['messages'] - before['messages']) / commits:6.1f}" if commits else "     1"
+    return messages / elapsed, per_commit
+
+
+if __name__ == "__main__":
+    init_db()
+    modes = [
+        ("per-message transaction", legacy_save, "legacy"),
+        ("group commit, waited", waited_save, "waited"),
+        ("group commit, queued", queued_save, "queued"),
+    ]
+    print(f"{'mode':<26} {'threads':>7} {'messages/s':>12} {'msgs/commit':>12}")
+    for threads in CONCURRENCY:
+        for name, save, label in modes:
+            rate, per_commit = run(save, threads, label)
+            print(f"{name:<26} {threads:>7} {rate:12,.0f} {per_commit:>12}")
+
+    # Read-your-writes: a queued message is visible to the next read of that user
+    save_message("ryw@example.com", "User: still queued?", wait=False)
+    visible = get_current_conversation("ryw@example.com")[-1]["message"] == "User: still queued?"
+    print(f"\nread-your-writes after a queued save: {'✅' if visible else '❌'}")
+    message_writer.stop()
+    close()
@@ -0,0 +1,51 @@
+# tools/bench_pricing.py
+"""
+Benchmark: pricing engine, single quotes vs. vectorized batches.
+
+Checks that quote() and quote_batch() agree on every row, then reports
+per-quote latency and batch throughput.
+
+Run from the repo root:
+    python tools/bench_pricing.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pricing_engine import pricing_engine
+
+AREAS = ["Gulshan", "Banani", "Dhanmondi", "Mirpur", "Uttara", "Mohammadpur", "Bashundhara"]
+URGENCIES = ["standard", "next_day", "same_day"]
+BATCH_SIZES = [1_000, 10_000, 100_000]
+
+
+def random_rows(n: int, rng: random.Random):
+    return (
+        [rng.choice(AREAS) for _ in range(n)],
+        [rng.randint(0, 8) for _ in range(n)],
+        [round(rng.uniform(1, 5), 1) for _ in range(n)],
+        [rng.choice("12345") for _ in range(n)],
+        [rng.choice(URGENCIES) for _ in range(n)],
+        [rng.choice([None, None, 3, 5]) for _ in range(n)],
+    )
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+
+    columns = random_rows(10_000, rng)
+    start = time.perf_counter()
+    singles = [pricing_engine.quote(*row)["price"] for row in zip(*columns)]
+    per_quote = (time.perf_counter() - start) / len(singles) * 1e6
+    assert pricing_engine.quote_batch(*columns)["prices"].tolist() == singles, "batch and single quotes differ"
+    print(f"quote() {per_quote:.1f} us per quote")
+
+    for size in BATCH_SIZES:
+        columns = random_rows(size, rng)
+        start = time.perf_counter()
+        pricing_engine.quote_batch(*columns)
+        elapsed = time.perf_counter() - start
+        print(f"quote_batch() {size:>7,} rows: {elapsed * 1000:7.1f} ms ({elapsed / size * 1e6:.2f} us/row)")
@@ -0,0 +1,85 @@
+# tools/bench_route_client.py
+"""
+Benchmark: per-pair directions calls vs. one matrix call.
+
+Runs against tools/fake_ors_server.py (40 ms simulated round trip), without
+the distance cache, for one customer and N candidate cleaners:
+- unpooled: requests.post per pair (the old route_service behaviour)
+- pooled:   RouteClient.directions per pair (keep-alive session)
+- async:    RouteClient.adirections for all pairs concurrently
+- matrix:   one RouteClient.matrix request
+
+Run from the repo root:
+    python tools/bench_route_client.py
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from fake_ors_server import serve
+from services.route_client import RouteClient
+
+PORT = int(os.getenv("FAKE_ORS_PORT", "8091"))
+CANDIDATES = [5, 10, 50]
+CUSTOMER = (23.78, 90.41)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def unpooled(base_url, cleaners):
+    results = []
+    for lat, lon in cleaners:
+        body = {"coordinates": [[CUSTOMER[1], CUSTOMER[0]], [lon, lat]]}
+        data = requests.post(f"{base_url}/v2/directions/driving-car", json=body).json()
+        results.append(data["routes"][0]["segments"][0]["distance"] / 1000)
+    return results
+
+
+async def concurrent(client, cleaners):
+    return await asyncio.gather(*(client.adirections(CUSTOMER, c) for c in cleaners))
+
+
+if __name__ == "__main__":
+    server = serve(PORT)
+    base_url = f"http://127.0.0.1:{PORT}"
+    client = RouteClient(base_url=base_url, api_key="bench", pool_size=10)
+    rng = random.Random(42)
+
+    print(f"{'pairs':>6} | {'unpooled ms':>12} {'pooled ms':>10} {'async ms':>9} {'matrix ms':>10} | {'requests':>16}")
+    for n in CANDIDATES:
+        cleaners = [(CUSTOMER[0] + rng.uniform(-0.1, 0.1), CUSTOMER[1] + rng.uniform(-0.1, 0.1)) for _ in range(n)]
+
+        t_unpooled, raw = timed(lambda: unpooled(base_url, cleaners))
+        t_pooled, pooled = timed(lambda: [client.directions(CUSTOMER, c) for c in cleaners])
+        t_async, gathered = timed(lambda: asyncio.run(concurrent(client, cleaners)))
+        client._async_client = None  # bound to the finished event loop
+        t_matrix, matrix = timed(lambda: client.matrix([CUSTOMER], cleaners))
+
+        for j in range(n):
+            assert abs(matrix["distances_km"][0][j] - pooled[j]["distance_km"]) < 0.01
+            assert abs(gathered[j]["distance_km"] - raw[j]) < 0.01
+
+        print(f"{n:>6} | {t_unpooled:>12.1f} {t_pooled:>10.1f} {t_async:>9.1f} {t_matrix:>10.1f} | "
+              f"{n:>4} vs 1 matrix")
+
+    # M x N: a dispatcher re-planning several jobs at once
+    jobs = [(CUSTOMER[0] + rng.uniform(-0.1, 0.1), CUSTOMER[1] + rng.uniform(-0.1, 0.1)) for _ in range(10)]
+    cleaners = [(CUSTOMER[0] + rng.uniform(-0.1, 0.1), CUSTOMER[1] + rng.uniform(-0.1, 0.1)) for _ in range(50)]
+    t_pairs, _ = timed(lambda: [client.directions(j, c) for j in jobs for c in cleaners])
+    t_matrix, _ = timed(lambda: client.matrix(jobs, cleaners))
+    print(f"10 x 50 matrix: {t_pairs:.0f} ms as 500 pooled directions calls, {t_matrix:.1f} ms as one matrix call")
+
+    client.close()
+    server.shutdown()
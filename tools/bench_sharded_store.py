@@ -0,0 +1,104 @@
+# tools/bench_sharded_store.py
+"""
+Benchmark: conversation write throughput vs. shard count across worker
+processes (as with several uvicorn workers on one host).
+
+Each process writes messages for its own users, either one transaction
+per message or through save_message (the per-process group-commit
+writer). Processes start together; throughput is total messages over
+wall time. With one shard every process queues on the same SQLite
+writer lock; with N shards users spread over N locks.
+
+Run from the repo root:
+    python tools/bench_sharded_store.py
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PROCESSES = 4
+THREADS_PER_PROCESS = 4
+USERS_PER_PROCESS = 64
+MESSAGES_PER_PROCESS = 2000
+SHARD_COUNTS = [1, 2, 4, 8]
+
+
+def init_shards():
+    from services.conversation_store import init_db
+
+    init_db()
+
+
+def worker(index: int, mode: str, start_event, results):
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import ExitStack
+    from services.conversation_store import connection, shard_connection, shard_count
+    from services.conversation_service import save_message
+    from services.message_writer import message_writer
+
+    def per_message(user_email: str, message: str):
+        with connection(user_email) as conn:
+            conn.execute(
+                "INSERT INTO conversations (user_email, message) VALUES (?, ?)", (user_email, message)
+            )
+
+    save = per_message if mode == "per-message txn" else save_message
+    users = [f"user{index}-{u}@example.com" for u in range(USERS_PER_PROCESS)]
+
+    def write(thread: int):
+        for i in range(thread, MESSAGES_PER_PROCESS, THREADS_PER_PROCESS):
+            save(users[i % USERS_PER_PROCESS], f"User: message {i}")
+
+    # Open every shard's connections before the clock starts (long-running workers have them)
+    with ExitStack() as stack:
+        for shard in range(shard_count()):
+            for _ in range(THREADS_PER_PROCESS):
+                stack.enter_context(shard_connection(shard))
+
+    start_event.wait()
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=THREADS_PER_PROCESS) as executor:
+        list(executor.map(write, range(THREADS_PER_PROCESS)))
+    message_writer.stop()
+    results.put((start, time.time()))
+
+
+def run(shards: int, mode: str, workdir: str):
+    os.environ["CONVERSATION_DB_PATH"] = os.path.join(workdir, f"{mode[:5]}-{shards}", "conversations.db")
+    os.environ["CONVERSATION_SHARDS"] = str(shards)
+    os.makedirs(os.path.dirname(os.environ["CONVERSATION_DB_PATH"]))
+
+    ctx = multiprocessing.get_context("spawn")
+    setup = ctx.Process(target=init_shards)
+    setup.start()
+    setup.join()
+
+    start_event, results = ctx.Event(), ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(i, mode, start_event, results)) for i in range(PROCESSES)]
+    for p in processes:
+        p.start()
+    time.sleep(3)  # let every process finish importing
+    start_event.set()
+    spans = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    elapsed = max(end for _, end in spans) - min(start for start, _ in spans)
+    return PROCESSES * MESSAGES_PER_PROCESS / elapsed
+
+
+if __name__ == "__main__":
+    print(f"{PROCESSES} processes x {THREADS_PER_PROCESS} threads, {MESSAGES_PER_PROCESS} messages each, "
+          f"{os.cpu_count()} CPU(s)")
+    print(f"{'mode':<18} {'shards':>6} {'messages/s':>12} {'vs 1 shard':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in ("per-message txn", "group commit"):
+            baseline = None
+            for shards in SHARD_COUNTS:
+                rate = run(shards, mode, workdir)
+                baseline = baseline or rate
+                print(f"{mode:<18} {shards:>6} {rate:12,.0f} {rate / baseline:9.2f}x")
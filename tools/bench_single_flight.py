@@ -0,0 +1,145 @@
+# tools/bench_single_flight.py
+"""
+Benchmark: a burst of identical upstream calls with and without
+single-flight coalescing.
+
+- /price/ with use_llm: BURST threads ask suggest_price the same question
+  at once; the Hugging Face client is replaced by a stand-in that takes
+  HF_LATENCY_MS per request (the response cache starts empty each round,
+  so without coalescing every caller misses and calls the model).
+- /match/: BURST concurrent lookups of the same pair, sync (threads,
+  get_distance_based_match) and async (aget_distance_based_match),
+  against tools/fake_ors_server.py.
+Reports upstream requests, wall time and the coalescing ratio.
+
+Run from the repo root:
+    python tools/bench_single_flight.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+WORKDIR = tempfile.mkdtemp()
+PORT = int(os.getenv("FAKE_ORS_PORT", "8092"))
+os.environ["LLM_CACHE_DB_PATH"] = os.path.join(WORKDIR, "llm_cache.db")
+os.environ["DISTANCE_CACHE_DB_PATH"] = os.path.join(WORKDIR, "route_cache.db")
+os.environ["ORS_BASE_URL"] = f"http://127.0.0.1:{PORT}"
+
+from fake_ors_server import serve
+from services import prediction_service, route_service
+from services.distance_cache import distance_cache
+from services.llm_cache import llm_cache
+from services.route_client import route_client
+from services.single_flight import SingleFlight
+
+BURST = 200
+HF_LATENCY_MS = 300
+upstream_calls = 0
+_count_lock = threading.Lock()
+
+
+class NoFlight:
+    """Every caller runs its own upstream call (the previous behaviour)"""
+
+    def do(self, key, fn, timeout=None):
+        return fn()
+
+    async def ado(self, key, fn, timeout=None):
+        return await fn()
+
+
+class FakeInferenceClient:
+    def text_generation(self, model, prompt, max_new_tokens):
+        count()
+        time.sleep(HF_LATENCY_MS / 1000)
+        return " 4500 BDT per session"
+
+
+def count():
+    global upstream_calls
+    with _count_lock:
+        upstream_calls += 1
+
+
+def counted(fn):
+    def wrapper(*args, **kwargs):
+        count()
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def acounted(fn):
+    async def wrapper(*args, **kwargs):
+        count()
+        return await fn(*args, **kwargs)
+    return wrapper
+
+
+def burst(call):
+    global upstream_calls
+    upstream_calls = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=BURST) as executor:
+        results = list(executor.map(lambda _: call(), range(BURST)))
+    return (time.perf_counter() - start) * 1000, upstream_calls, results
+
+
+def async_burst(call):
+    global upstream_calls
+    upstream_calls = 0
+
+    async def run():
+        return await asyncio.gather(*(call() for _ in range(BURST)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    route_client._async_client = None  # bound to the finished event loop
+    return (time.perf_counter() - start) * 1000, upstream_calls, results
+
+
+def report(label, flight, elapsed_ms, calls, results):
+    assert all(r == results[0] for r in results) and "error" not in results[0], results[0]
+    enabled = isinstance(flight, SingleFlight)
+    ratio = flight.stats()["coalescing_ratio"] if enabled else 0
+    print(f"{label:<24} {'on' if enabled else 'off':<14} {calls:>9} {elapsed_ms:9.1f} {ratio:>9.3f}")
+
+
+if __name__ == "__main__":
+    server = serve(PORT)
+    prediction_service.client = FakeInferenceClient()
+    route_client.directions = counted(route_client.directions)
+    route_client.adirections = acounted(route_client.adirections)
+    print(f"{BURST} identical concurrent calls per round")
+    print(f"{'call':<24} {'single-flight':<14} {'upstream':>9} {'wall ms':>9} {'coalesced':>9}")
+
+    for round_, flight in enumerate((NoFlight(), SingleFlight("bench_hf"))):
+        prediction_service.hf_flight = flight
+        llm_cache.clear()
+        area = f"Gulshan {round_}"
+        elapsed, calls, results = burst(lambda: prediction_service.suggest_price(area, 4, 4.5, use_llm=True))
+        report("suggest_price (HF)", flight, elapsed, calls, results)
+
+    for round_, flight in enumerate((NoFlight(), SingleFlight("bench_ors"))):
+        route_service.directions_flight = flight
+        lat = 23.79 + round_ / 1000  # a pair the distance cache has not seen
+        elapsed, calls, results = burst(lambda: route_service.get_distance_based_match(lat, 90.41, 23.75, 90.39))
+        report("match, sync", flight, elapsed, calls, results)
+
+    for round_, flight in enumerate((NoFlight(), SingleFlight("bench_ors_async"))):
+        route_service.directions_flight = flight
+        lat = 23.80 + round_ / 1000
+        elapsed, calls, results = async_burst(
+            lambda: route_service.aget_distance_based_match(lat, 90.41, 23.75, 90.39)
+        )
+        report("match, async", flight, elapsed, calls, results)
+
+    route_client.close()
+    distance_cache.clear()
+    server.shutdown()
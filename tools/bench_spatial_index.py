@@ -0,0 +1,78 @@
+# tools/bench_spatial_index.py
+"""
+Benchmark: grid location index vs. a linear NumPy scan over all cleaners.
+
+Cleaners are spread uniformly over a ~40 km x 40 km city (Dhaka-sized).
+For each pool size the script reports build time and per-query latency for
+nearest-10 and radius-2km lookups, and checks both methods agree.
+
+Run from the repo root:
+    python tools/bench_spatial_index.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ranking_service import haversine_km
+from services.spatial_index import GridIndex
+
+SIZES = [1_000, 100_000, 1_000_000]
+QUERIES = 500
+CENTER = (23.78, 90.41)
+SPAN_DEGREES = 0.36
+K = 10
+RADIUS_KM = 2.0
+
+
+def linear_nearest(lats, lons, lat, lon, k):
+    distances = haversine_km(lat, lon, lats, lons)
+    top = np.argpartition(distances, k)[:k]
+    return top[np.argsort(distances[top])]
+
+
+def linear_radius(lats, lons, lat, lon, radius_km):
+    distances = haversine_km(lat, lon, lats, lons)
+    return np.nonzero(distances <= radius_km)[0]
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(lat, lon) for lat, lon in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    queries = list(zip(
+        CENTER[0] + rng.uniform(-SPAN_DEGREES / 2, SPAN_DEGREES / 2, QUERIES),
+        CENTER[1] + rng.uniform(-SPAN_DEGREES / 2, SPAN_DEGREES / 2, QUERIES)
+    ))
+
+    print(f"{'cleaners':>10} {'build s':>8} | {'nearest-10 us':>14} {'linear us':>10} | "
+          f"{'radius-2km us':>14} {'linear us':>10}")
+    for size in SIZES:
+        lats = CENTER[0] + rng.uniform(-SPAN_DEGREES / 2, SPAN_DEGREES / 2, size)
+        lons = CENTER[1] + rng.uniform(-SPAN_DEGREES / 2, SPAN_DEGREES / 2, size)
+
+        index = GridIndex()
+        start = time.perf_counter()
+        for i, (lat, lon) in enumerate(zip(lats.tolist(), lons.tolist())):
+            index.upsert(i, lat, lon)
+        build = time.perf_counter() - start
+
+        # Fewer queries for the largest pool keep the run short
+        sample = queries if size < 1_000_000 else queries[:50]
+        grid_nn, grid_nn_res = timed(lambda a, b: index.nearest(a, b, K), sample)
+        lin_nn, lin_nn_res = timed(lambda a, b: linear_nearest(lats, lons, a, b, K), sample)
+        grid_r, grid_r_res = timed(lambda a, b: index.within_radius(a, b, RADIUS_KM), sample)
+        lin_r, lin_r_res = timed(lambda a, b: linear_radius(lats, lons, a, b, RADIUS_KM), sample)
+
+        for got, want in zip(grid_nn_res, lin_nn_res):
+            assert [i for i, _ in got] == want.tolist(), "nearest-k mismatch"
+        for got, want in zip(grid_r_res, lin_r_res):
+            assert sorted(i for i, _ in got) == sorted(want.tolist()), "radius mismatch"
+
+        print(f"{size:>10,} {build:>8.1f} | {grid_nn:>14.1f} {lin_nn:>10.1f} | {grid_r:>14.1f} {lin_r:>10.1f}")
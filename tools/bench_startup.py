@@ -0,0 +1,96 @@
+# tools/bench_startup.py
+"""
+Benchmark: worker cold start.
+
+Imports each module in a fresh interpreter with `python -X importtime`
+and reports the cumulative import time per module (median of RUNS),
+plus the heaviest packages pulled in by `import main`. Then times the
+optional lifespan warm-up (STARTUP_WARMUP=true) step by step.
+
+Run from the repo root:
+    python tools/bench_startup.py
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+MODULES = [
+    "main",
+    "routers.scheduling", "routers.chatbot", "routers.matching", "routers.pricing", "routers.metrics",
+    "services.chat_service", "services.prediction_service", "services.calendar_service",
+    "services.route_service", "services.context_builder", "services.date_extraction",
+    # heavy dependencies, for reference (now imported on first use)
+    "langchain_openai", "openai", "googleapiclient.discovery", "huggingface_hub", "dateparser", "tiktoken",
+]
+TOP_PACKAGES = 10
+
+
+def run_python(code: str, workdir: str, *flags, env: dict = None):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=workdir, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONPATH=ROOT, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "sk-bench"),
+                 **(env or {}))
+    )
+
+
+def import_times(module: str, workdir: str):
+    """{module name: cumulative microseconds} for one fresh `import module`"""
+    result = run_python(f"import {module}", workdir, "-X", "importtime")
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+if __name__ == "__main__":
+    # Run in a scratch directory so SQLite files land there, not in the repo
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'module':<28} {'import ms':>10}  (median of {RUNS} fresh interpreters)")
+        main_runs = []
+        for module in MODULES:
+            try:
+                runs = [import_times(module, workdir) for _ in range(RUNS)]
+            except RuntimeError as e:
+                print(f"{module:<28} {'-':>10}  ({e})")
+                continue
+            if module == "main":
+                main_runs = runs
+            print(f"{module:<28} {statistics.median(r[module] for r in runs) / 1000:10.1f}")
+
+        if main_runs:
+            packages = {}
+            for name in main_runs[0]:
+                top = name.split(".")[0]
+                if name == top and top != "main":
+                    packages[top] = statistics.median(r.get(top, 0) for r in main_runs)
+            print(f"\nheaviest packages under `import main`:")
+            for name, us in sorted(packages.items(), key=lambda item: -item[1])[:TOP_PACKAGES]:
+                print(f"  {name:<26} {us / 1000:10.1f} ms")
+
+        result = run_python(
+            "import json, time\n"
+            "start = time.perf_counter()\n"
+            "import main\n"
+            "imported = time.perf_counter() - start\n"
+            "from services.warmup import warm_up\n"
+            "timings = warm_up([('openai_client', main.scheduling.openai_client)])\n"
+            "print(json.dumps({'import_ms': imported * 1000, 'steps': timings}))",
+            workdir
+        )
+        if result.returncode != 0:
+            print(result.stderr)
+            sys.exit(1)
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"\nimport main: {report['import_ms']:.0f} ms; warm-up steps (ms):")
+        for name, ms in report["steps"].items():
+            print(f"  {name:<26} {ms if isinstance(ms, str) else f'{ms:10.1f}'}")
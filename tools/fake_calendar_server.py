@@ -0,0 +1,151 @@
+# tools/fake_calendar_server.py
+"""
+Offline stand-in for the Google Calendar API (events.insert + batch).
+
+Start it and point the app at it:
+    python tools/fake_calendar_server.py            # serves on :8089 and runs a bulk demo
+    GOOGLE_CALENDAR_ENDPOINT=http://127.0.0.1:8089 uvicorn main:app
+
+Behaviour:
+- POST /calendar/v3/calendars/<id>/events creates an event
+- POST /batch/calendar/v3 handles multipart/mixed batches (max 50 parts)
+- a client-supplied event "id" that already exists returns 409
+- a summary containing "FAIL" returns 400 (for error-mapping checks)
+"""
+import json
+import os
+import sys
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BATCH_LIMIT = 50
+
+_events = {}
+_events_lock = threading.Lock()
+
+
+def _insert_event(body: dict):
+    """Return (status, payload) for one events.insert call."""
+    if "FAIL" in body.get("summary", ""):
+        return 400, {"error": {"code": 400, "message": "Invalid event (fake server rule)"}}
+    event_id = body.get("id") or uuid.uuid4().hex
+    with _events_lock:
+        if event_id in _events:
+            return 409, {"error": {"code": 409, "message": "The requested identifier already exists."}}
+        event = dict(body, id=event_id, htmlLink=f"https://calendar.fake/event?eid={event_id}",
+                     status="confirmed")
+        _events[event_id] = event
+    return 200, event
+
+
+def _http_status_line(status: int):
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 409: "Conflict"}[status]
+    return f"HTTP/1.1 {status} {reason}"
+
+
+def _split_multipart(raw: bytes, content_type: str):
+    """
+    Split a multipart/mixed batch body into (content_id, json_body) pairs.
+    Each part wraps one HTTP request: part headers, blank line, request
+    line + headers, blank line, JSON body.
+    """
+    boundary = content_type.split("boundary=", 1)[1].strip('"').encode()
+    parts = []
+    for chunk in raw.replace(b"\r\n", b"\n").split(b"--" + boundary):
+        chunk = chunk.strip(b"\n")
+        if not chunk or chunk == b"--":
+            continue
+        part_headers, _, inner_request = chunk.partition(b"\n\n")
+        _, _, inner_body = inner_request.partition(b"\n\n")
+        content_id = ""
+        for line in part_headers.decode().split("\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-id":
+                content_id = value.strip().strip("<>")
+        parts.append((content_id, inner_body))
+    return parts
+
+
+class FakeCalendarHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict):
+        self._send(status, json.dumps(payload).encode(), "application/json; charset=UTF-8")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        path = self.path.split("?")[0]
+
+        if path.startswith("/batch"):
+            return self._handle_batch(raw)
+        if path.startswith("/calendar/v3/calendars/") and path.endswith("/events"):
+            status, payload = _insert_event(json.loads(raw or b"{}"))
+            return self._send_json(status, payload)
+        self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def _handle_batch(self, raw: bytes):
+        parts = _split_multipart(raw, self.headers["Content-Type"])
+        if len(parts) > BATCH_LIMIT:
+            return self._send_json(400, {"error": {"code": 400, "message": "Too many requests in batch"}})
+
+        boundary = f"batch_{uuid.uuid4().hex}"
+        chunks = []
+        for content_id, inner_body in parts:
+            status, payload = _insert_event(json.loads(inner_body or b"{}"))
+            chunks.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"{_http_status_line(status)}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(payload)}\r\n"
+            )
+        chunks.append(f"--{boundary}--\r\n")
+        self._send(200, "".join(chunks).encode(), f"multipart/mixed; boundary={boundary}")
+
+
+def serve(port: int = 8089):
+    """Start the fake server on a daemon thread and return it."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeCalendarHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import datetime
+
+    port = int(os.getenv("FAKE_CALENDAR_PORT", "8089"))
+    server = serve(port)
+    os.environ["GOOGLE_CALENDAR_ENDPOINT"] = f"http://127.0.0.1:{port}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from services.calendar_service import create_calendar_events_bulk
+
+    start = datetime.datetime(2025, 12, 1, 10, 0)
+    events = [
+        {
+            "title": "FAIL demo" if i == 7 else f"Weekly Cleaning #{i + 1}",
+            "start_time": start + datetime.timedelta(days=7 * i),
+            "end_time": start + datetime.timedelta(days=7 * i, hours=2),
+            "description": "Bulk demo",
+        }
+        for i in range(120)
+    ]
+    print(f"🔹 Bulk-creating {len(events)} events against http://127.0.0.1:{port} ...")
+    results = create_calendar_events_bulk(events)
+    ok = sum(r["status"] == "success" for r in results)
+    print(f"✅ {ok} created, {len(results) - ok} failed: {[r for r in results if r['status'] != 'success']}")
+    print("Fake calendar server running; Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
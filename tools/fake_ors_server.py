@@ -0,0 +1,131 @@
+# tools/fake_ors_server.py
+"""
+Offline stand-in for OpenRouteService (directions + matrix).
+
+Start it and point the app at it:
+    python tools/fake_ors_server.py                 # serves on :8090
+    ORS_BASE_URL=http://127.0.0.1:8090 uvicorn main:app
+
+Behaviour:
+- POST /v2/directions/<profile> returns routes[0].segments[0] distance/duration
+- POST /v2/matrix/<profile> returns distances/durations (rows = sources)
+- road distance = straight-line distance x ROAD_FACTOR, driven at SPEED_KMH
+- every response waits FAKE_ORS_LATENCY_MS first (default 40 ms) to mimic
+  the round trip to the hosted API
+- a matrix over MATRIX_ELEMENT_LIMIT pairs returns 400, like the hosted API
+- a location at lat/lon 0,0 is unroutable (null in the matrix, 404 for directions)
+"""
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROAD_FACTOR = 1.3
+SPEED_KMH = 30.0
+MATRIX_ELEMENT_LIMIT = 3500
+LATENCY_SECONDS = float(os.getenv("FAKE_ORS_LATENCY_MS", "40")) / 1000
+
+
+def _road_metres(a, b):
+    """a, b are [lon, lat]."""
+    lon1, lat1, lon2, lat2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371008.8 * math.asin(math.sqrt(h)) * ROAD_FACTOR
+
+
+def _unroutable(point):
+    return point[0] == 0 and point[1] == 0
+
+
+def _seconds(metres):
+    return metres / 1000 / SPEED_KMH * 3600
+
+
+class FakeORSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True   # headers and body go out as separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(LATENCY_SECONDS)
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"code": 2000, "message": "Invalid JSON"}})
+
+        path = self.path.split("?")[0]
+        if path.startswith("/v2/directions/"):
+            return self._directions(body)
+        if path.startswith("/v2/matrix/"):
+            return self._matrix(body)
+        self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def _directions(self, body: dict):
+        coordinates = body.get("coordinates") or []
+        if len(coordinates) != 2:
+            return self._send_json(400, {"error": {"code": 2003, "message": "Need exactly two coordinates"}})
+        if any(_unroutable(c) for c in coordinates):
+            return self._send_json(404, {"error": {"code": 2010, "message": "Could not find routable point"}})
+        metres = _road_metres(*coordinates)
+        self._send_json(200, {"routes": [{"segments": [{"distance": metres, "duration": _seconds(metres)}]}]})
+
+    def _matrix(self, body: dict):
+        locations = body.get("locations") or []
+        sources = body.get("sources") or list(range(len(locations)))
+        destinations = body.get("destinations") or list(range(len(locations)))
+        if len(sources) * len(destinations) > MATRIX_ELEMENT_LIMIT:
+            return self._send_json(400, {"error": {
+                "code": 6004, "message": f"Request exceeds {MATRIX_ELEMENT_LIMIT} matrix elements"}})
+
+        distances, durations = [], []
+        for s in sources:
+            distance_row, duration_row = [], []
+            for d in destinations:
+                if _unroutable(locations[s]) or _unroutable(locations[d]):
+                    distance_row.append(None)
+                    duration_row.append(None)
+                else:
+                    metres = _road_metres(locations[s], locations[d])
+                    distance_row.append(round(metres, 2))
+                    duration_row.append(round(_seconds(metres), 2))
+            distances.append(distance_row)
+            durations.append(duration_row)
+        self._send_json(200, {"distances": distances, "durations": durations})
+
+
+class FakeORSServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # concurrent async clients overflow the default of 5
+
+    def handle_error(self, request, client_address):
+        pass  # clients that time out and hang up are expected here
+
+
+def serve(port: int = 8090):
+    """Start the fake server on a daemon thread and return it."""
+    server = FakeORSServer(("127.0.0.1", port), FakeORSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(os.getenv("FAKE_ORS_PORT", "8090"))
+    server = serve(port)
+    print(f"Fake ORS server on http://127.0.0.1:{port}; Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,83 @@
+# tools/load_test_chat.py
+"""
+Load test: concurrent /schedule/chat conversations against stub upstreams.
+
+The stub LLM answers after LLM_LATENCY seconds, either by blocking the
+event loop (how the old sync OpenAI client behaved) or by awaiting (the
+AsyncOpenAI path). Everything runs in-process on one event loop, i.e. one
+uvicorn worker.
+
+Run from the repo root:
+    python tools/load_test_chat.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "load_test.db")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+import httpx
+import routers.scheduling as scheduling
+import services.executors as executors
+from main import app
+from services.conversation_store import init_db
+
+LLM_LATENCY = 0.5
+CONVERSATIONS = 200
+TURNS = 3
+
+STUB_REPLY = json.dumps({
+    "intent": "general_question",
+    "selected_service_id": None,
+    "datetime": None,
+    "response": "Happy to help! Which service would you like?"
+})
+
+
+class StubCompletions:
+    def __init__(self, blocking: bool):
+        self.blocking = blocking
+
+    async def create(self, **kwargs):
+        if self.blocking:
+            time.sleep(LLM_LATENCY)
+        else:
+            await asyncio.sleep(LLM_LATENCY)
+        message = SimpleNamespace(content=STUB_REPLY)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+async def conversation(http, index: int):
+    for turn in range(TURNS):
+        response = await http.post(
+            "/schedule/chat",
+            json={"email": f"load{index}@example.com", "message": f"question {turn}"}
+        )
+        response.raise_for_status()
+
+
+async def run(blocking: bool, conversations: int):
+    scheduling.client = SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions(blocking)))
+    executors._llm_semaphore = None  # semaphores belong to one event loop
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(conversation(http, i) for i in range(conversations)))
+        elapsed = time.perf_counter() - start
+    return conversations * TURNS / elapsed, elapsed
+
+
+if __name__ == "__main__":
+    init_db()
+    # The blocking mode serializes every turn, so keep it small
+    blocking_rps, blocking_s = asyncio.run(run(blocking=True, conversations=10))
+    async_rps, async_s = asyncio.run(run(blocking=False, conversations=CONVERSATIONS))
+    print(f"🔹 Blocking LLM on the loop: {blocking_rps:8.1f} turns/s (10 conversations, {blocking_s:.1f}s)")
+    print(f"🔹 Async pipeline:           {async_rps:8.1f} turns/s ({CONVERSATIONS} conversations, {async_s:.1f}s)")
+    print(f"✅ Speed-up: {async_rps / blocking_rps:.0f}x")